@@ -8,20 +8,18 @@ from russ_swiss_tournament.tie_break import calc_modified_median_solkoff
 from russ_swiss_tournament.matchup_assignment import SwissAssigner, RoundRobinAssigner
 from russ_swiss_tournament.db import Database
 from russ_swiss_tournament.cli import main
+from russ_swiss_tournament.snapshot import load_tournament
 from russ_swiss_tournament.service import MatchResult, Color
 
 def generate_round_robin_rounds():
     db = Database()
-    db.read_players()
-    t = Tournament.from_toml(
+    t = load_tournament(
         Path.cwd() / 'tournaments' / 'russ_29' / 'config.toml',
-        read_rounds = True,
         db=db
     )
     # rra = RoundRobinAssigner(t)
     # rra.prepare_tournament_rounds()
-    # for r in t.rounds:
-    #     r.write_csv(t.folder / 'rounds', db)
+    # t.write_round_csvs(t.folder / 'rounds', db)
     main(t)
 
 generate_round_robin_rounds()
@@ -0,0 +1,266 @@
+'''
+Pairing benchmark and stress runs.
+
+Full tournaments are simulated for every case of a grid of field sizes,
+round counts, pairing engines and result models. Every case is repeated
+with different seeds and records wall time, failure rate, retries and
+_swap_player calls, optionally with the peak memory of one extra traced
+run. Results are compared against a stored json baseline to catch
+regressions.
+
+    python -m russ_swiss_tournament.benchmark --players 8 32 128 --rounds 5 9
+    python -m russ_swiss_tournament.benchmark --write-baseline baseline.json
+    python -m russ_swiss_tournament.benchmark --baseline baseline.json
+
+Players have no rating, results of the RATING model are drawn from a hidden
+Elo strength that falls with the starting rank.
+'''
+from pathlib import Path
+from dataclasses import dataclass, asdict
+from enum import Enum
+import argparse
+import json
+import random
+import sys
+import time
+import tracemalloc
+
+from russ_swiss_tournament.tournament import Tournament, RoundSystem
+from russ_swiss_tournament.matchup_assignment import SwissAssigner, RoundRobinAssigner, PairingEngine, PairingError
+from russ_swiss_tournament.service import MatchResult
+
+class ResultModel(Enum):
+    RANDOM = 1
+    RATING = 2
+
+DEFAULT_PLAYERS = [8, 32, 128, 512, 2000]
+DEFAULT_ROUNDS = [5, 9, 15]
+# Strength difference between neighbouring starting ranks in the RATING model
+RATING_STEP = 10
+DRAW_PROBABILITY = 0.2
+# Metrics may grow by this factor before a case counts as a regression
+REGRESSION_TOLERANCE = 1.5
+# Timings below this many seconds are too noisy to compare
+MIN_ELAPSED = 0.05
+FAILURE_RATE_TOLERANCE = 0.05
+
+@dataclass
+class BenchmarkCase:
+    players: int
+    rounds: int
+    round_system: RoundSystem = RoundSystem.SWISS
+    engine: PairingEngine = PairingEngine.RULES
+    result_model: ResultModel = ResultModel.RANDOM
+    lookahead: bool = False
+
+    @property
+    def key(self) -> str:
+        parts = [self.round_system.name.lower()]
+        if self.round_system == RoundSystem.SWISS:
+            parts.append(self.engine.name.lower() + ('+lookahead' if self.lookahead else ''))
+        parts.append(self.result_model.name.lower())
+        parts.append(f"{self.players}x{self.rounds}")
+        return '-'.join(parts)
+
+@dataclass
+class BenchmarkResult:
+    key: str
+    runs: int
+    failures: int
+    elapsed: float
+    attempts: int
+    swaps: int
+    peak_memory: int | None = None
+    error: str | None = None
+
+    @property
+    def failure_rate(self) -> float:
+        return self.failures / self.runs if self.runs else 0
+
+def create_grid(
+        players: list[int] = DEFAULT_PLAYERS,
+        rounds: list[int] = DEFAULT_ROUNDS,
+        engines: list[PairingEngine] = (PairingEngine.RULES, PairingEngine.MATCHING),
+        result_models: list[ResultModel] = (ResultModel.RANDOM, ResultModel.RATING),
+        lookahead: bool = False,
+        round_robin: bool = True,
+    ) -> list[BenchmarkCase]:
+    '''
+    Swiss cases for every combination, rounds are capped at players - 1.
+    Round-robin cases play all players - 1 rounds, once per field size.
+    '''
+    cases = []
+    for n in players:
+        for r in sorted({min(r, n - 1 + n % 2) for r in rounds}):
+            for engine in engines:
+                for model in result_models:
+                    cases.append(BenchmarkCase(n, r, RoundSystem.SWISS, engine, model, lookahead))
+        if round_robin:
+            for model in result_models:
+                cases.append(BenchmarkCase(n, n - 1 + n % 2, RoundSystem.BERGER, result_model=model))
+    return cases
+
+def simulate_results(t: Tournament, round, model: ResultModel, rng: random.Random):
+    '''Sets a result for every game of round that is not a bye'''
+    ranks = t.get_pairing_index().ranks
+    for m in round.matchups:
+        if m.is_bye():
+            continue
+        white, black = m.get_player_ids()
+        if model == ResultModel.RATING:
+            # Elo expected score of white, the rating falls by RATING_STEP per rank
+            rating_diff = (ranks[white] - ranks[black]) * RATING_STEP
+            expected = 1 / (1 + 10 ** (rating_diff / 400))
+        else:
+            expected = 0.5
+        draw = rng.random() < DRAW_PROBABILITY
+        if draw:
+            m.add_result(MatchResult.DRAW, MatchResult.DRAW)
+        elif rng.random() < expected:
+            m.add_result(MatchResult.WIN, MatchResult.LOSS)
+        else:
+            m.add_result(MatchResult.LOSS, MatchResult.WIN)
+
+def simulate_tournament(case: BenchmarkCase, seed: int) -> (bool, int, int):
+    '''
+    Plays one tournament of case. Returns whether every round was paired,
+    the number of pairing attempts and the number of _swap_player calls.
+    '''
+    rng = random.Random(seed)
+    players = Tournament.create_players(list(range(1, case.players + 1)))
+    t = Tournament(players, [], case.rounds, case.round_system, {}, {}, 2023, 1)
+    attempts = 0
+    if case.round_system == RoundSystem.BERGER:
+        RoundRobinAssigner(t).prepare_tournament_rounds()
+        for r in t.rounds:
+            simulate_results(t, r, case.result_model, rng)
+        return True, attempts, 0
+    sa = SwissAssigner(t, lookahead=case.lookahead, seed=seed)
+    swaps = 0
+    swap_player = sa._swap_player
+    def counting_swap_player(higher, p):
+        nonlocal swaps
+        swaps += 1
+        return swap_player(higher, p)
+    sa._swap_player = counting_swap_player
+    for i in range(case.rounds):
+        try:
+            report = sa.create_next_round(case.engine)
+        except (PairingError, ValueError, RecursionError):
+            return False, attempts, swaps
+        attempts += report.attempts if report else 1
+        simulate_results(t, t.rounds[-1], case.result_model, rng)
+    return True, attempts, swaps
+
+def run_case(case: BenchmarkCase, repeats: int = 3, measure_memory: bool = False) -> BenchmarkResult:
+    '''Runs case with seeds 0 to repeats - 1, elapsed is the mean wall time of a run'''
+    result = BenchmarkResult(case.key, repeats, 0, 0, 0, 0)
+    start = time.perf_counter()
+    try:
+        for seed in range(repeats):
+            complete, attempts, swaps = simulate_tournament(case, seed)
+            result.failures += not complete
+            result.attempts += attempts
+            result.swaps += swaps
+        result.elapsed = (time.perf_counter() - start) / repeats
+        if measure_memory:
+            # Traced separately, tracemalloc slows the run down considerably
+            tracemalloc.start()
+            try:
+                simulate_tournament(case, 0)
+                result.peak_memory = tracemalloc.get_traced_memory()[1]
+            finally:
+                tracemalloc.stop()
+    except Exception as e:
+        result.error = f"{type(e).__name__}: {e}"
+    return result
+
+def run_benchmark(
+        cases: list[BenchmarkCase],
+        repeats: int = 3,
+        measure_memory: bool = False,
+        progress=None,
+    ) -> list[BenchmarkResult]:
+    '''progress is called with every result as soon as its case has finished'''
+    results = []
+    for case in cases:
+        results.append(run_case(case, repeats, measure_memory))
+        if progress:
+            progress(results[-1])
+    return results
+
+def write_baseline(results: list[BenchmarkResult], path: Path):
+    with open(path, 'w') as f:
+        json.dump({r.key: asdict(r) for r in results}, f, indent=2)
+
+def read_baseline(path: Path) -> dict[str,BenchmarkResult]:
+    with open(path) as f:
+        return {k: BenchmarkResult(**v) for k, v in json.load(f).items()}
+
+def compare_with_baseline(
+        results: list[BenchmarkResult],
+        baseline: dict[str,BenchmarkResult],
+        tolerance: float = REGRESSION_TOLERANCE,
+    ) -> list[str]:
+    '''Messages for every metric that got worse than the baseline allows'''
+    regressions = []
+    for r in results:
+        b = baseline.get(r.key)
+        if b is None:
+            continue
+        if r.error and not b.error:
+            regressions.append(f"{r.key}: failed with {r.error}")
+            continue
+        if r.failure_rate > b.failure_rate + FAILURE_RATE_TOLERANCE:
+            regressions.append(f"{r.key}: failure rate {r.failure_rate:.2f} > {b.failure_rate:.2f}")
+        if r.elapsed > max(b.elapsed * tolerance, MIN_ELAPSED):
+            regressions.append(f"{r.key}: elapsed {r.elapsed:.3f}s > {b.elapsed:.3f}s")
+        for metric in ('attempts', 'swaps', 'peak_memory'):
+            new, old = getattr(r, metric), getattr(b, metric)
+            if new is not None and old is not None and new > max(old * tolerance, old + 1):
+                regressions.append(f"{r.key}: {metric} {new} > {old}")
+    return regressions
+
+def format_result(r: BenchmarkResult) -> str:
+    memory = f" {r.peak_memory / 2**20:8.1f}MiB" if r.peak_memory is not None else ''
+    error = f" {r.error}" if r.error else ''
+    return (
+        f"{r.key.ljust(44)} {r.elapsed:9.3f}s fail {r.failure_rate:4.0%} "
+        f"attempts {r.attempts:6} swaps {r.swaps:6}{memory}{error}"
+    )
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description='Benchmark Swiss and round-robin pairing')
+    parser.add_argument('--players', type=int, nargs='+', default=DEFAULT_PLAYERS)
+    parser.add_argument('--rounds', type=int, nargs='+', default=DEFAULT_ROUNDS)
+    parser.add_argument('--engines', nargs='+', default=['rules', 'matching'])
+    parser.add_argument('--results', nargs='+', default=['random', 'rating'])
+    parser.add_argument('--lookahead', action='store_true')
+    parser.add_argument('--no-round-robin', action='store_true')
+    parser.add_argument('--repeats', type=int, default=3)
+    parser.add_argument('--memory', action='store_true', help='record peak memory of one extra run per case')
+    parser.add_argument('--baseline', type=Path, help='compare against this baseline, exits with 1 on regressions')
+    parser.add_argument('--write-baseline', type=Path)
+    args = parser.parse_args(argv)
+
+    cases = create_grid(
+        args.players,
+        args.rounds,
+        [getattr(PairingEngine, e.upper()) for e in args.engines],
+        [getattr(ResultModel, m.upper()) for m in args.results],
+        args.lookahead,
+        not args.no_round_robin,
+    )
+    results = run_benchmark(cases, args.repeats, args.memory, progress=lambda r: print(format_result(r)))
+    if args.write_baseline:
+        write_baseline(results, args.write_baseline)
+    if args.baseline:
+        regressions = compare_with_baseline(results, read_baseline(args.baseline))
+        for message in regressions:
+            print(f"REGRESSION {message}")
+        if regressions:
+            return 1
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,59 @@
+'''
+Closed form Berger tables.
+
+https://en.wikipedia.org/wiki/Round-robin_tournament#Berger_tables
+
+Any board of any round is calculated directly from the player count, so a
+single round can be produced without building the earlier ones. Players
+are starting ranks from 1. An odd player count gets a bye as the last rank,
+boards against the bye are returned with None as the opponent. In a double
+round-robin the second cycle repeats the first one with colors reversed.
+'''
+from typing import Iterator
+
+def get_table_size(player_count: int) -> int:
+    '''Player count rounded up to an even number, the extra rank is the bye'''
+    return player_count + player_count % 2
+
+def get_round_count(player_count: int, cycles: int = 1) -> int:
+    return (get_table_size(player_count) - 1) * cycles
+
+def get_board_count(player_count: int) -> int:
+    return get_table_size(player_count) // 2
+
+def get_board(player_count: int, round: int, board: int) -> tuple[int | None, int | None]:
+    '''
+    White and black rank of a board, round and board are 1 based. The player
+    without an opponent is returned together with None, keeping the colors.
+    '''
+    n = get_table_size(player_count)
+    m = n - 1
+    round_count = get_round_count(player_count, cycles=2)
+    if not 1 <= round <= round_count:
+        raise ValueError(f"Round {round} is out of range for {player_count} players")
+    if not 1 <= board <= n // 2:
+        raise ValueError(f"Board {board} is out of range for {player_count} players")
+    cycle_round = (round - 1) % m + 1
+    # The player meeting the last rank on board 1 advances by half the table every round
+    first = ((cycle_round - 1) * (n // 2)) % m + 1
+    if board == 1:
+        white, black = (first, n) if cycle_round % 2 == 1 else (n, first)
+    else:
+        k = board - 1
+        white = (first + k - 1) % m + 1
+        black = (first - k - 1) % m + 1
+    if round > m:
+        white, black = black, white
+    if n != player_count:
+        white = None if white == n else white
+        black = None if black == n else black
+    return white, black
+
+def get_round(player_count: int, round: int) -> list[tuple[int | None, int | None]]:
+    '''All boards of a round, the board with a bye included'''
+    return [get_board(player_count, round, b) for b in range(1, get_board_count(player_count) + 1)]
+
+def iter_rounds(player_count: int, cycles: int = 1) -> Iterator[list[tuple[int | None, int | None]]]:
+    '''Lazily yields every round of the tournament'''
+    for r in range(1, get_round_count(player_count, cycles) + 1):
+        yield get_round(player_count, r)
@@ -4,6 +4,9 @@ from typing import Callable
 import sys
 
 from russ_swiss_tournament.tournament import Tournament, RoundSystem
+from russ_swiss_tournament.watch import watch_rounds
+from russ_swiss_tournament.export import export_tournaments
+from russ_swiss_tournament.service import parse_board_score
 
 @dataclass
 class Command:
@@ -12,11 +15,14 @@ class Command:
     help: str
 
 def update(t: Tournament):
-    t.rounds = t.read_rounds(t.round_folder, t.players)
+    changed = t.refresh_rounds()
     t.calculate_tie_break_results_round_robin()
     # TODO calculate tie-break results
     # t.calculate_tie_break_results_swiss()
-    print('All round scores and tie-breaks updated successfully')
+    if changed:
+        print(f"Rounds {', '.join(str(i) for i in changed)} changed, scores and tie-breaks updated successfully")
+    else:
+        print('No round files changed since the last update')
 
 def standings(t: Tournament, player_id = None):
     t.calculate_tie_break_results_round_robin()
@@ -52,6 +58,20 @@ def standings(t: Tournament, player_id = None):
                 res = res[:-2] + ")"
             print(res)
 
+def watch(t: Tournament):
+    def on_update(changed):
+        print(f"\nRounds {', '.join(str(i) for i in changed)} changed\n")
+        standings(t)
+
+    def on_error(e):
+        print(f"\nCould not read round files, waiting for a fix. Reason: {e}")
+
+    print(f"Watching {t.round_folder} for round changes. Press Ctrl+C to stop.")
+    try:
+        watch_rounds(t, on_update, on_error)
+    except KeyboardInterrupt:
+        print('\nStopped watching')
+
 def round(t: Tournament, number):
     r_index = int(number)
     rounds = [r for r in t.rounds if r.index == r_index]
@@ -67,7 +87,33 @@ def round(t: Tournament, number):
         f"Round {number} could not be found. Is it registered? Did you type an integer?"
     )
 
+def export(t: Tournament, folder = None):
+    if folder is None:
+        if t.round_folder is None:
+            print("ERROR: Tournament has no round folder, specify the export folder.")
+            return
+        folder = t.round_folder.parent / 'export'
+    paths = export_tournaments([t], Path(folder))
+    print('\n'.join(f"{name.ljust(12)}{path}" for name, path in paths.items()))
+
+def result(t: Tournament, round = None, board = None, score = None):
+    if score is None:
+        print("ERROR: Write the round, the board and the score, for example: result 3 12 1-0")
+        return
+    try:
+        round, board = int(round), int(board)
+    except ValueError:
+        print(f"ERROR: Round and board must be integers. You wrote {round} and {board}.")
+        return
+    white_res, black_res = parse_board_score(score)
+    matchup = t.enter_result(round, board, white_res, black_res)
+    print(f"Round {round} board {board}:\n{matchup}")
+
 def terminate(t: Tournament):
+    if t.checkpoint_journal():
+        print('Journaled rounds and results were written to the round files')
+    if t.journal is not None:
+        t.journal.close()
     sys.exit()
 
 cmd_update = Command(
@@ -91,6 +137,16 @@ cmd_standings = Command(
         "\n\nShorthand command: s (or 's -player_id-)"
     ),
 )
+cmd_watch = Command(
+    watch,
+    ['watch', 'w'],
+    (
+        "Keeps the standings live while round files are edited.\nEvery time a round csv "
+        "file is saved, the changed rounds are read again and the standings are printed."
+        "\nPress Ctrl+C to get back to the command prompt."
+        "\n\nShorthand command: w"
+    ),
+)
 cmd_round = Command(
     round,
     ['round', 'r'],
@@ -101,15 +157,36 @@ cmd_round = Command(
         "\n\nShorthand command: r -num-"
     ),
 )
+cmd_result = Command(
+    result,
+    ['result', 'res'],
+    (
+        "Enters the result of a single board without editing the round file.\nBoards are "
+        "numbered like the rows of the round file. The score is written as white-black, for "
+        "example 1-0, 0-1, 0.5-0.5, 1-wo or - to clear it.\nStandings are updated right away, "
+        "the round files are updated when exiting the program."
+        "\n\nShorthand command: res -round- -board- -score-"
+    ),
+)
+cmd_export = Command(
+    export,
+    ['export', 'e'],
+    (
+        "Writes games, standings after every round and tie-break results to columnar files "
+        "for analytics.\nParquet files are written when pyarrow is installed, csv files otherwise."
+        "\nFiles go to an export folder next to the round folder unless a folder is specified."
+        "\n\nShorthand command: e (or 'e -folder-')"
+    ),
+)
 cmd_terminate = Command(
     terminate,
     ['exit', 'quit', 'terminate'],
     (
-        "Exits the program."
+        "Exits the program. Results entered with the result command are written to the round files."
     ),
 )
 
-NON_HELP_COMMANDS = [cmd_update, cmd_standings, cmd_round, cmd_terminate]
+NON_HELP_COMMANDS = [cmd_update, cmd_standings, cmd_watch, cmd_round, cmd_result, cmd_export, cmd_terminate]
 NON_HELP_COMMANDS_PRINT = '\n'.join([', '.join(c.aliases) for c in NON_HELP_COMMANDS])
 
 GENERAL_HELP = (
@@ -123,7 +200,7 @@ cmd_help = Command(
     GENERAL_HELP
 )
 
-AVAILABLE_COMMANDS = [cmd_update, cmd_standings, cmd_round, cmd_help, cmd_terminate]
+AVAILABLE_COMMANDS = [cmd_update, cmd_standings, cmd_watch, cmd_round, cmd_result, cmd_export, cmd_help, cmd_terminate]
 
 def _get_init_text(t: Tournament):
 
@@ -190,9 +267,11 @@ def _get_command(t: Tournament, s: str, help: bool = False):
                 args = None
                 args = [a for a in parts[i+1:]]
                 if args and len(args) == arg_count -1:
-                    res = c.func(t, *args)
+                    c.func(t, *args)
                 else:
-                    res = c.func(t)
+                    c.func(t)
+                # Later parts are arguments of the command, even when they match an alias
+                return
 
 def main(
         t: Tournament
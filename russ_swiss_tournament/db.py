@@ -1,42 +1,164 @@
 from pathlib import Path
+from array import array
+from bisect import bisect_left
 import csv
+import mmap
+import os
+import struct
 
 from russ_swiss_tournament.player import Player
+from russ_swiss_tournament.player_registry import PlayerRegistry
+
+active_map = {
+    'yes': True,
+    'no': False,
+    '0': False,
+    '1': True,
+    0: False,
+    1: True,
+}
+
+def _player_from_row(line: list[str]) -> Player:
+    return Player(
+        id = int(line[0]),
+        first_name = line[3].strip(),
+        last_name = line[2].strip(),
+        active = active_map[line[1].strip().lower()]
+    )
+
+def read_players_csv(path):
+    '''Yields the players of a player csv file, one per row'''
+    with open(path, 'r', newline='') as csv_file:
+        player_reader = csv.reader(csv_file, delimiter=',', quotechar='"')
+        headers = next(player_reader, None)
+        for line in player_reader:
+            yield _player_from_row(line)
+
+def _map_file(f) -> mmap.mmap | bytes:
+    '''Read only memory map of f, mmap cannot map an empty file'''
+    if os.fstat(f.fileno()).st_size == 0:
+        return b''
+    return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+class PlayerIndex:
+    '''
+    Byte offsets of the rows of a players csv sorted by player id.
+
+    The index is persisted next to the csv and both files are memory mapped,
+    so opening it does not depend on the roster size and only the rows that
+    are looked up get parsed. It is rebuilt when the size or mtime of the csv
+    changes. Rows may not contain line breaks inside quoted fields.
+    '''
+    MAGIC = b'RUSSPIDX'
+    HEADER = struct.Struct('=8sqqq')
+
+    def __init__(self, csv_path: Path, index_path: Path | None = None):
+        self.csv_path = Path(csv_path)
+        self.index_path = index_path or self.csv_path.with_name(self.csv_path.name + '.idx')
+        stat = self.csv_path.stat()
+        if not self._is_current(stat):
+            self._build(stat)
+        self._csv_file = open(self.csv_path, 'rb')
+        self._index_file = open(self.index_path, 'rb')
+        self._csv = _map_file(self._csv_file)
+        # An empty or cut short index fails _is_current and is rebuilt with a header
+        self._index = _map_file(self._index_file)
+        count = self.HEADER.unpack_from(self._index)[3]
+        self._columns = memoryview(self._index)[self.HEADER.size:].cast('q')
+        self.ids = self._columns[:count]
+        self.offsets = self._columns[count:]
+
+    def __len__(self):
+        return len(self.ids)
+
+    def _is_current(self, stat: os.stat_result) -> bool:
+        try:
+            with open(self.index_path, 'rb') as f:
+                header = f.read(self.HEADER.size)
+        except FileNotFoundError:
+            return False
+        if len(header) < self.HEADER.size:
+            return False
+        magic, mtime_ns, size, count = self.HEADER.unpack(header)
+        return magic == self.MAGIC and (mtime_ns, size) == (stat.st_mtime_ns, stat.st_size)
+
+    def _build(self, stat: os.stat_result):
+        entries = []
+        with open(self.csv_path, 'rb') as f:
+            f.readline()
+            offset = f.tell()
+            for line in f:
+                cell = line.split(b',', 1)[0].strip().strip(b'"')
+                if cell:
+                    entries.append((int(cell), offset))
+                offset += len(line)
+        # Sorting by offset as well keeps the first row of a duplicated id first
+        entries.sort()
+        tmp_path = self.index_path.with_name(self.index_path.name + '.tmp')
+        with open(tmp_path, 'wb') as f:
+            f.write(self.HEADER.pack(self.MAGIC, stat.st_mtime_ns, stat.st_size, len(entries)))
+            array('q', (e[0] for e in entries)).tofile(f)
+            array('q', (e[1] for e in entries)).tofile(f)
+        os.replace(tmp_path, self.index_path)
+
+    def get_player(self, player_id: int) -> Player | None:
+        pos = bisect_left(self.ids, player_id)
+        if pos == len(self.ids) or self.ids[pos] != player_id:
+            return None
+        offset = self.offsets[pos]
+        end = self._csv.find(b'\n', offset)
+        line = self._csv[offset:end if end != -1 else len(self._csv)].decode().rstrip('\r')
+        return _player_from_row(next(csv.reader([line], delimiter=',', quotechar='"')))
+
+    def close(self):
+        self.ids.release()
+        self.offsets.release()
+        self._columns.release()
+        for mapped in (self._csv, self._index):
+            if isinstance(mapped, mmap.mmap):
+                mapped.close()
+        self._csv_file.close()
+        self._index_file.close()
 
 class Database:
     def __init__(
             self,
             players: list[Player] = [],
             players_csv_path = Path().cwd() / 'player.csv',
+            lazy: bool = False,
         ):
+        '''
+        In lazy mode read_players only opens a PlayerIndex of the csv and
+        players are created when they are first looked up.
+        '''
         self.players_csv_path = players_csv_path
+        self.registry = PlayerRegistry()
+        self.lazy = lazy
+        self.index = None
 
     def read_players(self):
-        active_map = {
-            'yes': True,
-            'no': False,
-            '0': False,
-            '1': True,
-            0: False,
-            1: True,
-        }
-        players = []
-        with open(self.players_csv_path, 'r', newline='') as csv_file:
-            player_reader = csv.reader(csv_file, delimiter=',', quotechar='"')
-            headers = next(player_reader, None)
-            for line in player_reader:
-                players.append(Player(
-                    id = int(line[0]),
-                    first_name = line[3].strip(),
-                    last_name = line[2].strip(),
-                    active = active_map[line[1].strip().lower()]
-                ))
+        if self.lazy:
+            if self.index is not None:
+                self.index.close()
+            self.index = PlayerIndex(self.players_csv_path)
+            self.registry = PlayerRegistry()
+            self.players = self.registry.players
+            return
+        players = list(read_players_csv(self.players_csv_path))
         self.players = players
+        self.registry = PlayerRegistry(players)
+
+    def has_players(self) -> bool:
+        '''True once read_players ran or players were added'''
+        return bool(self.registry) or self.index is not None
 
     def get_player_by_id(self, id) -> Player:
-        try:
-            match = [p for p in self.players if p.id == id][0]
-        except IndexError:
+        match = self.registry.get(id)
+        if match is None and self.index is not None:
+            match = self.index.get_player(id)
+            if match is not None:
+                self.registry.add(match)
+        if match is None:
             raise IndexError(f"No player was found in the database with id {id}")
         return match
 
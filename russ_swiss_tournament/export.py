@@ -0,0 +1,243 @@
+'''
+Columnar export of games, standings and tie-breaks for analytics.
+
+Three tables are written for any number of tournaments:
+
+    games       year, count, round, board, white_id, black_id, white_result,
+                black_result, white_score, black_score
+    standings   year, count, round, rank, player_id, score
+    tie_breaks  year, count, method, player_id, value
+
+Standings are written for every round, so the table holds the standings
+snapshot after each round. Tables are written batch by batch, one round or
+one tie-break method at a time. Game columns are passed from the results
+store arrays without creating Python objects per game, so exporting many
+years from a generator of tournaments keeps only one tournament in memory.
+
+Parquet and Arrow IPC files require the optional pyarrow dependency, csv
+files are written otherwise.
+'''
+from pathlib import Path
+from array import array
+from enum import Enum
+from typing import Iterable
+import csv
+
+from russ_swiss_tournament.tournament import Tournament, RoundSystem
+from russ_swiss_tournament.results_store import RESULTS_BY_CODE
+from russ_swiss_tournament.service import match_result_score_map
+
+class ExportFormat(Enum):
+    PARQUET = 1
+    ARROW = 2
+    CSV = 3
+
+EXPORT_EXTENSIONS = {
+    ExportFormat.PARQUET: 'parquet',
+    ExportFormat.ARROW: 'arrow',
+    ExportFormat.CSV: 'csv',
+}
+
+# Column names and kinds of every table. Result and score columns both hold
+# result codes, written as the result name and as the score of the player.
+TABLES = {
+    'games': [
+        ('year', 'int32'),
+        ('count', 'int32'),
+        ('round', 'int32'),
+        ('board', 'int32'),
+        ('white_id', 'int64'),
+        ('black_id', 'int64'),
+        ('white_result', 'result'),
+        ('black_result', 'result'),
+        ('white_score', 'score'),
+        ('black_score', 'score'),
+    ],
+    'standings': [
+        ('year', 'int32'),
+        ('count', 'int32'),
+        ('round', 'int32'),
+        ('rank', 'int32'),
+        ('player_id', 'int64'),
+        ('score', 'float64'),
+    ],
+    'tie_breaks': [
+        ('year', 'int32'),
+        ('count', 'int32'),
+        ('method', 'string'),
+        ('player_id', 'int64'),
+        ('value', 'float64'),
+    ],
+}
+
+RESULT_NAMES = [r.name.lower() if r else '' for r in RESULTS_BY_CODE]
+SCORES_BY_CODE = [match_result_score_map[r] if r else None for r in RESULTS_BY_CODE]
+
+def get_default_format() -> ExportFormat:
+    '''Parquet when pyarrow is installed, csv otherwise'''
+    try:
+        import pyarrow
+    except ImportError:
+        return ExportFormat.CSV
+    return ExportFormat.PARQUET
+
+def _constant(typecode: str, value, n: int) -> array:
+    return array(typecode, [value]) * n
+
+def iter_game_batches(t: Tournament):
+    t.get_results_version()  # binds every round to the results store
+    for r in t.rounds:
+        white, black, white_res, black_res = r.store.get_columns(r.rows)
+        n = len(white)
+        yield {
+            'year': _constant('i', t.year, n),
+            'count': _constant('i', t.count, n),
+            'round': _constant('i', r.index, n),
+            'board': array('i', range(1, n + 1)),
+            'white_id': white,
+            'black_id': black,
+            'white_result': white_res,
+            'black_result': black_res,
+            'white_score': white_res,
+            'black_score': black_res,
+        }
+
+def iter_standings_batches(t: Tournament):
+    for r in t.rounds:
+        standings = t.get_standings(until=r.index)
+        n = len(standings)
+        yield {
+            'year': _constant('i', t.year, n),
+            'count': _constant('i', t.count, n),
+            'round': _constant('i', r.index, n),
+            'rank': array('i', range(1, n + 1)),
+            'player_id': array('q', standings.keys()),
+            'score': array('d', standings.values()),
+        }
+
+def iter_tie_break_batches(t: Tournament):
+    '''Tie-breaks of the round system of t, nothing before the first complete round'''
+    if t.get_last_complete_round_index() is None:
+        return
+    if t.round_system == RoundSystem.SWISS:
+        t.calculate_tie_break_results_swiss()
+        tie_breaks = t.tie_break_results_swiss
+    else:
+        t.calculate_tie_break_results_round_robin()
+        tie_breaks = t.tie_break_results_round_robin
+    for method, values in tie_breaks.items():
+        if values is None:
+            continue
+        n = len(values)
+        yield {
+            'year': _constant('i', t.year, n),
+            'count': _constant('i', t.count, n),
+            'method': [method.name.lower()] * n,
+            'player_id': array('q', values.keys()),
+            'value': array('d', values.values()),
+        }
+
+TABLE_BATCHES = {
+    'games': iter_game_batches,
+    'standings': iter_standings_batches,
+    'tie_breaks': iter_tie_break_batches,
+}
+
+class CsvTableWriter:
+    def __init__(self, path: Path, columns: list[tuple[str,str]]):
+        self.columns = columns
+        self._file = open(path, 'w', newline='')
+        self._writer = csv.writer(self._file, delimiter=',', quotechar='"')
+        self._writer.writerow([name for name, kind in columns])
+
+    def _convert(self, values, kind: str):
+        if kind == 'result':
+            return (RESULT_NAMES[code] for code in values)
+        if kind == 'score':
+            return (SCORES_BY_CODE[code] for code in values)
+        return values
+
+    def write_batch(self, batch: dict):
+        self._writer.writerows(zip(*(self._convert(batch[name], kind) for name, kind in self.columns)))
+
+    def close(self):
+        self._file.close()
+
+class ArrowTableWriter:
+    '''Writes batches as record batches of a Parquet or Arrow IPC file'''
+    def __init__(self, path: Path, columns: list[tuple[str,str]], format: ExportFormat):
+        import pyarrow as pa
+        self.pa = pa
+        self.columns = columns
+        self.types = {
+            'int32': pa.int32(),
+            'int64': pa.int64(),
+            'float64': pa.float64(),
+            'string': pa.string(),
+            'result': pa.dictionary(pa.int8(), pa.string()),
+            'score': pa.float64(),
+        }
+        self.result_names = pa.array(RESULT_NAMES, pa.string())
+        self.scores = pa.array(SCORES_BY_CODE, pa.float64())
+        self.schema = pa.schema([(name, self.types[kind]) for name, kind in columns])
+        if format == ExportFormat.PARQUET:
+            import pyarrow.parquet as pq
+            self._writer = pq.ParquetWriter(path, self.schema)
+        else:
+            self._writer = pa.ipc.new_file(path, self.schema)
+
+    def _from_buffer(self, values, arrow_type):
+        '''Zero copy view of a typed array with the item size of arrow_type'''
+        pa = self.pa
+        if isinstance(values, array) and values.itemsize * 8 == arrow_type.bit_width:
+            return pa.Array.from_buffers(arrow_type, len(values), [None, pa.py_buffer(values)])
+        return pa.array(values, arrow_type)
+
+    def _convert(self, values, kind: str):
+        pa = self.pa
+        if kind == 'result':
+            return pa.DictionaryArray.from_arrays(self._from_buffer(values, pa.int8()), self.result_names)
+        if kind == 'score':
+            return self.scores.take(self._from_buffer(values, pa.int8()))
+        if kind == 'string':
+            return pa.array(values, pa.string())
+        return self._from_buffer(values, self.types[kind])
+
+    def write_batch(self, batch: dict):
+        self._writer.write_batch(self.pa.record_batch(
+            [self._convert(batch[name], kind) for name, kind in self.columns],
+            schema=self.schema,
+        ))
+
+    def close(self):
+        self._writer.close()
+
+def export_tournaments(
+        tournaments: Iterable[Tournament],
+        folder: Path,
+        format: ExportFormat | None = None,
+    ) -> dict[str,Path]:
+    '''
+    Writes the games, standings and tie_breaks tables of tournaments to
+    folder and returns the path of every table. tournaments can be a
+    generator, every tournament is only used while it is exported.
+    '''
+    format = format or get_default_format()
+    folder = Path(folder)
+    folder.mkdir(parents=True, exist_ok=True)
+    paths = {name: folder / f"{name}.{EXPORT_EXTENSIONS[format]}" for name in TABLES}
+    writers = {}
+    try:
+        for name, columns in TABLES.items():
+            if format == ExportFormat.CSV:
+                writers[name] = CsvTableWriter(paths[name], columns)
+            else:
+                writers[name] = ArrowTableWriter(paths[name], columns, format)
+        for t in tournaments:
+            for name, iter_batches in TABLE_BATCHES.items():
+                for batch in iter_batches(t):
+                    writers[name].write_batch(batch)
+    finally:
+        for writer in writers.values():
+            writer.close()
+    return paths
@@ -0,0 +1,128 @@
+'''
+Write-ahead journal of tournament events.
+
+Paired rounds, entered results and player withdrawals and entries are
+appended to the journal as one json line each before the tournament
+changes, so the cost of an event does not depend on the size of the
+round and a crash does not lose work that was not written to the round
+csv files yet. The journal lives next to the round csv files and is
+replayed on top of them, or on top of a snapshot, whenever the rounds
+are read.
+
+Lines are flushed on every append and fsynced in batches. Compacting
+writes the rounds of the journal to their csv files and keeps only the
+player events, so replay time is bounded by the compaction interval.
+'''
+from pathlib import Path
+from enum import Enum
+import json
+import os
+import time
+
+JOURNAL_NAME = 'events.journal'
+# fsync after this many appended events or seconds, whichever comes first
+SYNC_EVERY = 32
+SYNC_INTERVAL = 1.0
+
+class EventType(Enum):
+    ROUND = 1
+    RESULT = 2
+    WITHDRAW = 3
+    ADD_PLAYER = 4
+
+PLAYER_EVENTS = {EventType.WITHDRAW, EventType.ADD_PLAYER}
+
+class EventJournal:
+    '''
+    A process crash loses no appended event, a crash of the machine at most
+    the events since the last fsync. The batch limits are checked on append,
+    sync and close force an fsync.
+    '''
+    def __init__(
+            self,
+            path: Path,
+            sync_every: int = SYNC_EVERY,
+            sync_interval: float = SYNC_INTERVAL,
+        ):
+        self.path = Path(path)
+        self.sync_every = sync_every
+        self.sync_interval = sync_interval
+        self._file = None
+        self._count: int | None = None
+        self._unsynced = 0
+        self._synced_at = time.monotonic()
+
+    def __len__(self):
+        '''Number of events in the journal'''
+        if self._count is None:
+            self._count = len(self.read())
+        return self._count
+
+    def _open(self):
+        if self.path.exists():
+            # Drop a last line cut short by a crash so new events start on a new line
+            data = self.path.read_bytes()
+            if data and not data.endswith(b'\n'):
+                with open(self.path, 'r+b') as f:
+                    f.truncate(data.rfind(b'\n') + 1)
+        len(self)
+        self._file = open(self.path, 'a')
+
+    def append(self, event_type: EventType, **fields):
+        if self._file is None:
+            self._open()
+        self._file.write(json.dumps({'type': event_type.name, **fields}) + '\n')
+        self._file.flush()
+        self._count += 1
+        self._unsynced += 1
+        if (self._unsynced >= self.sync_every
+                or time.monotonic() - self._synced_at >= self.sync_interval):
+            self.sync()
+
+    def sync(self):
+        if self._file is not None and self._unsynced:
+            os.fsync(self._file.fileno())
+        self._unsynced = 0
+        self._synced_at = time.monotonic()
+
+    def close(self):
+        if self._file is not None:
+            self.sync()
+            self._file.close()
+            self._file = None
+
+    def read(self) -> list[tuple[EventType,dict]]:
+        '''Events in the order they were made. A last line cut short by a crash is skipped.'''
+        if not self.path.exists():
+            return []
+        events = []
+        with open(self.path) as f:
+            for line in f:
+                if not line.endswith('\n'):
+                    break
+                try:
+                    event = json.loads(line)
+                except json.JSONDecodeError:
+                    raise ValueError(f"Invalid journal entry in {self.path}: {line.strip()}")
+                events.append((EventType[event.pop('type')], event))
+        return events
+
+    def rewrite(self, events: list[tuple[EventType,dict]]):
+        '''Atomically replaces the journal with events, removes it when there are none'''
+        self.close()
+        if not events:
+            if self.path.exists():
+                os.remove(self.path)
+            self._count = 0
+            return
+        tmp_path = self.path.with_name(self.path.name + '.tmp')
+        with open(tmp_path, 'w') as f:
+            for event_type, fields in events:
+                f.write(json.dumps({'type': event_type.name, **fields}) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+        self._count = len(events)
+
+    def clear(self):
+        self.rewrite([])
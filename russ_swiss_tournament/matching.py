@@ -0,0 +1,490 @@
+'''
+Maximum weight matching on general graphs.
+
+Implementation of Edmonds' blossom algorithm with dual variables (Galil 1986),
+running in O(n^3). Based on the well known public domain reference
+implementation by Joris van Rantwijk.
+
+Used by the Swiss pairing engine to pair an entire round at once instead of
+searching player by player.
+'''
+
+def max_weight_matching(
+        edges: list[tuple[int,int,int]],
+        max_cardinality: bool = False,
+    ) -> list[int]:
+    '''
+    Compute a maximum weight matching of the graph described by edges.
+
+    param edges: list of (i, j, weight) tuples. Vertices are integers starting
+        from 0. Weights have to be integers so that dual variables stay exact.
+    param max_cardinality: only accept matchings of maximum cardinality and
+        pick the heaviest among those.
+
+    Returns a list where index v holds the vertex matched with v or -1.
+    '''
+    if not edges:
+        return []
+
+    edge_count = len(edges)
+    vertex_count = 0
+    for (i, j, w) in edges:
+        if i < 0 or j < 0 or i == j:
+            raise ValueError(f"Invalid edge ({i}, {j})")
+        if not isinstance(w, int):
+            raise ValueError(f"Edge weights have to be integers, got {w!r}")
+        vertex_count = max(vertex_count, i + 1, j + 1)
+    n = vertex_count
+    max_weight = max(0, max(w for (i, j, w) in edges))
+
+    # Edge k has endpoints 2k and 2k+1: endpoint[p] is the vertex of endpoint p
+    endpoint = [edges[p // 2][p % 2] for p in range(2 * edge_count)]
+    # Remote endpoints of the edges incident to each vertex
+    neighbend = [[] for i in range(n)]
+    for k, (i, j, w) in enumerate(edges):
+        neighbend[i].append(2 * k + 1)
+        neighbend[j].append(2 * k)
+
+    # mate[v] is the remote endpoint of the matched edge of v, or -1
+    mate = n * [-1]
+    # Labels on top level blossoms: 0 free, 1 S-vertex, 2 T-vertex
+    label = (2 * n) * [0]
+    labelend = (2 * n) * [-1]
+    inblossom = list(range(n))
+    blossomparent = (2 * n) * [-1]
+    blossomchilds = (2 * n) * [None]
+    blossombase = list(range(n)) + n * [-1]
+    blossomendps = (2 * n) * [None]
+    bestedge = (2 * n) * [-1]
+    blossombestedges = (2 * n) * [None]
+    unusedblossoms = list(range(n, 2 * n))
+    dualvar = n * [max_weight] + n * [0]
+    allowedge = edge_count * [False]
+    queue = []
+
+    def slack(k):
+        (i, j, wt) = edges[k]
+        return dualvar[i] + dualvar[j] - 2 * wt
+
+    def blossom_leaves(b):
+        if b < n:
+            yield b
+        else:
+            for t in blossomchilds[b]:
+                if t < n:
+                    yield t
+                else:
+                    yield from blossom_leaves(t)
+
+    def assign_label(w, t, p):
+        b = inblossom[w]
+        label[w] = label[b] = t
+        labelend[w] = labelend[b] = p
+        bestedge[w] = bestedge[b] = -1
+        if t == 1:
+            queue.extend(blossom_leaves(b))
+        elif t == 2:
+            base = blossombase[b]
+            assign_label(endpoint[mate[base]], 1, mate[base] ^ 1)
+
+    def scan_blossom(v, w):
+        '''Trace back from v and w to find a new blossom base or an augmenting path (-1)'''
+        path = []
+        base = -1
+        while v != -1 or w != -1:
+            b = inblossom[v]
+            if label[b] & 4:
+                base = blossombase[b]
+                break
+            path.append(b)
+            label[b] = 5
+            if labelend[b] == -1:
+                v = -1
+            else:
+                v = endpoint[labelend[b]]
+                b = inblossom[v]
+                v = endpoint[labelend[b]]
+            if w != -1:
+                v, w = w, v
+        for b in path:
+            label[b] = 1
+        return base
+
+    def add_blossom(base, k):
+        (v, w, wt) = edges[k]
+        bb = inblossom[base]
+        bv = inblossom[v]
+        bw = inblossom[w]
+        b = unusedblossoms.pop()
+        blossombase[b] = base
+        blossomparent[b] = -1
+        blossomparent[bb] = b
+        blossomchilds[b] = path = []
+        blossomendps[b] = endps = []
+        while bv != bb:
+            blossomparent[bv] = b
+            path.append(bv)
+            endps.append(labelend[bv])
+            v = endpoint[labelend[bv]]
+            bv = inblossom[v]
+        path.append(bb)
+        path.reverse()
+        endps.reverse()
+        endps.append(2 * k)
+        while bw != bb:
+            blossomparent[bw] = b
+            path.append(bw)
+            endps.append(labelend[bw] ^ 1)
+            w = endpoint[labelend[bw]]
+            bw = inblossom[w]
+        label[b] = 1
+        labelend[b] = labelend[bb]
+        dualvar[b] = 0
+        for v in blossom_leaves(b):
+            if label[inblossom[v]] == 2:
+                queue.append(v)
+            inblossom[v] = b
+        # Compute the least-slack edges to neighbouring S-blossoms
+        bestedgeto = (2 * n) * [-1]
+        for bv in path:
+            if blossombestedges[bv] is None:
+                nblists = [[p // 2 for p in neighbend[v]] for v in blossom_leaves(bv)]
+            else:
+                nblists = [blossombestedges[bv]]
+            for nblist in nblists:
+                for k in nblist:
+                    (i, j, wt) = edges[k]
+                    if inblossom[j] == b:
+                        i, j = j, i
+                    bj = inblossom[j]
+                    if (bj != b and label[bj] == 1
+                            and (bestedgeto[bj] == -1 or slack(k) < slack(bestedgeto[bj]))):
+                        bestedgeto[bj] = k
+            blossombestedges[bv] = None
+            bestedge[bv] = -1
+        blossombestedges[b] = [k for k in bestedgeto if k != -1]
+        bestedge[b] = -1
+        for k in blossombestedges[b]:
+            if bestedge[b] == -1 or slack(k) < slack(bestedge[b]):
+                bestedge[b] = k
+
+    def expand_blossom(b, endstage):
+        for s in blossomchilds[b]:
+            blossomparent[s] = -1
+            if s < n:
+                inblossom[s] = s
+            elif endstage and dualvar[s] == 0:
+                expand_blossom(s, endstage)
+            else:
+                for v in blossom_leaves(s):
+                    inblossom[v] = s
+        if not endstage and label[b] == 2:
+            # Relabel the even length path from the entry child to the base
+            entrychild = inblossom[endpoint[labelend[b] ^ 1]]
+            j = blossomchilds[b].index(entrychild)
+            if j & 1:
+                j -= len(blossomchilds[b])
+                jstep = 1
+                endptrick = 0
+            else:
+                jstep = -1
+                endptrick = 1
+            p = labelend[b]
+            while j != 0:
+                label[endpoint[p ^ 1]] = 0
+                label[endpoint[blossomendps[b][j - endptrick] ^ endptrick ^ 1]] = 0
+                assign_label(endpoint[p ^ 1], 2, p)
+                allowedge[blossomendps[b][j - endptrick] // 2] = True
+                j += jstep
+                p = blossomendps[b][j - endptrick] ^ endptrick
+                allowedge[p // 2] = True
+                j += jstep
+            bv = blossomchilds[b][j]
+            label[endpoint[p ^ 1]] = label[bv] = 2
+            labelend[endpoint[p ^ 1]] = labelend[bv] = p
+            bestedge[bv] = -1
+            j += jstep
+            while blossomchilds[b][j] != entrychild:
+                bv = blossomchilds[b][j]
+                if label[bv] == 1:
+                    j += jstep
+                    continue
+                for v in blossom_leaves(bv):
+                    if label[v] != 0:
+                        break
+                if label[v] != 0:
+                    label[v] = 0
+                    label[endpoint[mate[blossombase[bv]]]] = 0
+                    assign_label(v, 2, labelend[v])
+                j += jstep
+        label[b] = labelend[b] = -1
+        blossomchilds[b] = blossomendps[b] = None
+        blossombase[b] = -1
+        blossombestedges[b] = None
+        bestedge[b] = -1
+        unusedblossoms.append(b)
+
+    def augment_blossom(b, v):
+        '''Swap matched and unmatched edges on the path from v to the base of b'''
+        t = v
+        while blossomparent[t] != b:
+            t = blossomparent[t]
+        if t >= n:
+            augment_blossom(t, v)
+        i = j = blossomchilds[b].index(t)
+        if i & 1:
+            j -= len(blossomchilds[b])
+            jstep = 1
+            endptrick = 0
+        else:
+            jstep = -1
+            endptrick = 1
+        while j != 0:
+            j += jstep
+            t = blossomchilds[b][j]
+            p = blossomendps[b][j - endptrick] ^ endptrick
+            if t >= n:
+                augment_blossom(t, endpoint[p])
+            j += jstep
+            t = blossomchilds[b][j]
+            if t >= n:
+                augment_blossom(t, endpoint[p ^ 1])
+            mate[endpoint[p]] = p ^ 1
+            mate[endpoint[p ^ 1]] = p
+        blossomchilds[b] = blossomchilds[b][i:] + blossomchilds[b][:i]
+        blossomendps[b] = blossomendps[b][i:] + blossomendps[b][:i]
+        blossombase[b] = blossombase[blossomchilds[b][0]]
+
+    def augment_matching(k):
+        (v, w, wt) = edges[k]
+        for (s, p) in ((v, 2 * k + 1), (w, 2 * k)):
+            while True:
+                bs = inblossom[s]
+                if bs >= n:
+                    augment_blossom(bs, s)
+                mate[s] = p
+                if labelend[bs] == -1:
+                    break
+                t = endpoint[labelend[bs]]
+                bt = inblossom[t]
+                s = endpoint[labelend[bt]]
+                j = endpoint[labelend[bt] ^ 1]
+                if bt >= n:
+                    augment_blossom(bt, j)
+                mate[j] = labelend[bt]
+                p = labelend[bt] ^ 1
+
+    # Each stage augments the matching by one edge, at most n stages
+    for _ in range(n):
+        label[:] = (2 * n) * [0]
+        bestedge[:] = (2 * n) * [-1]
+        blossombestedges[n:] = n * [None]
+        allowedge[:] = edge_count * [False]
+        queue[:] = []
+        for v in range(n):
+            if mate[v] == -1 and label[inblossom[v]] == 0:
+                assign_label(v, 1, -1)
+
+        augmented = False
+        while True:
+            while queue and not augmented:
+                v = queue.pop()
+                for p in neighbend[v]:
+                    k = p // 2
+                    w = endpoint[p]
+                    if inblossom[v] == inblossom[w]:
+                        continue
+                    if not allowedge[k]:
+                        kslack = slack(k)
+                        if kslack <= 0:
+                            allowedge[k] = True
+                    if allowedge[k]:
+                        if label[inblossom[w]] == 0:
+                            assign_label(w, 2, p ^ 1)
+                        elif label[inblossom[w]] == 1:
+                            base = scan_blossom(v, w)
+                            if base >= 0:
+                                add_blossom(base, k)
+                            else:
+                                augment_matching(k)
+                                augmented = True
+                                break
+                        elif label[w] == 0:
+                            label[w] = 2
+                            labelend[w] = p ^ 1
+                    elif label[inblossom[w]] == 1:
+                        b = inblossom[v]
+                        if bestedge[b] == -1 or kslack < slack(bestedge[b]):
+                            bestedge[b] = k
+                    elif label[w] == 0:
+                        if bestedge[w] == -1 or kslack < slack(bestedge[w]):
+                            bestedge[w] = k
+            if augmented:
+                break
+
+            # No augmenting path yet, update the dual variables
+            deltatype = -1
+            delta = deltaedge = deltablossom = None
+            if not max_cardinality:
+                deltatype = 1
+                delta = min(dualvar[:n])
+            for v in range(n):
+                if label[inblossom[v]] == 0 and bestedge[v] != -1:
+                    d = slack(bestedge[v])
+                    if deltatype == -1 or d < delta:
+                        delta = d
+                        deltatype = 2
+                        deltaedge = bestedge[v]
+            for b in range(2 * n):
+                if blossomparent[b] == -1 and label[b] == 1 and bestedge[b] != -1:
+                    d = slack(bestedge[b]) // 2
+                    if deltatype == -1 or d < delta:
+                        delta = d
+                        deltatype = 3
+                        deltaedge = bestedge[b]
+            for b in range(n, 2 * n):
+                if (blossombase[b] >= 0 and blossomparent[b] == -1 and label[b] == 2
+                        and (deltatype == -1 or dualvar[b] < delta)):
+                    delta = dualvar[b]
+                    deltatype = 4
+                    deltablossom = b
+            if deltatype == -1:
+                # No further improvement possible, max cardinality reached
+                deltatype = 1
+                delta = max(0, min(dualvar[:n]))
+
+            for v in range(n):
+                if label[inblossom[v]] == 1:
+                    dualvar[v] -= delta
+                elif label[inblossom[v]] == 2:
+                    dualvar[v] += delta
+            for b in range(n, 2 * n):
+                if blossombase[b] >= 0 and blossomparent[b] == -1:
+                    if label[b] == 1:
+                        dualvar[b] += delta
+                    elif label[b] == 2:
+                        dualvar[b] -= delta
+
+            if deltatype == 1:
+                break
+            elif deltatype == 2:
+                allowedge[deltaedge] = True
+                (i, j, wt) = edges[deltaedge]
+                if label[inblossom[i]] == 0:
+                    i, j = j, i
+                queue.append(i)
+            elif deltatype == 3:
+                allowedge[deltaedge] = True
+                (i, j, wt) = edges[deltaedge]
+                queue.append(i)
+            elif deltatype == 4:
+                expand_blossom(deltablossom, False)
+
+        if not augmented:
+            break
+
+        # Expand S-blossoms with zero dual at the end of the stage
+        for b in range(n, 2 * n):
+            if (blossomparent[b] == -1 and blossombase[b] >= 0
+                    and label[b] == 1 and dualvar[b] == 0):
+                expand_blossom(b, True)
+
+    for v in range(n):
+        if mate[v] >= 0:
+            mate[v] = endpoint[mate[v]]
+    return mate
+
+def _build_graph(
+        adjacency: dict[int,set[int]],
+        nodes: list[int] | None,
+        removed: list[tuple[int,int]],
+    ) -> (list[int], list[tuple[int,int,int]], list[int]):
+    '''Nodes, unit weight edges by node position and degree of every node'''
+    nodes = list(adjacency) if nodes is None else list(nodes)
+    positions = {v: i for i, v in enumerate(nodes)}
+    removed_edges = {frozenset(e) for e in removed}
+    edges = []
+    degrees = [0] * len(nodes)
+    for i, v in enumerate(nodes):
+        for w in adjacency[v]:
+            j = positions.get(w)
+            if j is None or (removed_edges and frozenset((v, w)) in removed_edges):
+                continue
+            degrees[i] += 1
+            if i < j:
+                edges.append((i, j, 1))
+    return nodes, edges, degrees
+
+def _is_dense(node_count: int, min_degree: int, round_count: int = 1) -> bool:
+    '''
+    Dirac's theorem: a graph where every node has at least half of the other
+    nodes as neighbours has a Hamiltonian cycle, and with an even node count
+    every second cycle edge forms a perfect matching. Removing a perfect
+    matching lowers every degree by one, so round_count disjoint perfect
+    matchings exist while the condition still holds after round_count - 1 removals.
+    '''
+    return node_count >= 4 and (min_degree - (round_count - 1)) * 2 >= node_count
+
+def find_perfect_matching(
+        adjacency: dict[int,set[int]],
+        nodes: list[int] | None = None,
+        removed: list[tuple[int,int]] = (),
+    ) -> list[tuple[int,int]] | None:
+    '''
+    Pairs of a perfect matching of the graph restricted to nodes, or None.
+
+    param adjacency: neighbours of every node, edges have to be symmetric.
+    param nodes: nodes to match, all nodes of adjacency by default.
+    param removed: edges that are left out of the graph.
+    '''
+    nodes, edges, degrees = _build_graph(adjacency, nodes, removed)
+    if len(nodes) % 2 or (degrees and min(degrees) == 0):
+        return None
+    if not nodes:
+        return []
+    mate = max_weight_matching(edges, max_cardinality=True)
+    if len(mate) < len(nodes) or -1 in mate:
+        return None
+    return [(nodes[i], nodes[j]) for i, j in enumerate(mate) if i < j]
+
+def has_perfect_matching(
+        adjacency: dict[int,set[int]],
+        nodes: list[int] | None = None,
+        removed: list[tuple[int,int]] = (),
+    ) -> bool:
+    '''Like find_perfect_matching, dense graphs are accepted without solving'''
+    graph_nodes, edges, degrees = _build_graph(adjacency, nodes, removed)
+    if len(graph_nodes) % 2:
+        return False
+    if not graph_nodes:
+        return True
+    if min(degrees) == 0:
+        return False
+    if _is_dense(len(graph_nodes), min(degrees)):
+        return True
+    mate = max_weight_matching(edges, max_cardinality=True)
+    return len(mate) == len(graph_nodes) and -1 not in mate
+
+def can_pair_rounds(
+        adjacency: dict[int,set[int]],
+        round_count: int,
+        removed: list[tuple[int,int]] = (),
+    ) -> bool:
+    '''
+    True if round_count disjoint perfect matchings are found by removing one
+    perfect matching after another from the graph. This is a sufficient but
+    not a necessary condition, an unlucky earlier matching can block a later
+    one. Dense graphs are accepted without solving.
+    '''
+    removed = list(removed)
+    for r in range(round_count):
+        nodes, edges, degrees = _build_graph(adjacency, None, removed)
+        if len(nodes) % 2 or min(degrees, default=1) == 0:
+            return False
+        if _is_dense(len(nodes), min(degrees, default=0), round_count - r):
+            return True
+        matching = find_perfect_matching(adjacency, removed=removed)
+        if matching is None:
+            return False
+        removed.extend(matching)
+    return True
@@ -1,25 +1,135 @@
 from enum import Enum
-from dataclasses import dataclass
 import itertools
 
-from russ_swiss_tournament.player import Player
-from russ_swiss_tournament.service import  MatchResult, Color, match_result_manual_map, match_result_score_map, match_result_score_text_map
+from russ_swiss_tournament.player import Player, BYE_PLAYER
+from russ_swiss_tournament.results_store import ResultsStore
+from russ_swiss_tournament.service import BYE_PLAYER_ID, MatchResult, Color, match_result_manual_map, match_result_score_map, match_result_score_text_map
 
 
-@dataclass
+VALID_RESULT_PAIRS = {
+    frozenset({MatchResult.WIN, MatchResult.LOSS}),
+    frozenset({MatchResult.WIN, MatchResult.WALKOVER}),
+    frozenset({MatchResult.WALKOVER}),
+    frozenset({MatchResult.DRAW}),
+    frozenset({MatchResult.UNSET}),
+    frozenset({MatchResult.BYE}),
+}
+
 class PlayerMatch:
-    player: Player
-    res: MatchResult = MatchResult.UNSET
+    '''
+    Result of one player in a matchup. A standalone instance holds its own
+    values, a bound instance is a view that reads and writes a ResultsStore row.
+    '''
+    __slots__ = ('_player', '_res', '_store', '_row', '_color')
+
+    def __init__(
+            self,
+            player: Player,
+            res: MatchResult = MatchResult.UNSET,
+        ):
+        self._player = player
+        self._res = res
+        self._store = None
+        self._row = None
+        self._color = None
+
+    @classmethod
+    def from_store(cls, store: ResultsStore, row: int, color: Color):
+        pm = cls.__new__(cls)
+        pm._player = pm._res = None
+        pm._store = store
+        pm._row = row
+        pm._color = color
+        return pm
+
+    def bind(self, store: ResultsStore, row: int, color: Color):
+        '''Turns the instance into a view of a store row that already holds its values'''
+        player = self.player
+        store.players.setdefault(player.id, player)
+        self._player = self._res = None
+        self._store = store
+        self._row = row
+        self._color = color
+
+    @property
+    def player(self) -> Player:
+        if self._store is None:
+            return self._player
+        return self._store.players[self._store.get_player_id(self._row, self._color)]
+
+    @player.setter
+    def player(self, value: Player):
+        if self._store is None:
+            self._player = value
+            return
+        store = self._store
+        store.players.setdefault(value.id, value)
+        ids = {Color.W: store.white[self._row], Color.B: store.black[self._row]}
+        ids[self._color] = value.id
+        store.set_game(
+            self._row,
+            ids[Color.W],
+            ids[Color.B],
+            store.get_result(self._row, Color.W),
+            store.get_result(self._row, Color.B),
+        )
+
+    @property
+    def res(self) -> MatchResult:
+        if self._store is None:
+            return self._res
+        return self._store.get_result(self._row, self._color)
+
+    @res.setter
+    def res(self, value: MatchResult):
+        if self._store is None:
+            self._res = value
+        else:
+            self._store.set_result(self._row, self._color, value)
+
+    def __repr__(self):
+        return f"PlayerMatch(player={self.player!r}, res={self.res})"
+
+    def __eq__(self, other):
+        if not isinstance(other, PlayerMatch):
+            return NotImplemented
+        return (self.player, self.res) == (other.player, other.res)
+
+    __hash__ = None
 
 class Matchup:
+    '''
+    A game between two players. Matchups of rounds registered in a tournament
+    are bound to the tournament ResultsStore and read their values from it.
+    '''
     id_iter = itertools.count()
     def __init__(
             self,
             res: dict[Color, PlayerMatch],
         ):
         self.id = next(self.id_iter)
+        self._store = None
+        self._row = None
         self.res = res
 
+    @classmethod
+    def from_store(cls, store: ResultsStore, row: int):
+        m = cls.__new__(cls)
+        m.id = next(cls.id_iter)
+        m._store = store
+        m._row = row
+        m._res = {
+            Color.W: PlayerMatch.from_store(store, row, Color.W),
+            Color.B: PlayerMatch.from_store(store, row, Color.B),
+        }
+        return m
+
+    def bind(self, store: ResultsStore, row: int):
+        self._store = store
+        self._row = row
+        for color, pm in self._res.items():
+            pm.bind(store, row, color)
+
     @property
     def res(self):
         return self._res
@@ -27,6 +137,12 @@ class Matchup:
     @res.setter
     def res(self, value):
         self.validate_result(value)
+        if self._store is not None:
+            white = value[Color.W]
+            black = value[Color.B]
+            self._store.set_game(self._row, white.player.id, black.player.id, white.res, black.res)
+            for color, pm in value.items():
+                pm.bind(self._store, self._row, color)
         self._res = value
 
     def __str__(self):
@@ -42,23 +158,16 @@ class Matchup:
         return res
 
     def validate_result(self, value):
-        ok = [
-            {MatchResult.WIN, MatchResult.LOSS},
-            {MatchResult.WIN, MatchResult.WALKOVER},
-            {MatchResult.WALKOVER, MatchResult.WALKOVER},
-            {MatchResult.DRAW, MatchResult.DRAW},
-            {MatchResult.UNSET, MatchResult.UNSET},
-        ]
         raise_error = False
         if isinstance(value, dict):
             first = value[Color.W].res
             second = value[Color.B].res
-            if {first, second} not in ok:
+            if frozenset((first, second)) not in VALID_RESULT_PAIRS:
                 raise_error = True
         if isinstance(value, tuple):
             first = value[0]
             second = value[1]
-            if {first, second} not in ok:
+            if frozenset((first, second)) not in VALID_RESULT_PAIRS:
                 raise_error = True
         if raise_error:
             raise ValueError(
@@ -89,5 +198,17 @@ class Matchup:
         return winner_loser_colors, is_walkover
 
     def get_player_ids(self):
+        if self._store is not None:
+            return self._store.white[self._row], self._store.black[self._row]
         return self.res[Color.W].player.id, self.res[Color.B].player.id
 
+    def is_bye(self) -> bool:
+        '''True when the white player sits the round out with a bye'''
+        return self.get_player_ids()[1] == BYE_PLAYER_ID
+
+def create_bye_matchup(player: Player) -> Matchup:
+    '''Matchup of a player that sits the round out, scored as MatchResult.BYE'''
+    return Matchup({
+        Color.W: PlayerMatch(player, MatchResult.BYE),
+        Color.B: PlayerMatch(BYE_PLAYER, MatchResult.BYE),
+    })
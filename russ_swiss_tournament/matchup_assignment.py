@@ -1,27 +1,112 @@
-from random import shuffle
+from dataclasses import dataclass, field
+from enum import Enum
+import random
+import time
 
 from russ_swiss_tournament.tournament import Tournament
-from russ_swiss_tournament.matchup import Matchup, PlayerMatch
+from russ_swiss_tournament.matchup import Matchup, PlayerMatch, create_bye_matchup
 from russ_swiss_tournament.round import Round
-from russ_swiss_tournament.service import MatchResult, Color
+from russ_swiss_tournament.service import BYE_PLAYER_ID, MatchResult, Color
 from russ_swiss_tournament.player import Player
+from russ_swiss_tournament.matching import (
+    max_weight_matching,
+    find_perfect_matching,
+    has_perfect_matching,
+    can_pair_rounds,
+)
+from russ_swiss_tournament.pairing_index import PairingIndex
+from russ_swiss_tournament.score_groups import ScoreGroups
+from russ_swiss_tournament.trace import PairingTracer, NULL_TRACER
+from russ_swiss_tournament import berger
+
+class PairingEngine(Enum):
+    RULES = 1
+    MATCHING = 2
+
+# Penalties subtracted from the edge weight of a possible pairing.
+# Score distance is measured in half points and squared.
+PAIRING_SCORE_PENALTY = 16
+PAIRING_COLOR_PENALTY = 4
+# Costs of conflicts left in a best effort pairing, far above any legal pairing
+PAIRING_UNPAIRED_PENALTY = 10_000
+PAIRING_REPEAT_PENALTY = 100_000
+
+@dataclass
+class PairingReport:
+    '''Outcome of pairing a round, the best pairing found when none was complete'''
+    pairs: list[tuple[int,int]]
+    bye: int | None = None
+    unpaired: list[int] = field(default_factory=list)
+    repeated: list[tuple[int,int]] = field(default_factory=list)
+    cost: int = 0
+    attempts: int = 0
+    elapsed: float = 0
+
+    @property
+    def complete(self) -> bool:
+        return not self.unpaired and not self.repeated
+
+class PairingError(ValueError):
+    '''Raised when no complete pairing was found, report holds the best attempt'''
+    def __init__(self, report: PairingReport):
+        self.report = report
+        super().__init__(
+            f"No complete pairing found in {report.attempts} attempts. "
+            f"Best attempt leaves players {report.unpaired} unpaired and "
+            f"repeats matchups {report.repeated}."
+        )
 
 class SwissAssigner:
-    '''Matchup colors is main result we want to generate. Following round is generated based on it'''
+    '''
+    Matchup colors is main result we want to generate. Following round is generated based on it.
+
+    Pairing steps are reported to the tracer, which is disabled by default.
+    Use PrintTracer or JsonlTracer from the trace module to follow them.
+
+    With lookahead enabled, pairings that would leave the rest of the round
+    or the next round impossible to pair are pruned before they are made.
+
+    The rule based search retries with shuffled player orders drawn from a
+    random generator seeded with seed, at most max_attempts times and only
+    while time_budget seconds have not passed. The same seed and results
+    always give the same pairing. The outcome of the last round is kept in
+    last_report.
+
+    In an odd field one player gets a bye before the rest is paired as an
+    even field, see _choose_bye. Only active players are paired, withdrawn
+    players keep their results but sit out the following rounds.
+    '''
     def __init__(
             self,
             tournament,
+            tracer: PairingTracer = NULL_TRACER,
+            lookahead: bool = False,
+            seed: int | None = None,
+            max_attempts: int = 10,
+            time_budget: float | None = None,
         ):
         self.tournament = tournament
-        self.opponents: dict[int,list[int]] = tournament.get_opponents()
-        self.players_standing_sort: list | None = None
+        self.tracer = tracer
+        self.lookahead = lookahead
+        self.random = random.Random(seed)
+        self.max_attempts = max_attempts
+        self.time_budget = time_budget
+        self.last_report: PairingReport | None = None
+        self.index: PairingIndex = tournament.get_pairing_index()
+        self.score_groups: ScoreGroups | None = None
+        self.score_groups_scores: dict[int,float] = {}
         self.matchup_colors: list[tuple[int,int]] = []
+        self.bye: int | None = None
+        self.graph: dict[int,set[int]] = self.index.unplayed
         self.already_paired: set = set()
 
+    @property
+    def opponents(self) -> dict[int,set[int]]:
+        return self.index.opponent_sets
+
     def _assign_matchup_colors(self, higher: int, lower: int) -> tuple[int,int]:
-        player_color_counts = self.tournament.get_player_color_counts()
-        h_colors = player_color_counts[higher]
-        l_colors = player_color_counts[lower]
+        h_colors = self.index.color_counts[higher]
+        l_colors = self.index.color_counts[lower]
         white_diff = h_colors[0] - l_colors[0]
         black_diff = h_colors[1] - l_colors[1]
         if white_diff != 0:
@@ -39,9 +124,8 @@ class SwissAssigner:
                 black = lower
                 white = higher
         else:
-            player_ids_by_rank = [p.id for p in self.tournament.players]
-            higher_rank_index = player_ids_by_rank.index(higher)
-            lower_rank_index = player_ids_by_rank.index(lower)
+            higher_rank_index = self.index.ranks[higher]
+            lower_rank_index = self.index.ranks[lower]
             if higher_rank_index < lower_rank_index:
                 white = lower
                 black = higher
@@ -53,7 +137,7 @@ class SwissAssigner:
 
     def _remove_from_candidates(self, player_ids):
         for p in player_ids:
-            self.players_standing_sort.pop(self.players_standing_sort.index(p))
+            self.score_groups.remove(p)
 
     def _assign_matchup_colors_to_res(self, higher, lower, remove_candidates=True):
         white, black = self._assign_matchup_colors(higher, lower)
@@ -62,8 +146,8 @@ class SwissAssigner:
         self.already_paired.add(black)
         if remove_candidates:
             self._remove_from_candidates([higher,lower])
-        print(f"Matched players: w: {white} b: {black}")
-        print(f"Remaining players: {self.players_standing_sort}")
+        if self.tracer.enabled:
+            self.tracer.emit('matched', white=white, black=black, remaining=len(self.score_groups))
 
     def _assign_round_colors(self) -> list[tuple[int,int]]:
         '''
@@ -71,73 +155,357 @@ class SwissAssigner:
 
         Tricky and messy logic used at the moment.
 
-        The main logic works by recursively calling the _find_matchup_pairs_by_standing()
-        function until all players are assigned accodring to Swiss sytem rules.
+        The main logic pairs the first unpaired player of the score groups with
+        the first legal candidate in its own group. When its group has none
+        left the player floats down to the next group and the search goes on
+        there, until all players are assigned according to Swiss system rules.
         Rule based assignment typically starts failing towards the later rounds. At
         this stage the _swap_player() method starts being used to try swapping
         out one of the previous players where possible.
 
         Even the swapping logic will fail in case the round count and player
-        count get close enough to each other. To try tackling this, there is
-        the option to set the "z" variable higher to attempt brute forcing using
-        a randomized player order instead of ordered by standings.
-
-        TODO: Change print statements to debug logging where useful
-        TODO: Inform the user of the best acheived result if no result can be found so
-        that the last round(s) can be manually corrected.
-        TODO: Only works for even player count
+        count get close enough to each other. To try tackling this, later
+        attempts use a randomized player order instead of ordered by standings,
+        until max_attempts or time_budget runs out. A complete attempt is always
+        kept over an incomplete one, among incomplete attempts the one with the
+        lowest get_pairing_cost, so the best achieved result is returned when
+        no attempt succeeds and the last round(s) can be manually corrected.
         '''
-        # set the range to more than 1 to try brute forcing with randomized player order
-        if len(self.tournament.players) % 2 != 0:
-            raise ValueError(
-                "Uneven number of participants is currently not supported"
-            )
-        for z in range(10):
+        start = time.monotonic()
+        standing_order = list(self.score_groups)
+        scores = self.score_groups_scores
+        best = None
+        for z in range(self.max_attempts):
+            if z != 0 and self.time_budget is not None and time.monotonic() - start > self.time_budget:
+                break
             self.matchup_colors = []
             self.already_paired = set()
 
-            self.opponents = self.tournament.get_opponents()
-            self.players_standing_sort = list(reversed(
-                {k: v for k, v in sorted(self.tournament.get_standings().items(), key=lambda item: item[1])}.keys()
-            ))
-            if z != 0:
-                # TODO: inform user of using brute force to generate
-                shuffle(self.players_standing_sort)
+            if z == 0:
+                self.score_groups = ScoreGroups(standing_order, scores)
+            else:
+                order = standing_order.copy()
+                self.random.shuffle(order)
+                # A shuffled attempt ignores the score groups
+                self.score_groups = ScoreGroups(order)
+                if self.tracer.enabled:
+                    self.tracer.emit('retry', attempt=z, order=order)
+            self._find_matchup_pairs_by_standing()
+            report = self.get_pairing_report(self.matchup_colors, self.bye)
+            report.attempts = z + 1
+            # A shuffled complete attempt may cost more than an incomplete score group attempt
+            if best is None or (not report.complete, report.cost) < (not best.complete, best.cost):
+                best = report
+            if report.complete:
+                break
+        best.attempts = z + 1
+        best.elapsed = time.monotonic() - start
+        self.last_report = best
+        self.matchup_colors = best.pairs
+        return self.matchup_colors
 
-            def _find_matchup_pairs_by_standing():
-                if len(self.players_standing_sort) == 0:
-                    return True
-                print(f"Attempting to match: {self.players_standing_sort[0]}")
-                higher = self.players_standing_sort[0]
-                higher_opponents = set(self.opponents[higher])
-                print(f"Already played opponents for {higher}: {higher_opponents}")
-                print(f"Already paired: {self.already_paired}")
-                pool = self.players_standing_sort[1:].copy()
-                for i, p in enumerate(pool):
-                    forbidden = (
-                        self.already_paired
-                        | higher_opponents
-                    )
-                    if p not in forbidden:
-                        self._assign_matchup_colors_to_res(
-                            higher,
-                            p
-                        )
-                        _find_matchup_pairs_by_standing()
+    def _find_matchup_pairs_by_standing(self) -> bool:
+        '''Pairs the players of score_groups one pair at a time, False when it got stuck'''
+        groups = self.score_groups
+        while groups:
+            higher = groups.first()
+            higher_opponents = self.opponents[higher]
+            found = None
+            last = None
+            group = groups.group_of[higher]
+            while True:
+                for p in groups.iter_group(group):
+                    if p == higher:
+                        continue
+                    if self.tracer.enabled:
+                        self.tracer.emit('candidate', higher=higher, candidate=p)
+                    if p not in higher_opponents and p not in self.already_paired:
+                        found = p
                         break
-                    print(f"Pool is {pool}")
-                    if p in forbidden and i == len(pool) - 1 :
-                        print(f"matchup_colors index: {i}/{len(pool) - 1}")
-                        print(f"matchup_colors len before swap: {len(self.matchup_colors)}")
-                        successful_swap = self._swap_player(higher, p)
-                        print(f"matchup_colors len after swap: {len(self.matchup_colors)}")
-                        if successful_swap:
-                            successful_swap = _find_matchup_pairs_by_standing()
-                        else:
-                            return False
-            success = _find_matchup_pairs_by_standing()
-            if success:
+                    if self.tracer.enabled:
+                        reason = 'already_played' if p in higher_opponents else 'already_paired'
+                        self.tracer.emit('rejected', higher=higher, candidate=p, reason=reason)
+                    last = p
+                if found is not None or not groups.move_down(higher):
+                    break
+                group += 1
+                if self.tracer.enabled:
+                    self.tracer.emit('float', player=higher, score=groups.scores[group])
+            if found is not None:
+                self._assign_matchup_colors_to_res(higher, found)
+                continue
+            if last is not None and self._swap_player(higher, last):
+                continue
+            return False
+        return True
+
+    def get_pairing_report(self, pairs: list[tuple[int,int]], bye: int | None = None) -> PairingReport:
+        '''
+        Scores a possibly incomplete pairing of the next round. The cost adds up
+        the score and color penalties of every pair, PAIRING_UNPAIRED_PENALTY
+        per player left without an opponent and PAIRING_REPEAT_PENALTY per
+        repeated matchup. The bye player is not counted as unpaired.
+        '''
+        standings = self.tournament.get_standings()
+        scores = {p: round(standings.get(p, 0) * 2) for p in self.index.player_ids}
+        paired = {p for pair in pairs for p in pair}
+        report = PairingReport(
+            pairs = list(pairs),
+            bye = bye,
+            unpaired = [p.id for p in self.tournament.get_active_players() if p.id not in paired and p.id != bye],
+            repeated = [(w, b) for w, b in pairs if self.index.has_played(w, b)],
+        )
+        report.cost = (
+            sum(self._get_pairing_penalty(w, b, scores, self.index.color_counts) for w, b in pairs)
+            + len(report.unpaired) * PAIRING_UNPAIRED_PENALTY
+            + len(report.repeated) * PAIRING_REPEAT_PENALTY
+        )
+        return report
+
+    def _choose_bye(self) -> int | None:
+        '''
+        Takes the bye player of an odd field out of the score groups. The most
+        eligible player of PairingIndex.get_bye_order gets the bye, nothing is
+        paired to choose it. With lookahead the candidates are checked in that
+        order by _find_pairable_bye instead, so the remaining rounds stay
+        pairable as well.
+        '''
+        if len(self.score_groups) % 2 == 0:
+            return None
+        players = list(self.score_groups)
+        if self.lookahead:
+            bye = self._find_pairable_bye(players, self._get_pairing_graph(players, odd=True))
+        else:
+            bye = self.index.get_bye_order(players)[0]
+        self.score_groups.remove(bye)
+        if self.tracer.enabled:
+            self.tracer.emit('bye', player=bye)
+        return bye
+
+    def _find_pairable_bye(self, players: list[int], graph: dict[int,set[int]] | None = None) -> int:
+        '''
+        First candidate of PairingIndex.get_bye_order after which the rest of
+        the field can be paired without repeats, and with the lookahead graph
+        the remaining rounds as well. Falls back to a candidate that at least
+        leaves this round pairable, then to the most eligible player.
+        '''
+        order = self.index.get_bye_order(players)
+        bye = None
+        fallback = None
+        for candidate in order:
+            rest = [p for p in players if p != candidate]
+            if not has_perfect_matching(self.index.unplayed, rest):
+                reason = 'unpairable_round'
+            elif graph is None or can_pair_rounds(
+                    graph,
+                    self._get_rounds_left(),
+                    find_perfect_matching(self.index.unplayed, rest) + [(candidate, BYE_PLAYER_ID)],
+                ):
+                bye = candidate
                 break
+            else:
+                reason = 'lookahead_rounds_left'
+                if fallback is None:
+                    fallback = candidate
+            if self.tracer.enabled:
+                self.tracer.emit('rejected_bye', player=candidate, reason=reason)
+        if bye is None:
+            bye = fallback if fallback is not None else order[0]
+        return bye
+
+    def _get_pairing_graph(self, players: list[int], odd: bool) -> dict[int,set[int]]:
+        '''
+        Graph of the pairings between players that are still legal, used by
+        the lookahead. In an odd field a BYE_PLAYER_ID node is connected to
+        every player without a bye, so each remaining round has to give the
+        bye to a new player.
+        '''
+        if not odd and len(players) == len(self.index.unplayed):
+            return self.index.unplayed
+        field = set(players)
+        graph = {p: self.index.unplayed[p] & field for p in players}
+        if odd:
+            eligible = {p for p in players if self.index.bye_counts[p] == 0}
+            for p in eligible:
+                graph[p].add(BYE_PLAYER_ID)
+            graph[BYE_PLAYER_ID] = eligible
+        return graph
+
+    def _get_bye_pairs(self) -> list[tuple[int,int]]:
+        return [] if self.bye is None else [(self.bye, BYE_PLAYER_ID)]
+
+    def _get_rounds_left(self) -> int:
+        '''Rounds of the tournament still to be paired after the one being created'''
+        return self.tournament.round_count - len(self.tournament.rounds) - 1
+
+    def _get_lookahead_tier(self, higher: int, lower: int) -> int | None:
+        '''
+        How safe pairing higher with lower in the round being created is:
+        None when the rest of the round can no longer be completed, 0 when a
+        completion was found after which every remaining round could be paired
+        as well, 1 when at least the next round stays pairable and 2 otherwise.
+        '''
+        remaining = [p for p in self.score_groups if p != higher and p != lower]
+        if not has_perfect_matching(self.index.unplayed, remaining):
+            return None
+        rounds_left = self._get_rounds_left()
+        if rounds_left <= 0:
+            return 0
+        pairs = self.matchup_colors + [(higher, lower)] + self._get_bye_pairs()
+        completion = find_perfect_matching(self.index.unplayed, remaining)
+        if can_pair_rounds(self.graph, rounds_left, pairs + completion):
+            return 0
+        if has_perfect_matching(self.graph, removed=pairs):
+            return 1
+        return 2
+
+    def _assign_round_colors_lookahead(self) -> list[tuple[int,int]]:
+        '''
+        Returns list of player ids white, black.
+
+        Pairs the highest standing unpaired player with the highest standing
+        legal candidate like the rule based search, but only accepts candidates
+        after which the rest of the round can be completed. Among those the
+        first candidate that keeps the remaining rounds pairable is preferred,
+        see _get_lookahead_tier. A round is therefore found in one pass
+        without swapping or retrying whenever one exists.
+        '''
+        self.matchup_colors = []
+        self.already_paired = set()
+        ranked = list(self.score_groups)
+        if not has_perfect_matching(self.index.unplayed, ranked):
+            edges = [
+                (i, j, 1) for i, higher in enumerate(ranked)
+                for j in range(i + 1, len(ranked)) if ranked[j] in self.index.unplayed[higher]
+            ]
+            raise PairingError(self._get_matching_report(ranked, max_weight_matching(edges, max_cardinality=True)))
+        while self.score_groups:
+            higher = self.score_groups.first()
+            higher_opponents = self.opponents[higher]
+            best = None
+            best_tier = None
+            for p in self.score_groups:
+                if p == higher:
+                    continue
+                if self.tracer.enabled:
+                    self.tracer.emit('candidate', higher=higher, candidate=p)
+                if p in higher_opponents:
+                    tier = None
+                    reason = 'already_played'
+                else:
+                    tier = self._get_lookahead_tier(higher, p)
+                    reason = 'lookahead_round' if tier is None else 'lookahead_rounds_left'
+                if tier is not None and (best_tier is None or tier < best_tier):
+                    best, best_tier = p, tier
+                    if tier == 0:
+                        break
+                if self.tracer.enabled:
+                    self.tracer.emit('rejected', higher=higher, candidate=p, reason=reason)
+            self._assign_matchup_colors_to_res(higher, best)
+        return self.matchup_colors
+
+    def _get_pairing_penalty(
+            self,
+            higher: int,
+            lower: int,
+            scores: dict[int,int],
+            player_color_counts: dict[int,list[int]],
+        ) -> int:
+        '''
+        Cost of pairing two players that have not met yet. Scores are in half points.
+        Players that both are due the same color get a penalty, doubled when
+        both already have a color imbalance of two or more.
+        '''
+        penalty = (scores[higher] - scores[lower]) ** 2 * PAIRING_SCORE_PENALTY
+        h_colors = player_color_counts[higher]
+        l_colors = player_color_counts[lower]
+        h_diff = h_colors[0] - h_colors[1]
+        l_diff = l_colors[0] - l_colors[1]
+        if h_diff * l_diff > 0:
+            penalty += PAIRING_COLOR_PENALTY
+            if abs(h_diff) >= 2 and abs(l_diff) >= 2:
+                penalty += PAIRING_COLOR_PENALTY
+        return penalty
+
+    def _assign_round_colors_matching(self) -> list[tuple[int,int]]:
+        '''
+        Returns list of player ids white, black.
+
+        Pairs the whole round at once by solving a maximum weight matching on the
+        graph of legal pairings. Edges only exist between players that have not
+        met yet and the weight of an edge is lowered by the score distance and
+        clashing color preferences of the players. Maximum cardinality is
+        enforced, so a complete round is always found when one exists.
+        '''
+        self.matchup_colors = []
+        self.already_paired = set()
+        standings = self.score_groups_scores
+        ranked = list(self.score_groups)
+        if len(ranked) < 2:
+            # Nothing to pair once every player withdrew or only the bye is left
+            return self.matchup_colors
+        scores = {p: round(standings[p] * 2) for p in ranked}
+        player_color_counts = self.index.color_counts
+
+        max_score_diff = max(scores.values()) - min(scores.values())
+        base_weight = max_score_diff ** 2 * PAIRING_SCORE_PENALTY + 2 * PAIRING_COLOR_PENALTY + 1
+        edges = []
+        for i, higher in enumerate(ranked):
+            higher_opponents = self.opponents[higher]
+            for j in range(i + 1, len(ranked)):
+                lower = ranked[j]
+                if lower in higher_opponents:
+                    continue
+                penalty = self._get_pairing_penalty(higher, lower, scores, player_color_counts)
+                edges.append((i, j, base_weight - penalty))
+
+        if self.tracer.enabled:
+            self.tracer.emit('matching', players=len(ranked), edges=len(edges))
+        mate = max_weight_matching(edges, max_cardinality=True)
+        if len(mate) < len(ranked) or -1 in mate:
+            raise PairingError(self._get_matching_report(ranked, mate))
+        if self.lookahead:
+            mate = self._apply_matching_lookahead(ranked, edges, mate, base_weight)
+        for i, j in enumerate(mate):
+            if i < j:
+                self._assign_matchup_colors_to_res(ranked[i], ranked[j], remove_candidates=False)
+        return self.matchup_colors
+
+    def _get_matching_report(self, ranked: list[int], mate: list[int]) -> PairingReport:
+        '''Report of an incomplete matching, the players left without a mate are unpaired'''
+        pairs = [self._assign_matchup_colors(ranked[i], ranked[j]) for i, j in enumerate(mate) if i < j]
+        report = self.get_pairing_report(pairs, self.bye)
+        report.attempts = 1
+        return report
+
+    def _apply_matching_lookahead(
+            self,
+            ranked: list[int],
+            edges: list[tuple[int,int,int]],
+            mate: list[int],
+            base_weight: int,
+        ) -> list[int]:
+        '''
+        Re-solves the matching while the remaining rounds can not be paired after it.
+        Pairings of rejected solutions lose the bonus of half the base weight
+        the other edges get, so later solutions avoid them while staying
+        complete. Keeps the first solution when no pairable alternative is found.
+        '''
+        discouraged = set()
+        candidate = mate
+        for attempt in range(len(ranked)):
+            pairs = [(ranked[i], ranked[j]) for i, j in enumerate(candidate) if i < j]
+            if can_pair_rounds(self.graph, self._get_rounds_left(), pairs + self._get_bye_pairs()):
+                return candidate
+            if self.tracer.enabled:
+                self.tracer.emit('rejected_round', attempt=attempt, reason='lookahead_rounds_left')
+            discouraged.update((i, j) for i, j in enumerate(candidate) if i < j)
+            weighted = [
+                (i, j, w if (i, j) in discouraged else w + base_weight // 2)
+                for i, j, w in edges
+            ]
+            candidate = max_weight_matching(weighted, max_cardinality=True)
+        return mate
 
     def _swap_player(self, higher: int, p: int):
         '''
@@ -155,15 +523,12 @@ class SwissAssigner:
         blacks = [m[1] for m in self.matchup_colors]
         blacks_reversed = list(reversed(blacks))
 
-        {print(f"{k}: {v}") for k,v in self.opponents.items()}
-        {print(f"{k}: {v}") for k,v in self.tournament.get_opponents(inverse=True).items()}
         for i, players in enumerate([blacks_reversed, whites_reversed]):
             if i == 0:
                 other = whites_reversed
             if i == 1:
                 other = blacks_reversed
             for j, swap_candidate in enumerate(players):
-                print(f"-----SWAP CANDIDATE: {swap_candidate}-----")
                 candidate_current_opponent = other[j]
                 if  (
                         swap_candidate not in self.opponents[higher]
@@ -172,30 +537,99 @@ class SwissAssigner:
                     actual_index = -1 * (j + 1)
                     assert {swap_candidate, candidate_current_opponent} == set(self.matchup_colors[actual_index])
                     to_modify = self.matchup_colors[actual_index]
-                    print(f"replace this: {self.matchup_colors[actual_index]} with: {(candidate_current_opponent,p)} ")
                     self.matchup_colors[actual_index] = (candidate_current_opponent,p)
                     self._assign_matchup_colors_to_res(higher, swap_candidate, remove_candidates=False)
-                    self.players_standing_sort.pop(self.players_standing_sort.index(higher))
-                    self.players_standing_sort.pop(self.players_standing_sort.index(p))
-                    print(f"Swapped player {p} for {swap_candidate} from matchup {to_modify} to {higher,p}")
-                    print(f"remaining: {self.players_standing_sort}")
+                    self.score_groups.remove(higher)
+                    self.score_groups.remove(p)
+                    if self.tracer.enabled:
+                        self.tracer.emit(
+                            'swap',
+                            higher=higher,
+                            player=p,
+                            swapped_for=swap_candidate,
+                            replaced=to_modify,
+                            replacement=(candidate_current_opponent, p),
+                        )
                     return True
+                if self.tracer.enabled:
+                    self.tracer.emit('swap_rejected', higher=higher, player=p, swap_candidate=swap_candidate)
+        if self.tracer.enabled:
+            self.tracer.emit('swap_failed', higher=higher, player=p)
         return False
 
-    def create_next_round(self):
+    def pair_next_round(self, engine: PairingEngine = PairingEngine.RULES) -> PairingReport:
+        '''
+        Pairs the round following the last one without adding it to the
+        tournament. The report holds the pairing with the lowest cost found,
+        which is incomplete when no engine found a complete pairing. When the
+        rest of an odd field can not be paired around the chosen bye, the
+        round is paired again with the bye of _find_pairable_bye.
+        '''
+        self.index = self.tournament.get_pairing_index()
+        active = {p.id for p in self.tournament.get_active_players()}
+        # Standings are sorted by score, ties are paired in reverse standings order
+        self.score_groups_scores = self.tournament.get_standings()
+        self.score_groups = ScoreGroups(
+            [p for p in reversed(self.score_groups_scores) if p in active],
+            self.score_groups_scores,
+        )
+        self.tournament.validate_no_incomplete_match_results_in_rounds()
+        field = list(self.score_groups)
+        self.bye = self._choose_bye()
+        report = self._pair_field(engine, field)
+        if not report.complete and self.bye is not None and not self.lookahead:
+            bye = self._find_pairable_bye(field)
+            if bye != self.bye:
+                if self.tracer.enabled:
+                    self.tracer.emit('bye', player=bye)
+                self.score_groups = ScoreGroups([p for p in field if p != bye], self.score_groups_scores)
+                self.bye = bye
+                report = self._pair_field(engine, field)
+        return report
+
+    def _pair_field(self, engine: PairingEngine, field: list[int]) -> PairingReport:
+        '''Pairs the score groups around the chosen bye with engine'''
+        start = time.monotonic()
+        if self.lookahead:
+            self.graph = self._get_pairing_graph(field, self.bye is not None)
+        if engine == PairingEngine.RULES and not self.lookahead:
+            self._assign_round_colors()
+            return self.last_report
+        try:
+            if engine == PairingEngine.MATCHING:
+                self._assign_round_colors_matching()
+            else:
+                self._assign_round_colors_lookahead()
+            report = self.get_pairing_report(self.matchup_colors, self.bye)
+            report.attempts = 1
+        except PairingError as e:
+            report = e.report
+        report.elapsed = time.monotonic() - start
+        self.last_report = report
+        return report
+
+    def create_next_round(self, engine: PairingEngine = PairingEngine.RULES) -> PairingReport | None:
+        '''
+        Engine decides how the round is paired. RULES uses the recursive
+        standing based search, MATCHING solves the round as a maximum weight
+        matching and runs in bounded time.
+
+        Returns the pairing report, or None for the initial round which is
+        paired by ranking. Raises PairingError holding the best attempt when
+        no complete pairing was found.
+        '''
+        self.index = self.tournament.get_pairing_index()
         if not self.tournament.rounds:
             self.tournament._create_initial_round()
+            self.tournament.record_round(self.tournament.rounds[-1])
         else:
-            self.players_standing_sort = list(reversed(
-                {k: v for k, v in sorted(self.tournament.get_standings().items(), key=lambda item: item[1])}.keys()
-            ))
-            self.tournament.validate_no_incomplete_match_results_in_rounds()
-            self._assign_round_colors()
+            report = self.pair_next_round(engine)
+            if not report.complete:
+                raise PairingError(report)
             matchups = []
-            assert len(self.matchup_colors) == len(self.tournament.players) / 2
             for mcs in self.matchup_colors:
-                white = [p for p in self.tournament.players if p.id == mcs[0]][0]
-                black = [p for p in self.tournament.players if p.id == mcs[1]][0]
+                white = self.tournament.get_player(mcs[0])
+                black = self.tournament.get_player(mcs[1])
                 assert isinstance(white, Player)
                 matchups.append(
                     Matchup(
@@ -205,24 +639,34 @@ class SwissAssigner:
                         }
                     )
                 )
-            self.tournament.rounds.append(
+            if report.bye is not None:
+                matchups.append(create_bye_matchup(self.tournament.get_player(report.bye)))
+            self.tournament.add_round(
                 Round(
                     matchups,
                     index = self.tournament.rounds[-1].index + 1),
             )
-            # Make sure there are no unevenly assigned matchups
-            assert all([len(v) == len(self.tournament.rounds) for v in self.tournament.get_opponents().values()])
+            # Make sure every active player got exactly one matchup or the bye
+            active = {p.id for p in self.tournament.get_active_players()}
+            assert self.tournament.rounds[-1].get_player_ids() == active
             self.tournament.validate_no_duplicate_matchups()
+            self.tournament.record_round(self.tournament.rounds[-1])
+            return report
 
 class RoundRobinAssigner:
+    '''
+    Pairs all rounds of a round-robin from the closed form Berger tables of
+    the berger module. cycles=2 plays a double round-robin. With an odd
+    player count the player paired with the bye sits the round out.
+    '''
     def __init__(
             self,
             tournament,
+            cycles: int = 1,
         ):
         self.tournament = tournament
-        self.players = list(range(1, len(tournament.players) + 1))
         self.player_count = len(tournament.players)
-        self.half = int(self.player_count / 2)
+        self.cycles = cycles
         self.berger_result = None
 
         # 5 or 6 players:
@@ -243,33 +687,21 @@ class RoundRobinAssigner:
         # Rd 8: 10-9, 1-8, 2-7, 3-6, 4-5.
         # Rd 9: 5-10, 6-4, 7-3, 8-2, 9-1.
 
-
-    def generate_berger_round(self, r):
-        matchups_tuples = []
-        if r % 2 == 1:
-            for i in range(self.half):
-                matchups_tuples.append((self.players[i],self.players[self.player_count-1-i]))
-        else:
-            matchups_tuples.append((self.players[self.player_count-1],self.players[0]))
-            for i in range(1,self.half):
-                matchups_tuples.append((self.players[i],self.players[self.player_count-1-i]))
-        return matchups_tuples
+    def get_round_count(self) -> int:
+        return berger.get_round_count(self.player_count, self.cycles)
 
     def create_berger_rounds(self):
         '''https://en.wikipedia.org/wiki/Round-robin_tournament#Berger_tables'''
+        self.berger_result = list(berger.iter_rounds(self.player_count, self.cycles))
 
-        tuple_rounds = []
-        self.players=[x for x in range(1,self.player_count+1)]
-        tuple_rounds.append(self.generate_berger_round(1))
-        for x in range(2,self.player_count):
-            j = self.players[self.player_count-1]
-            del self.players[self.player_count-1]
-            self.players.extend(x for x in self.players[0:self.half])
-            self.players[0:self.half-1] = self.players[self.half:self.player_count-1]
-            del self.players[self.half-1:self.player_count-1]
-            self.players.append(j)
-            tuple_rounds.append(self.generate_berger_round(x))
-        self.berger_result = tuple_rounds
+    def get_round_player_ids(self, r: int) -> list[tuple[int,int]]:
+        '''White and black player ids of round r, calculated on its own. Byes are left out.'''
+        players = self.tournament.players
+        return [
+            (players[white - 1].id, players[black - 1].id)
+            for white, black in berger.get_round(self.player_count, r)
+            if white is not None and black is not None
+        ]
 
     def replace_berger_ranks_with_player_ids(self):
         if not self.berger_result:
@@ -277,35 +709,32 @@ class RoundRobinAssigner:
                 "You need to calculate the berger_result before replacing the rank "
                 "values with player ids."
             )
+        players = self.tournament.players
         # berger_result_player_id
         brpid = []
         for round in self.berger_result:
-            r = []
-            for matchup in round:
-                r.append(
-                    (
-                        self.tournament.players[matchup[0] - 1].id,
-                        self.tournament.players[matchup[1] - 1].id)
-                )
-            brpid.append(r)
+            brpid.append([
+                (players[white - 1].id, players[black - 1].id)
+                for white, black in round
+                if white is not None and black is not None
+            ])
         return brpid
 
+    def create_round(self, r: int) -> Round:
+        round_matchups = []
+        for white, black in self.get_round_player_ids(r):
+            round_matchups.append(Matchup(
+                {
+                    Color.W: PlayerMatch(self.tournament.get_player(white)),
+                    Color.B: PlayerMatch(self.tournament.get_player(black)),
+                }
+            ))
+        return Round(round_matchups, r)
+
     def prepare_tournament_rounds(self):
         '''
         This is the main method to run.
-        Adds all the rounds to the attached tournament.
+        Adds all the rounds to the attached tournament, one round at a time.
         '''
-        self.create_berger_rounds()
-        brpid = self.replace_berger_ranks_with_player_ids()
-        for i, round in enumerate(brpid):
-            round_matchups = []
-            for matchup_player_ids in round:
-                # TODO: add player id validation
-                round_matchups.append(Matchup(
-                    {
-                        Color.W: [PlayerMatch(p) for p in self.tournament.players if p.id == matchup_player_ids[0]][0],
-                        Color.B: [PlayerMatch(p) for p in self.tournament.players if p.id == matchup_player_ids[1]][0],
-                    }
-                ))
-            self.tournament.rounds.append(Round(round_matchups, i+1))
-
+        for r in range(len(self.tournament.rounds) + 1, self.get_round_count() + 1):
+            self.tournament.add_round(self.create_round(r))
@@ -0,0 +1,168 @@
+from russ_swiss_tournament.service import BYE_PLAYER_ID, Color, match_result_score_map
+
+def _score(res) -> float:
+    return match_result_score_map[res] or 0
+
+class PairingIndex:
+    '''
+    Per tournament index of everything the pairing logic asks about the
+    previous rounds: color counts and sequences, opponents and the inverse
+    "not yet played" sets. Rounds are registered in order and the index is
+    updated in place, so assigners never need to rescan the rounds.
+
+    Byes are not games, they only count towards bye_counts. Together with the
+    scores and the downfloats, players paired against an opponent with a
+    lower score, they form the eligibility index that picks the bye of an
+    odd field, see get_bye_order.
+    '''
+    def __init__(self, player_ids: list[int]):
+        self.player_ids = list(player_ids)
+        self.ranks: dict[int,int] = {pid: i for i, pid in enumerate(self.player_ids)}
+        self.rounds = []
+        self.color_counts: dict[int,list[int]] = {}
+        self.color_sequences: dict[int,list[Color]] = {}
+        self.opponents: dict[int,list[int]] = {}
+        self.opponent_sets: dict[int,set[int]] = {}
+        self.unplayed: dict[int,set[int]] = {}
+        self.bye_counts: dict[int,int] = {}
+        self.scores: dict[int,float] = {}
+        self._down_float_counts: dict[int,int] = {}
+        # Set when a result of an earlier round changed the scores later floats depend on
+        self._floats_stale = False
+        self._reset()
+
+    def _reset(self):
+        '''Empties the index in place so that references to its dicts stay valid'''
+        self.rounds.clear()
+        for d in (
+                self.color_counts,
+                self.color_sequences,
+                self.opponents,
+                self.opponent_sets,
+                self.unplayed,
+                self.bye_counts,
+                self.scores,
+                self._down_float_counts,
+            ):
+            d.clear()
+        self._floats_stale = False
+        for pid in self.player_ids:
+            self._add_player(pid)
+
+    def _add_player(self, player_id: int):
+        self.color_counts[player_id] = [0, 0]
+        self.color_sequences[player_id] = []
+        self.opponents[player_id] = []
+        self.opponent_sets[player_id] = set()
+        self.bye_counts[player_id] = 0
+        self.scores[player_id] = 0
+        self._down_float_counts[player_id] = 0
+        others = set(self.unplayed)
+        for unplayed in self.unplayed.values():
+            unplayed.add(player_id)
+        self.unplayed[player_id] = others
+
+    def add_player(self, player_id: int):
+        '''Late entry, ranked below the players already in the index'''
+        if player_id in self.color_counts:
+            return
+        self.ranks[player_id] = len(self.player_ids)
+        self.player_ids.append(player_id)
+        self._add_player(player_id)
+
+    def add_round(self, round):
+        games = list(round.iter_games())
+        for white, black, white_res, black_res in games:
+            for pid in (white, black):
+                if pid != BYE_PLAYER_ID and pid not in self.color_counts:
+                    self._add_player(pid)
+        self._add_floats(games, self.scores, self._down_float_counts)
+        self._add_scores(games, self.scores)
+        for white, black, white_res, black_res in games:
+            if black == BYE_PLAYER_ID:
+                self.bye_counts[white] += 1
+                continue
+            self.color_counts[white][0] += 1
+            self.color_counts[black][1] += 1
+            self.color_sequences[white].append(Color.W)
+            self.color_sequences[black].append(Color.B)
+            self.opponents[white].append(black)
+            self.opponents[black].append(white)
+            self.opponent_sets[white].add(black)
+            self.opponent_sets[black].add(white)
+            self.unplayed[white].discard(black)
+            self.unplayed[black].discard(white)
+        self.rounds.append(round)
+
+    def truncate(self, pos: int):
+        '''Drops the rounds from position pos onwards by rebuilding from the kept rounds'''
+        kept = self.rounds[:pos]
+        self._reset()
+        for r in kept:
+            self.add_round(r)
+
+    def on_result_change(self, pos: int, player_id: int | None, old, new):
+        '''
+        Replaced players rebuild the history from the round on. A result only
+        changes the score of the player, and the floats of the later rounds
+        when the round is not the last one.
+        '''
+        if player_id is None:
+            self.truncate(pos)
+            return
+        if player_id == BYE_PLAYER_ID:
+            return
+        self.scores[player_id] = self.scores.get(player_id, 0) + _score(new) - _score(old)
+        if pos < len(self.rounds) - 1:
+            self._floats_stale = True
+
+    @staticmethod
+    def _add_scores(games: list[tuple], scores: dict[int,float]):
+        for white, black, white_res, black_res in games:
+            scores[white] += _score(white_res)
+            if black != BYE_PLAYER_ID:
+                scores[black] += _score(black_res)
+
+    @staticmethod
+    def _add_floats(games: list[tuple], scores: dict[int,float], down_float_counts: dict[int,int]):
+        '''Counts the downfloat of the higher scored player of every game, scores are before the round'''
+        for white, black, white_res, black_res in games:
+            if black == BYE_PLAYER_ID:
+                continue
+            if scores[white] > scores[black]:
+                down_float_counts[white] += 1
+            elif scores[black] > scores[white]:
+                down_float_counts[black] += 1
+
+    @property
+    def down_float_counts(self) -> dict[int,int]:
+        '''Rounds in which the player was paired against an opponent with a lower score'''
+        if self._floats_stale:
+            scores = dict.fromkeys(self.scores, 0)
+            self._down_float_counts.update(dict.fromkeys(self.scores, 0))
+            for r in self.rounds:
+                games = list(r.iter_games())
+                self._add_floats(games, scores, self._down_float_counts)
+                self._add_scores(games, scores)
+            self._floats_stale = False
+        return self._down_float_counts
+
+    def has_played(self, player_id: int, opponent_id: int) -> bool:
+        return opponent_id in self.opponent_sets[player_id]
+
+    def get_bye_order(self, player_ids: list[int]) -> list[int]:
+        '''
+        Bye candidates among player_ids, most eligible first: players without
+        a bye before the others, then the lowest score group, within it the
+        players that did not float down yet and then the lowest starting rank.
+        '''
+        down_float_counts = self.down_float_counts
+        return sorted(
+            player_ids,
+            key=lambda p: (
+                self.bye_counts.get(p, 0),
+                self.scores.get(p, 0),
+                down_float_counts.get(p, 0),
+                -self.ranks.get(p, len(self.ranks)),
+            ),
+        )
@@ -1,3 +1,5 @@
+from russ_swiss_tournament.service import BYE_PLAYER_ID
+
 class Player:
     def __init__(
             self,
@@ -16,3 +18,6 @@ class Player:
 
     def __repr__(self):
         return f"[{self.id}]{self.get_full_name()}"
+
+# Opponent of every bye game
+BYE_PLAYER = Player(BYE_PLAYER_ID, 'Bye', '')
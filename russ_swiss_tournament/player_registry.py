@@ -0,0 +1,53 @@
+import difflib
+
+from russ_swiss_tournament.player import Player
+
+class PlayerRegistry:
+    '''
+    Hash indexes of players by id and by normalized full name.
+    The first registered player wins when two players share an id or a name.
+    '''
+    def __init__(self, players: list[Player] | None = None):
+        self.players: list[Player] = []
+        self.by_id: dict[int,Player] = {}
+        self.by_name: dict[str,Player] = {}
+        for p in players or []:
+            self.add(p)
+
+    @staticmethod
+    def normalize_name(name: str) -> str:
+        return ' '.join(name.lower().split())
+
+    def add(self, player: Player):
+        self.players.append(player)
+        self.by_id.setdefault(player.id, player)
+        self.by_name.setdefault(self.normalize_name(player.get_full_name()), player)
+
+    def __len__(self):
+        return len(self.players)
+
+    def __iter__(self):
+        return iter(self.players)
+
+    def __contains__(self, player_id: int):
+        return player_id in self.by_id
+
+    def get(self, player_id: int) -> Player | None:
+        return self.by_id.get(player_id)
+
+    def get_by_name(self, name: str) -> Player | None:
+        return self.by_name.get(self.normalize_name(name))
+
+    def match(self, s: str) -> Player | None:
+        '''Matches a csv cell holding either a player id or a full name'''
+        sanitized = s.strip()
+        if sanitized.isdigit():
+            player = self.by_id.get(int(sanitized))
+            if player is not None:
+                return player
+        return self.get_by_name(sanitized)
+
+    def suggest(self, s: str, count: int = 3) -> list[str]:
+        '''Full names closest to s, meant for error messages after a failed match'''
+        names = difflib.get_close_matches(self.normalize_name(s), self.by_name.keys(), n=count)
+        return [self.by_name[n].get_full_name() for n in names]
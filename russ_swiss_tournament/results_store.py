@@ -0,0 +1,113 @@
+from array import array
+
+from russ_swiss_tournament.player import Player, BYE_PLAYER
+from russ_swiss_tournament.service import MatchResult, Color
+
+# MatchResult by its value, a list lookup is a lot faster than MatchResult(value)
+RESULTS_BY_CODE = [None] * (max(r.value for r in MatchResult) + 1)
+for _r in MatchResult:
+    RESULTS_BY_CODE[_r.value] = _r
+
+class ResultsStore:
+    '''
+    Columnar storage of game results.
+
+    Every game is a row in parallel arrays of round index, white id, black id
+    and the result codes (MatchResult values) of both players. Rounds, matchups
+    and player matches bound to a store are lightweight views over its rows.
+
+    Changes are reported to the listeners with (row, player_id, old, new),
+    where player_id is None when the players of the row were replaced.
+    '''
+    def __init__(self):
+        self.round = array('i')
+        self.white = array('q')
+        self.black = array('q')
+        self.white_result = array('b')
+        self.black_result = array('b')
+        self.players: dict[int,Player] = {BYE_PLAYER.id: BYE_PLAYER}
+        self.listeners = []
+
+    def __len__(self):
+        return len(self.round)
+
+    def append(
+            self,
+            round_index: int,
+            white_id: int,
+            black_id: int,
+            white_res: MatchResult = MatchResult.UNSET,
+            black_res: MatchResult = MatchResult.UNSET,
+        ) -> int:
+        self.round.append(round_index)
+        self.white.append(white_id)
+        self.black.append(black_id)
+        self.white_result.append(white_res.value)
+        self.black_result.append(black_res.value)
+        return len(self.round) - 1
+
+    def get_player_id(self, row: int, color: Color) -> int:
+        if color == Color.W:
+            return self.white[row]
+        return self.black[row]
+
+    def get_result(self, row: int, color: Color) -> MatchResult:
+        if color == Color.W:
+            return RESULTS_BY_CODE[self.white_result[row]]
+        return RESULTS_BY_CODE[self.black_result[row]]
+
+    def set_result(self, row: int, color: Color, res: MatchResult):
+        column = self.white_result if color == Color.W else self.black_result
+        old = RESULTS_BY_CODE[column[row]]
+        if old == res:
+            return
+        column[row] = res.value
+        for listener in self.listeners:
+            listener(row, self.get_player_id(row, color), old, res)
+
+    def set_game(
+            self,
+            row: int,
+            white_id: int,
+            black_id: int,
+            white_res: MatchResult,
+            black_res: MatchResult,
+        ):
+        self.white[row] = white_id
+        self.black[row] = black_id
+        self.white_result[row] = white_res.value
+        self.black_result[row] = black_res.value
+        for listener in self.listeners:
+            listener(row, None, None, None)
+
+    def iter_games(self, rows: range):
+        '''Yields (white id, black id, white result, black result) for consecutive rows'''
+        start, stop = rows.start, rows.stop
+        return zip(
+            self.white[start:stop],
+            self.black[start:stop],
+            map(RESULTS_BY_CODE.__getitem__, self.white_result[start:stop]),
+            map(RESULTS_BY_CODE.__getitem__, self.black_result[start:stop]),
+        )
+
+    def get_columns(self, rows: range) -> (array, array, array, array):
+        '''White ids, black ids and result codes of consecutive rows as arrays'''
+        start, stop = rows.start, rows.stop
+        return (
+            self.white[start:stop],
+            self.black[start:stop],
+            self.white_result[start:stop],
+            self.black_result[start:stop],
+        )
+
+def find_round_position(rounds, store: ResultsStore, row: int) -> int | None:
+    '''Position of the round holding row of store, using the round index as a first guess'''
+    def holds_row(r):
+        return r.store is store and row in r.rows
+    pos = store.round[row] - 1
+    if 0 <= pos < len(rounds) and holds_row(rounds[pos]):
+        return pos
+    for pos, r in enumerate(rounds):
+        if holds_row(r):
+            return pos
+    return None
@@ -1,9 +1,11 @@
 import itertools
 import csv
 from russ_swiss_tournament.matchup import Matchup, PlayerMatch
-from russ_swiss_tournament.player import Player
+from russ_swiss_tournament.player import Player, BYE_PLAYER
 from russ_swiss_tournament.db import Database
-from russ_swiss_tournament.service import MatchResult, Color, match_result_manual_map, match_result_score_map, match_result_score_text_map
+from russ_swiss_tournament.results_store import ResultsStore
+from russ_swiss_tournament.player_registry import PlayerRegistry
+from russ_swiss_tournament.service import BYE_PLAYER_ID, MatchResult, Color, match_result_manual_map, match_result_score_map, match_result_score_text_map
 
 match_result_manual_map = {
     1: MatchResult.WIN,
@@ -15,6 +17,7 @@ match_result_manual_map = {
     "0,5": MatchResult.DRAW,
     "wo": MatchResult.WALKOVER,
     "walkover": MatchResult.WALKOVER,
+    "bye": MatchResult.BYE,
     None: MatchResult.UNSET,
     "": MatchResult.UNSET,
     False: MatchResult.UNSET,
@@ -26,6 +29,7 @@ match_result_score_map = {
     MatchResult.DRAW: 0.5,
     MatchResult.UNSET: None,
     MatchResult.WALKOVER: 0,
+    MatchResult.BYE: 1,
 }
 
 match_result_score_text_map = {
@@ -34,10 +38,19 @@ match_result_score_text_map = {
     MatchResult.DRAW: 0.5,
     MatchResult.UNSET: None,
     MatchResult.WALKOVER: 'wo',
+    MatchResult.BYE: 'bye',
 }
 
+ROUND_CSV_HEADER = ["white", "score_white", "black", "score_black"]
+
 class Round:
-    '''Note: index var starts from 1 to match with csv file names'''
+    '''
+    Note: index var starts from 1 to match with csv file names
+
+    A round bound to a ResultsStore is a view over consecutive store rows.
+    Its matchups are only created when the matchups attribute is used, so
+    code that only needs results should use iter_games instead.
+    '''
     id_iter = itertools.count()
     def __init__(
             self,
@@ -47,38 +60,89 @@ class Round:
         self.id = next(self.id_iter)
         self.matchups = matchups
         self.index = index
+        self.store: ResultsStore | None = None
+        self.rows: range | None = None
 
     @classmethod
-    def match_player(cls, s:str, players: list[Player]) -> Player:
-        res = None
-        sanitized = s.lower().strip()
-        for p in players:
-            if (sanitized.isdigit() and str(p.id) == sanitized
-                    or p.get_full_name().lower().strip() == sanitized):
-                res = p
-                break
-        return res
+    def from_store(cls, store: ResultsStore, rows: range, index: int):
+        r = cls(None, index)
+        r.store = store
+        r.rows = rows
+        return r
+
+    @property
+    def matchups(self) -> list[Matchup]:
+        if self._matchups is None:
+            self._matchups = [Matchup.from_store(self.store, row) for row in self.rows]
+        return self._matchups
+
+    @matchups.setter
+    def matchups(self, value: list[Matchup] | None):
+        self._matchups = value
+
+    def bind(self, store: ResultsStore):
+        '''Moves the games of the round into store and turns the round into a view of them'''
+        games = list(self.iter_games())
+        start = len(store)
+        for game in games:
+            store.append(self.index, *game)
+        matchups = self._matchups
+        self.store = store
+        self.rows = range(start, len(store))
+        if matchups is not None:
+            for m, row in zip(matchups, self.rows):
+                m.bind(store, row)
+
+    def iter_games(self):
+        '''Yields (white id, black id, white result, black result) for every matchup'''
+        if self.store is not None:
+            return self.store.iter_games(self.rows)
+        return (
+            (
+                m.res[Color.W].player.id,
+                m.res[Color.B].player.id,
+                m.res[Color.W].res,
+                m.res[Color.B].res,
+            )
+            for m in self._matchups
+        )
+
+    @classmethod
+    def match_player(cls, s:str, players: list[Player] | PlayerRegistry) -> Player:
+        if not isinstance(players, PlayerRegistry):
+            players = PlayerRegistry(players)
+        return players.match(s)
 
     @classmethod
     def read_csv(
             cls,
             path,
             index,
-            players: list[Player] | None = None
+            players: list[Player] | PlayerRegistry | None = None
         ):
+        '''Pass a PlayerRegistry when reading several rounds to avoid rebuilding it per file'''
+        if not isinstance(players, PlayerRegistry):
+            players = PlayerRegistry(players)
         matchups = []
         with open(path, newline='') as csv_file:
             round_reader = csv.reader(csv_file, delimiter=',', quotechar='"')
             headers = next(round_reader, None)
             for line in round_reader:
-                white_player = cls.match_player(line[0], players)
-                black_player = cls.match_player(line[2], players)
-                if (white_player is None
-                        or black_player is None
-                        or any([pid not in [x.id for x in players] for pid in [white_player.id, black_player.id]])):
+                white_player = players.match(line[0])
+                if match_result_manual_map[line[1]] == MatchResult.BYE and not line[2]:
+                    matchups.append(Matchup({
+                        Color.W: PlayerMatch(white_player, MatchResult.BYE),
+                        Color.B: PlayerMatch(BYE_PLAYER, MatchResult.BYE),
+                    }))
+                    continue
+                black_player = players.match(line[2])
+                if white_player is None or black_player is None:
+                    missing = line[0] if white_player is None else line[2]
+                    suggestions = players.suggest(missing)
+                    hint = f" Did you mean: {', '.join(suggestions)}?" if suggestions else ""
                     raise ValueError(
                         f"Could not match player {line[0]} or player {line[2]} "
-                        "based on id or full name. Check exact typing from database"
+                        f"based on id or full name. Check exact typing from database.{hint}"
                     )
                 matchup = Matchup({
                     Color.W: PlayerMatch(white_player, match_result_manual_map[line[1]]),
@@ -88,19 +152,19 @@ class Round:
         return cls(matchups, index)
 
     def get_results(self) -> dict[int,float]:
-        player_ids = self.get_player_ids()
-        results = dict(zip(list(player_ids), [0 for i in range(len(player_ids))]))
-        for m in self.matchups:
-            results[m.res[Color.W].player.id] = match_result_score_map[m.res[Color.W].res]
-            results[m.res[Color.B].player.id] = match_result_score_map[m.res[Color.B].res]
+        results = {}
+        for white, black, white_res, black_res in self.iter_games():
+            results[white] = match_result_score_map[white_res]
+            if black != BYE_PLAYER_ID:
+                results[black] = match_result_score_map[black_res]
         return results
 
     def get_player_ids(self):
         player_ids = set()
-        for m in self.matchups:
-            rps = [p.player.id for p in m.res.values()]
-            for p in rps:
-                player_ids.add(p)
+        for white, black, white_res, black_res in self.iter_games():
+            player_ids.add(white)
+            if black != BYE_PLAYER_ID:
+                player_ids.add(black)
         return player_ids
 
     def get_player_matchup(self, player_id):
@@ -109,35 +173,40 @@ class Round:
             if player_id in player_ids:
                 return m
 
+    def iter_csv_rows(self, names: dict[int,str] | None = None):
+        '''Rows of the round csv file without the header, players are written by name when names are given'''
+        for white_id, black_id, white_res, black_res in self.iter_games():
+            if black_id == BYE_PLAYER_ID:
+                black = ''
+            else:
+                black = names[black_id] if names is not None else black_id
+            yield [
+                names[white_id] if names is not None else white_id,
+                match_result_score_text_map[white_res],
+                black,
+                match_result_score_text_map[black_res],
+            ]
+
     def write_csv(
             self,
             path,
             db: Database | None = None,
         ):
-        '''Path refers to a folder. File names are automated based on round index'''
+        '''
+        Path refers to a folder. File names are automated based on round index.
+        Use Tournament.write_round_csvs to write every round of a tournament.
+        '''
+        names = None
+        if db:
+            names = {pid: db.get_player_by_id(pid).get_full_name() for pid in self.get_player_ids()}
         with open(path / f"round{self.index}.csv", 'w', newline='') as csv_file:
             round_writer = csv.writer(csv_file, delimiter=',', quotechar='"')
-            header_row = ["white", "score_white", "black", "score_black"]
-            round_writer.writerow(header_row)
-            rows = []
-            for m in self.matchups:
-                if db:
-                    white = db.get_player_by_id(m.res[Color.W].player.id).get_full_name()
-                    black = db.get_player_by_id(m.res[Color.B].player.id).get_full_name()
-                else:
-                    white = m.res[Color.W].player.id
-                    black = m.res[Color.B].player.id
-                row = [
-                    white,
-                    match_result_score_text_map[m.res[Color.W].res],
-                    black,
-                    match_result_score_text_map[m.res[Color.B].res],
-                ]
-                rows.append(row)
-            round_writer.writerows(rows)
+            round_writer.writerow(ROUND_CSV_HEADER)
+            round_writer.writerows(self.iter_csv_rows(names))
 
     def is_complete(self):
-        if any([MatchResult.UNSET in [x.res for x in v.res.values()] for v in self.matchups]):
-            return False
+        for white, black, white_res, black_res in self.iter_games():
+            if white_res == MatchResult.UNSET or black_res == MatchResult.UNSET:
+                return False
         return True
 
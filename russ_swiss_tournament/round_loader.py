@@ -0,0 +1,226 @@
+'''
+Bulk loading of round csv files straight into a ResultsStore.
+
+Files are parsed in a thread or process pool, then every row is validated
+and all problems of all files are reported together. Valid rows are
+appended to the store without creating Matchup objects, the returned
+rounds are views over the store.
+'''
+from pathlib import Path
+from enum import Enum
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+import hashlib
+import time
+import csv
+
+from russ_swiss_tournament.player import Player, BYE_PLAYER
+from russ_swiss_tournament.player_registry import PlayerRegistry
+from russ_swiss_tournament.results_store import ResultsStore
+from russ_swiss_tournament.matchup import VALID_RESULT_PAIRS
+from russ_swiss_tournament.round import Round
+from russ_swiss_tournament.service import MatchResult, match_result_manual_map
+
+class LoadExecutor(Enum):
+    SERIAL = 1
+    THREAD = 2
+    PROCESS = 3
+
+class RoundCsvError(ValueError):
+    '''Raised with every invalid row of every file once loading is done'''
+    def __init__(self, errors: list[str]):
+        self.errors = errors
+        super().__init__(
+            f"{len(errors)} invalid round csv rows:\n" + '\n'.join(errors)
+        )
+
+# Temporary round files older than this are leftovers of an interrupted write
+PENDING_WRITE_TIMEOUT = 5.0
+PENDING_WRITE_POLL = 0.02
+
+def get_pending_round_files(round_folder: Path) -> list[Path]:
+    '''Temporary files of a batched round write that is still being renamed into place'''
+    now = time.time()
+    pending = []
+    for path in round_folder.glob('*.csv.tmp'):
+        try:
+            if now - path.stat().st_mtime < PENDING_WRITE_TIMEOUT:
+                pending.append(path)
+        except FileNotFoundError:
+            pass
+    return pending
+
+def wait_for_pending_writes(round_folder: Path, timeout: float = PENDING_WRITE_TIMEOUT):
+    '''Blocks while a batched write of the round files is in progress, at most timeout seconds'''
+    deadline = time.monotonic() + timeout
+    while get_pending_round_files(round_folder) and time.monotonic() < deadline:
+        time.sleep(PENDING_WRITE_POLL)
+
+def get_round_files(round_folder: Path) -> list[Path]:
+    '''Round csv files of a folder sorted by the round number in the file name'''
+    csv_files = [rf for rf in round_folder.iterdir() if rf.suffix == '.csv']
+    return sorted(csv_files, key = lambda x: int(''.join(c for c in x.stem if c.isdigit())))
+
+def parse_round_file(path: Path) -> list[list[str]]:
+    '''Rows of a round csv file without the header, as plain strings'''
+    with open(path, newline='') as csv_file:
+        round_reader = csv.reader(csv_file, delimiter=',', quotechar='"')
+        next(round_reader, None)
+        return [line for line in round_reader if line]
+
+def _parse_files(paths: list[Path], executor: LoadExecutor, max_workers: int | None) -> list[list[list[str]]]:
+    if executor == LoadExecutor.SERIAL or len(paths) < 2:
+        return [parse_round_file(p) for p in paths]
+    pool_class = ProcessPoolExecutor if executor == LoadExecutor.PROCESS else ThreadPoolExecutor
+    with pool_class(max_workers=max_workers) as pool:
+        return list(pool.map(parse_round_file, paths))
+
+def _validate_rows(path: Path, lines: list[list[str]], players: PlayerRegistry, errors: list[str]) -> list[tuple]:
+    '''Returns the valid games of a file, adds a message per invalid row to errors'''
+    games = []
+    seen = set()
+    for line_number, line in enumerate(lines, start=2):
+        location = f"{path.name} line {line_number}"
+        if len(line) < 4:
+            errors.append(f"{location}: expected 4 columns, got {len(line)}")
+            continue
+        white = players.match(line[0])
+        white_res = match_result_manual_map.get(line[1].strip().lower())
+        black_res = match_result_manual_map.get(line[3].strip().lower())
+        # A bye is written with the result of the white player and no opponent
+        bye = white_res == MatchResult.BYE and not line[2].strip()
+        if bye:
+            black = BYE_PLAYER
+            if black_res == MatchResult.UNSET:
+                black_res = MatchResult.BYE
+        else:
+            black = players.match(line[2])
+        row_errors = []
+        for cell, player in ((line[0], white), (line[2], black)):
+            if player is BYE_PLAYER:
+                continue
+            if player is None:
+                suggestions = players.suggest(cell)
+                hint = f" Did you mean: {', '.join(suggestions)}?" if suggestions else ""
+                row_errors.append(f"unknown player {cell}.{hint}")
+            elif player.id in seen:
+                row_errors.append(f"player {cell} is paired more than once in the round")
+        for cell, res in ((line[1], white_res), (line[3], black_res)):
+            if res is None:
+                row_errors.append(f"unknown result {cell!r}")
+        if white_res is not None and black_res is not None:
+            if frozenset((white_res, black_res)) not in VALID_RESULT_PAIRS:
+                row_errors.append(f"invalid result pair {line[1]} - {line[3]}")
+        if row_errors:
+            errors.extend(f"{location}: {e}" for e in row_errors)
+            continue
+        seen.add(white.id)
+        if not bye:
+            seen.add(black.id)
+        games.append((white.id, black.id, white_res, black_res))
+    return games
+
+def read_round_games(
+        paths: list[Path],
+        players: list[Player] | PlayerRegistry,
+        executor: LoadExecutor = LoadExecutor.THREAD,
+        max_workers: int | None = None,
+    ) -> list[list[tuple]]:
+    '''
+    Parses and validates round files of one tournament. Returns the games of
+    every file as (white id, black id, white result, black result) tuples.
+    Raises RoundCsvError listing every invalid row of every file.
+    '''
+    registry = players if isinstance(players, PlayerRegistry) else PlayerRegistry(players)
+    parsed = _parse_files(paths, executor, max_workers)
+    errors = []
+    games = [_validate_rows(path, lines, registry, errors) for path, lines in zip(paths, parsed)]
+    if errors:
+        raise RoundCsvError(errors)
+    return games
+
+def read_round_folders(
+        round_folders: list[Path],
+        players: list[list[Player] | PlayerRegistry],
+        stores: list[ResultsStore] | None = None,
+        executor: LoadExecutor = LoadExecutor.THREAD,
+        max_workers: int | None = None,
+    ) -> list[list[Round]]:
+    '''
+    Loads the rounds of several tournaments with one pool. players and stores
+    hold one entry per round folder, a new store is created when none is given.
+    Raises RoundCsvError listing every invalid row of every file.
+    '''
+    registries = [p if isinstance(p, PlayerRegistry) else PlayerRegistry(p) for p in players]
+    if stores is None:
+        stores = [ResultsStore() for f in round_folders]
+    files = [get_round_files(f) for f in round_folders]
+    parsed = _parse_files([p for fs in files for p in fs], executor, max_workers)
+
+    errors = []
+    validated = []
+    parsed_iter = iter(parsed)
+    for paths, registry in zip(files, registries):
+        validated.append([
+            _validate_rows(path, next(parsed_iter), registry, errors) for path in paths
+        ])
+    if errors:
+        raise RoundCsvError(errors)
+
+    res = []
+    for folder_games, registry, store in zip(validated, registries, stores):
+        store.players.update(registry.by_id)
+        rounds = []
+        for i, games in enumerate(folder_games):
+            start = len(store)
+            for game in games:
+                store.append(i + 1, *game)
+            rounds.append(Round.from_store(store, range(start, len(store)), i + 1))
+        res.append(rounds)
+    return res
+
+def read_rounds(
+        round_folder: Path,
+        players: list[Player] | PlayerRegistry,
+        store: ResultsStore | None = None,
+        executor: LoadExecutor = LoadExecutor.THREAD,
+        max_workers: int | None = None,
+    ) -> list[Round]:
+    '''Loads all rounds of one tournament folder, see read_round_folders'''
+    return read_round_folders(
+        [round_folder],
+        [players],
+        None if store is None else [store],
+        executor,
+        max_workers,
+    )[0]
+
+class RoundFileTracker:
+    '''
+    Remembers a (mtime, size, content hash, hash time) fingerprint per round
+    file so that only files with new content are read again. The hash is
+    reused when mtime and size are unchanged, unless the file was modified
+    shortly before it was hashed: a write within the same timestamp tick
+    would not change mtime, so such files are hashed again.
+    '''
+    RACY_NS = 1_000_000_000
+
+    def __init__(self):
+        self.files: dict[Path,tuple[int,int,str,int]] = {}
+
+    def fingerprint(self, path: Path) -> tuple[int,int,str,int]:
+        stat = path.stat()
+        known = self.files.get(path)
+        if (known
+                and known[:2] == (stat.st_mtime_ns, stat.st_size)
+                and known[3] - stat.st_mtime_ns > self.RACY_NS):
+            return known
+        hashed_at = time.time_ns()
+        digest = hashlib.blake2b(path.read_bytes()).hexdigest()
+        return (stat.st_mtime_ns, stat.st_size, digest, hashed_at)
+
+    def has_changed(self, path: Path, fingerprint: tuple[int,int,str,int]) -> bool:
+        known = self.files.get(path)
+        return known is None or known[2] != fingerprint[2]
+
+    def record(self, path: Path, fingerprint: tuple[int,int,str,int]):
+        self.files[path] = fingerprint
@@ -0,0 +1,61 @@
+class ScoreGroups:
+    '''
+    Unpaired players of the round being paired, bucketed by score.
+
+    Groups are ordered from the highest score down and keep their players in
+    pairing order in dicts used as ordered sets, so removing a paired player
+    is O(1). Players floated down into a group are kept apart from its own
+    players and are paired before them.
+    '''
+    def __init__(self, players: list[int], scores: dict[int,float] | None = None):
+        '''Players in pairing order, all players form one group without scores'''
+        by_score: dict[float,dict[int,None]] = {}
+        for p in players:
+            by_score.setdefault(scores[p] if scores is not None else 0, {})[p] = None
+        self.scores: list[float] = sorted(by_score, reverse=True)
+        self.residents: list[dict[int,None]] = [by_score[s] for s in self.scores]
+        self.down_floaters: list[dict[int,None]] = [{} for s in self.scores]
+        self.group_of: dict[int,int] = {p: i for i, s in enumerate(self.scores) for p in by_score[s]}
+        # Groups before head are empty
+        self._head = 0
+
+    def __len__(self):
+        return len(self.group_of)
+
+    def __contains__(self, player_id: int):
+        return player_id in self.group_of
+
+    def __iter__(self):
+        '''Unpaired players in pairing order'''
+        for i in range(self._head, len(self.scores)):
+            yield from self.iter_group(i)
+
+    def iter_group(self, i: int):
+        yield from self.down_floaters[i]
+        yield from self.residents[i]
+
+    def first(self) -> int | None:
+        '''The unpaired player to be paired next'''
+        while self._head < len(self.scores):
+            for p in self.iter_group(self._head):
+                return p
+            self._head += 1
+        return None
+
+    def remove(self, player_id: int):
+        i = self.group_of.pop(player_id)
+        for group in (self.residents[i], self.down_floaters[i]):
+            if player_id in group:
+                del group[player_id]
+                return
+
+    def move_down(self, player_id: int) -> bool:
+        '''Floats the player into the next lower group, False from the lowest group'''
+        i = self.group_of[player_id]
+        if i + 1 == len(self.scores):
+            return False
+        self.remove(player_id)
+        self.down_floaters[i + 1][player_id] = None
+        self.group_of[player_id] = i + 1
+        return True
+
@@ -0,0 +1,228 @@
+'''
+Season wide processing of every tournament under a tournaments folder.
+
+Each config.toml is loaded and scored in a worker that only returns a small
+TournamentSummary, so memory stays bounded by the number of tournaments in
+flight instead of the size of the season. Summaries are merged into a
+SeasonReport as they complete.
+'''
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, FIRST_COMPLETED, wait
+from dataclasses import dataclass, field
+from typing import Callable
+import argparse
+import csv
+import os
+import sys
+import threading
+
+from russ_swiss_tournament.db import Database
+from russ_swiss_tournament.round_loader import LoadExecutor
+from russ_swiss_tournament.tournament import Tournament, RoundSystem
+from russ_swiss_tournament.service import BYE_PLAYER_ID, MatchResult, match_result_score_map
+
+@dataclass
+class TournamentSummary:
+    config_path: Path
+    year: int | None = None
+    count: int | None = None
+    round_system: str | None = None
+    round_count: int = 0
+    player_names: dict[int,str] = field(default_factory=dict)
+    standings: dict[int,float] = field(default_factory=dict)
+    tie_breaks: dict[str,dict[int,float]] = field(default_factory=dict)
+    player_stats: dict[int,list[int | float]] = field(default_factory=dict)
+    error: str | None = None
+
+@dataclass
+class PlayerSeasonStats:
+    name: str
+    tournaments: int = 0
+    games: int = 0
+    wins: int = 0
+    draws: int = 0
+    losses: int = 0
+    points: float = 0
+
+@dataclass
+class SeasonReport:
+    tournaments: list[TournamentSummary] = field(default_factory=list)
+    players: dict[int,PlayerSeasonStats] = field(default_factory=dict)
+
+    def add(self, summary: TournamentSummary):
+        self.tournaments.append(summary)
+        for pid, (games, wins, draws, losses, points) in summary.player_stats.items():
+            stats = self.players.setdefault(pid, PlayerSeasonStats(summary.player_names.get(pid, str(pid))))
+            stats.tournaments += 1
+            stats.games += games
+            stats.wins += wins
+            stats.draws += draws
+            stats.losses += losses
+            stats.points += points
+
+    def get_errors(self) -> dict[Path,str]:
+        return {s.config_path: s.error for s in self.tournaments if s.error}
+
+    def write_csv(self, folder: Path):
+        '''Writes season_standings.csv and season_players.csv to folder'''
+        tournaments = sorted(
+            (s for s in self.tournaments if not s.error),
+            key=lambda s: (s.year, s.count),
+        )
+        with open(folder / 'season_standings.csv', 'w', newline='') as csv_file:
+            writer = csv.writer(csv_file, delimiter=',', quotechar='"')
+            writer.writerow(['year', 'count', 'rank', 'player_id', 'name', 'score', 'tie_breaks'])
+            for s in tournaments:
+                for rank, (pid, score) in enumerate(s.standings.items(), start=1):
+                    tie_breaks = ' '.join(f"{k}={v[pid]}" for k, v in s.tie_breaks.items() if pid in v)
+                    writer.writerow([s.year, s.count, rank, pid, s.player_names.get(pid), score, tie_breaks])
+        with open(folder / 'season_players.csv', 'w', newline='') as csv_file:
+            writer = csv.writer(csv_file, delimiter=',', quotechar='"')
+            writer.writerow(['player_id', 'name', 'tournaments', 'games', 'wins', 'draws', 'losses', 'points'])
+            for pid, p in sorted(self.players.items(), key=lambda item: item[1].points, reverse=True):
+                writer.writerow([pid, p.name, p.tournaments, p.games, p.wins, p.draws, p.losses, p.points])
+
+def discover_configs(root: Path) -> list[Path]:
+    '''Every config.toml in the tournament folders under root'''
+    return sorted(root.glob('*/config.toml'))
+
+# One lazily indexed roster per worker, thread local so that threads of a
+# thread pool never swap the roster of another thread mid-use
+_worker = threading.local()
+
+def _get_worker_db(players_csv_path: Path) -> Database:
+    db = getattr(_worker, 'db', None)
+    if db is None or db.players_csv_path != players_csv_path:
+        db = Database(players_csv_path=players_csv_path, lazy=True)
+        db.read_players()
+        _worker.db = db
+    return db
+
+def summarize_tournament(t: Tournament, config_path: Path) -> TournamentSummary:
+    summary = TournamentSummary(
+        config_path = config_path,
+        year = t.year,
+        count = t.count,
+        round_system = t.round_system.name,
+        round_count = len(t.rounds),
+        player_names = {p.id: p.get_full_name() for p in t.players},
+    )
+    stats = {p.id: [0, 0, 0, 0, 0] for p in t.players}
+    for r in t.rounds:
+        for white, black, white_res, black_res in r.iter_games():
+            if black == BYE_PLAYER_ID:
+                # The points of a bye count, the bye is not a game
+                stats.setdefault(white, [0, 0, 0, 0, 0])[4] += match_result_score_map[white_res] or 0
+                continue
+            for pid, res in ((white, white_res), (black, black_res)):
+                if res == MatchResult.UNSET:
+                    continue
+                s = stats.setdefault(pid, [0, 0, 0, 0, 0])
+                s[0] += 1
+                s[1] += res == MatchResult.WIN
+                s[2] += res == MatchResult.DRAW
+                s[3] += res in (MatchResult.LOSS, MatchResult.WALKOVER)
+                s[4] += match_result_score_map[res]
+    summary.player_stats = stats
+    summary.standings = t.get_standings()
+    if t.round_system == RoundSystem.SWISS:
+        t.calculate_tie_break_results_swiss()
+        tie_breaks = t.tie_break_results_swiss
+    else:
+        t.calculate_tie_break_results_round_robin()
+        tie_breaks = t.tie_break_results_round_robin
+    summary.tie_breaks = {k.name.lower(): v for k, v in tie_breaks.items() if v is not None}
+    return summary
+
+def score_tournament(
+        config_path: Path,
+        create_players: bool = False,
+        players_csv_path: Path | None = None,
+    ) -> TournamentSummary:
+    '''Loads and scores one tournament, errors are returned in the summary'''
+    try:
+        db = None if create_players else _get_worker_db(players_csv_path or Path.cwd() / 'player.csv')
+        t = Tournament.from_toml(config_path, create_players=create_players, db=db)
+        return summarize_tournament(t, config_path)
+    except Exception as e:
+        return TournamentSummary(config_path, error=f"{type(e).__name__}: {e}")
+
+def process_season(
+        configs: list[Path],
+        create_players: bool = False,
+        players_csv_path: Path | None = None,
+        executor: LoadExecutor = LoadExecutor.PROCESS,
+        max_workers: int | None = None,
+        progress: Callable[[int, int, TournamentSummary], None] | None = None,
+    ) -> SeasonReport:
+    '''
+    Scores every tournament of configs in a pool and merges the results into
+    a SeasonReport. At most two tournaments per worker are in flight at once.
+    progress is called with (done, total, summary) after every tournament.
+    '''
+    report = SeasonReport()
+    total = len(configs)
+    if executor == LoadExecutor.SERIAL:
+        for i, config in enumerate(configs, start=1):
+            report.add(score_tournament(config, create_players, players_csv_path))
+            if progress:
+                progress(i, total, report.tournaments[-1])
+        return report
+
+    max_workers = max_workers or os.cpu_count() or 1
+    pool_class = ProcessPoolExecutor if executor == LoadExecutor.PROCESS else ThreadPoolExecutor
+    pending = iter(configs)
+    done = 0
+    with pool_class(max_workers=max_workers) as pool:
+        in_flight = set()
+        while True:
+            for config in pending:
+                in_flight.add(pool.submit(score_tournament, config, create_players, players_csv_path))
+                if len(in_flight) >= max_workers * 2:
+                    break
+            if not in_flight:
+                break
+            finished, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in finished:
+                report.add(future.result())
+                done += 1
+                if progress:
+                    progress(done, total, report.tournaments[-1])
+    return report
+
+def format_progress(done: int, total: int, summary: TournamentSummary) -> str:
+    status = f"ERROR {summary.error}" if summary.error else f"{summary.round_count} rounds"
+    return f"[{done}/{total}] {summary.config_path.parent.name}: {status}"
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description='Score every tournament of a season and write the season CSVs')
+    parser.add_argument('root', type=Path, nargs='?', default=Path.cwd() / 'tournaments',
+        help='folder with one tournament folder per config.toml')
+    parser.add_argument('--out', type=Path, help='folder of the season CSVs, defaults to root')
+    parser.add_argument('--players-csv', type=Path)
+    parser.add_argument('--create-players', action='store_true')
+    parser.add_argument('--executor', choices=[e.name.lower() for e in LoadExecutor], default='process')
+    parser.add_argument('--workers', type=int)
+    args = parser.parse_args(argv)
+
+    configs = discover_configs(args.root)
+    if not configs:
+        print(f"No config.toml found under {args.root}")
+        return 1
+    report = process_season(
+        configs,
+        create_players=args.create_players,
+        players_csv_path=args.players_csv,
+        executor=LoadExecutor[args.executor.upper()],
+        max_workers=args.workers,
+        progress=lambda done, total, summary: print(format_progress(done, total, summary)),
+    )
+    out = args.out or args.root
+    out.mkdir(parents=True, exist_ok=True)
+    report.write_csv(out)
+    errors = report.get_errors()
+    print(f"Wrote {out / 'season_standings.csv'} and {out / 'season_players.csv'}, {len(errors)} of {len(configs)} tournaments failed")
+    return 1 if errors else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
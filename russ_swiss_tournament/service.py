@@ -6,6 +6,11 @@ class MatchResult(Enum):
     DRAW = 3
     UNSET = 4
     WALKOVER = 5
+    BYE = 6
+
+# Opponent id of a bye. A bye is stored as a game of the player as white
+# against BYE_PLAYER_ID, with MatchResult.BYE as the result of both sides.
+BYE_PLAYER_ID = -1
 
 class Color(Enum):
     W = 1
@@ -21,6 +26,7 @@ match_result_manual_map = {
     "0,5": MatchResult.DRAW,
     "wo": MatchResult.WALKOVER,
     "walkover": MatchResult.WALKOVER,
+    "bye": MatchResult.BYE,
     None: MatchResult.UNSET,
     "": MatchResult.UNSET,
     False: MatchResult.UNSET,
@@ -32,6 +38,7 @@ match_result_score_map = {
     MatchResult.DRAW: 0.5,
     MatchResult.UNSET: None,
     MatchResult.WALKOVER: 0,
+    MatchResult.BYE: 1,
 }
 
 match_result_score_text_map = {
@@ -40,6 +47,7 @@ match_result_score_text_map = {
     MatchResult.DRAW: '½',
     MatchResult.UNSET: '~',
     MatchResult.WALKOVER: 'wo',
+    MatchResult.BYE: 'bye',
 }
 
 def pairwise(iterable):
@@ -51,3 +59,16 @@ def split_list(input_list,n):
     first_half=input_list[:n]
     sec_half=input_list[n:]
     return first_half,sec_half
+
+def parse_board_score(score: str) -> tuple[MatchResult,MatchResult]:
+    '''
+    White and black result of a board score written as white-black, such as
+    1-0, 0.5-0.5, ½-½ or 1-wo. A single - clears the result of the board.
+    '''
+    parts = score.strip().lower().replace('½', '0.5').split('-')
+    if len(parts) != 2 or any(p not in match_result_manual_map for p in parts):
+        raise ValueError(
+            f"Invalid score {score}. Write the score of white and black separated "
+            "by a dash, for example 1-0, 0-1, 0.5-0.5, 1-wo or - to clear it."
+        )
+    return match_result_manual_map[parts[0]], match_result_manual_map[parts[1]]
@@ -0,0 +1,227 @@
+'''
+Binary snapshot of a loaded tournament for fast startup.
+
+Layout: a fixed header, json metadata (config, players, round row ranges,
+tie-break results and source file fingerprints) and the results store and
+standings columns as raw arrays aligned to 8 bytes. The file is read through
+mmap, so only the column bytes are copied into the new store.
+
+A snapshot is invalid once the toml or the players csv changes. Changed
+round csv files do not invalidate it, refresh_rounds reads them on top of
+the restored rounds using the saved round file fingerprints and then
+replays the event journal. A checkpoint compacts the journal into the
+round files and rewrites the snapshot, which bounds the replay on startup.
+'''
+from pathlib import Path
+from array import array
+import json
+import mmap
+import os
+import struct
+
+from russ_swiss_tournament import tie_break
+from russ_swiss_tournament.player import Player
+from russ_swiss_tournament.round import Round
+from russ_swiss_tournament.results_store import ResultsStore
+from russ_swiss_tournament.round_loader import RoundFileTracker
+from russ_swiss_tournament.standings import StandingsTable
+from russ_swiss_tournament.tournament import Tournament, RoundSystem
+
+MAGIC = b'RUSSSNAP'
+VERSION = 1
+HEADER = struct.Struct('<8sII')
+ALIGNMENT = 8
+STORE_COLUMNS = ['round', 'white', 'black', 'white_result', 'black_result']
+
+def get_snapshot_path(toml_path: Path) -> Path:
+    return toml_path.with_suffix('.snapshot')
+
+def _align(n: int) -> int:
+    return -n % ALIGNMENT
+
+def _tie_break_results_to_json(results: dict) -> dict:
+    return {
+        method.name: None if res is None else {str(k): v for k, v in res.items()}
+        for method, res in results.items()
+    }
+
+def _tie_break_results_from_json(results: dict, method_enum) -> dict:
+    return {
+        getattr(method_enum, name): None if res is None else {int(k): v for k, v in res.items()}
+        for name, res in results.items()
+    }
+
+def _source_is_unchanged(path: str, fingerprint: list) -> bool:
+    tracker = RoundFileTracker()
+    tracker.record(Path(path), tuple(fingerprint))
+    try:
+        return not tracker.has_changed(Path(path), tracker.fingerprint(Path(path)))
+    except FileNotFoundError:
+        return False
+
+def write_snapshot(t: Tournament, path: Path, toml_path: Path, db = None):
+    '''Writes t to path atomically, toml_path and the db players csv are used for invalidation'''
+    table = t._get_standings_table()
+    version = t.get_results_version()
+    store = ResultsStore()
+    round_rows = []
+    for r in t.rounds:
+        start = len(store)
+        for name, column in zip(STORE_COLUMNS[1:], r.store.get_columns(r.rows)):
+            getattr(store, name).extend(column)
+        store.round.extend([r.index] * len(r.rows))
+        round_rows.append([r.index, start, len(store)])
+
+    standings_ids = list(table.totals[-1]) if table.totals else [p.id for p in t.players]
+    columns = {name: getattr(store, name) for name in STORE_COLUMNS}
+    columns['standings'] = array('d', (
+        totals.get(pid, 0) for totals in table.totals for pid in standings_ids
+    ))
+    columns['unset_counts'] = array('i', table.unset_counts)
+
+    tracker = RoundFileTracker()
+    sources = {str(toml_path): tracker.fingerprint(toml_path)}
+    if db is not None and Path(db.players_csv_path).exists():
+        sources[str(db.players_csv_path)] = tracker.fingerprint(Path(db.players_csv_path))
+    metadata = {
+        'round_count': t.round_count,
+        'round_system': t.round_system.name,
+        'year': t.year,
+        'count': t.count,
+        'folder': None if t.folder is None else str(t.folder),
+        'round_folder': None if t.round_folder is None else str(t.round_folder),
+        'players': [[p.id, p.first_name, p.last_name, p.active] for p in t.players],
+        'rounds': round_rows,
+        'standings_ids': standings_ids,
+        'tie_break_results_swiss': _tie_break_results_to_json(t.tie_break_results_swiss),
+        'tie_break_results_round_robin': _tie_break_results_to_json(t.tie_break_results_round_robin),
+        'tie_break_backends': {
+            rs.name: backend.name for rs, (v, backend) in t._tie_break_versions.items() if v == version
+        },
+        'sources': sources,
+        'round_files': {str(k): v for k, v in t.round_file_tracker.files.items()},
+        'columns': [],
+    }
+    offset = 0
+    for name, column in columns.items():
+        metadata['columns'].append([name, column.typecode, offset, len(column)])
+        nbytes = len(column) * column.itemsize
+        offset += nbytes + _align(nbytes)
+    encoded = json.dumps(metadata).encode()
+    data_start = HEADER.size + len(encoded)
+    data_start += _align(data_start)
+
+    tmp_path = path.with_name(path.name + '.tmp')
+    with open(tmp_path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, VERSION, len(encoded)))
+        f.write(encoded)
+        f.write(b'\0' * (data_start - HEADER.size - len(encoded)))
+        for column in columns.values():
+            column.tofile(f)
+            f.write(b'\0' * _align(len(column) * column.itemsize))
+    os.replace(tmp_path, path)
+
+def read_snapshot(path: Path, toml_path: Path, db = None) -> Tournament | None:
+    '''
+    Tournament stored in the snapshot, or None when there is no valid snapshot
+    for toml_path. Round csv files changed since the snapshot are read again.
+    '''
+    t = _read_snapshot(path, toml_path, db)
+    if t is not None and t.round_folder is not None and t.round_folder.exists():
+        t.refresh_rounds()
+    return t
+
+def _read_snapshot(path: Path, toml_path: Path, db) -> Tournament | None:
+    if not path.exists() or path.stat().st_size < HEADER.size:
+        return None
+    with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        magic, version, metadata_length = HEADER.unpack_from(mm)
+        if magic != MAGIC or version != VERSION:
+            return None
+        metadata = json.loads(mm[HEADER.size:HEADER.size + metadata_length])
+        sources = metadata['sources']
+        if str(toml_path) not in sources:
+            return None
+        if db is not None and str(db.players_csv_path) not in sources:
+            return None
+        if not all(_source_is_unchanged(p, fp) for p, fp in sources.items()):
+            return None
+        data_start = HEADER.size + metadata_length
+        data_start += _align(data_start)
+        columns = {}
+        for name, typecode, offset, count in metadata['columns']:
+            column = array(typecode)
+            start = data_start + offset
+            column.frombytes(mm[start:start + count * column.itemsize])
+            columns[name] = column
+
+    players = [Player(*p) for p in metadata['players']]
+    store = ResultsStore()
+    for name in STORE_COLUMNS:
+        setattr(store, name, columns[name])
+    rounds = [Round.from_store(store, range(start, stop), index) for index, start, stop in metadata['rounds']]
+    t = Tournament(
+        players = players,
+        rounds = rounds,
+        round_count = metadata['round_count'],
+        round_system = getattr(RoundSystem, metadata['round_system']),
+        tie_break_results_swiss = _tie_break_results_from_json(
+            metadata['tie_break_results_swiss'], tie_break.TieBreakMethodSwiss,
+        ),
+        tie_break_results_round_robin = _tie_break_results_from_json(
+            metadata['tie_break_results_round_robin'], tie_break.TieBreakMethodRoundRobin,
+        ),
+        year = metadata['year'],
+        count = metadata['count'],
+        folder = None if metadata['folder'] is None else Path(metadata['folder']),
+        round_folder = None if metadata['round_folder'] is None else Path(metadata['round_folder']),
+    )
+
+    standings_ids = metadata['standings_ids']
+    standings = columns['standings']
+    n = len(standings_ids)
+    totals = [dict(zip(standings_ids, standings[i:i + n])) for i in range(0, len(standings), n)]
+    t._standings_table = StandingsTable.from_totals(
+        [p.id for p in players], rounds, totals, columns['unset_counts'],
+    )
+    version = t.get_results_version()
+    for rs, backend in metadata['tie_break_backends'].items():
+        t._tie_break_versions[getattr(RoundSystem, rs)] = (version, getattr(tie_break.TieBreakBackend, backend))
+    t.round_file_tracker.files = {Path(k): tuple(v) for k, v in metadata['round_files'].items()}
+    t.db = db
+    return t
+
+def load_tournament(
+        toml_path: Path,
+        create_players: bool = False,
+        db = None,
+        snapshot_path: Path | None = None,
+    ) -> Tournament:
+    '''
+    Loads the tournament from its snapshot when it is valid, otherwise from
+    the toml and round csv files. The snapshot is rewritten when anything
+    was read from the source files.
+    '''
+    snapshot_path = snapshot_path or get_snapshot_path(toml_path)
+    t = _read_snapshot(snapshot_path, toml_path, db)
+    changed = True
+    if t is not None:
+        changed = t.round_folder is not None and t.round_folder.exists() and t.refresh_rounds()
+    else:
+        if db is not None and not db.has_players():
+            db.read_players()
+        t = Tournament.from_toml(toml_path, create_players=create_players, db=db)
+    if changed:
+        write_snapshot(t, snapshot_path, toml_path, db)
+    t.on_journal_compact = lambda t: checkpoint(t, toml_path, db, snapshot_path)
+    return t
+
+def checkpoint(t: Tournament, toml_path: Path, db = None, snapshot_path: Path | None = None) -> list[int]:
+    '''
+    Compacts the journal of t into the round csv files and writes a new
+    snapshot, so the next load only replays the events made after it.
+    Returns the indexes of the written rounds.
+    '''
+    written = t.compact_journal(db)
+    write_snapshot(t, snapshot_path or get_snapshot_path(toml_path), toml_path, db)
+    return written
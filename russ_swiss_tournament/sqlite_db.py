@@ -0,0 +1,214 @@
+'''
+SQLite storage backend with the same player interface as db.Database.
+
+Players, tournaments, rounds and games are kept in indexed tables, so one
+database file can serve many tournaments and years while only the requested
+rows are loaded. Standings are aggregated by SQLite.
+'''
+from pathlib import Path
+import sqlite3
+
+from russ_swiss_tournament.player import Player
+from russ_swiss_tournament.db import read_players_csv
+from russ_swiss_tournament.round import Round
+from russ_swiss_tournament.results_store import ResultsStore, RESULTS_BY_CODE
+from russ_swiss_tournament.service import MatchResult, match_result_score_map
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS player (
+    id INTEGER PRIMARY KEY,
+    first_name TEXT NOT NULL,
+    last_name TEXT NOT NULL,
+    active INTEGER NOT NULL DEFAULT 1
+);
+CREATE INDEX IF NOT EXISTS player_name ON player (last_name, first_name);
+CREATE TABLE IF NOT EXISTS tournament (
+    id INTEGER PRIMARY KEY,
+    year INTEGER NOT NULL,
+    count INTEGER NOT NULL,
+    round_count INTEGER,
+    round_system TEXT,
+    UNIQUE (year, count)
+);
+CREATE TABLE IF NOT EXISTS tournament_player (
+    tournament_id INTEGER NOT NULL REFERENCES tournament (id) ON DELETE CASCADE,
+    player_id INTEGER NOT NULL,
+    position INTEGER NOT NULL,
+    PRIMARY KEY (tournament_id, player_id)
+);
+CREATE TABLE IF NOT EXISTS round (
+    id INTEGER PRIMARY KEY,
+    tournament_id INTEGER NOT NULL REFERENCES tournament (id) ON DELETE CASCADE,
+    round_index INTEGER NOT NULL,
+    UNIQUE (tournament_id, round_index)
+);
+CREATE TABLE IF NOT EXISTS game (
+    id INTEGER PRIMARY KEY,
+    round_id INTEGER NOT NULL REFERENCES round (id) ON DELETE CASCADE,
+    board INTEGER NOT NULL,
+    white_id INTEGER NOT NULL,
+    black_id INTEGER NOT NULL,
+    white_result INTEGER NOT NULL,
+    black_result INTEGER NOT NULL,
+    UNIQUE (round_id, board)
+);
+CREATE INDEX IF NOT EXISTS game_white ON game (white_id);
+CREATE INDEX IF NOT EXISTS game_black ON game (black_id);
+'''
+
+# Same scores as the standings table, unset counts as zero
+SCORE_SQL = 'CASE {column} ' + ' '.join(
+    f"WHEN {r.value} THEN {score}" for r, score in match_result_score_map.items() if score
+) + ' ELSE 0 END'
+
+class SqliteDatabase:
+    '''
+    Drop-in replacement of db.Database. read_players imports the players csv
+    into the player table, get_player_by_id is an indexed query.
+    '''
+    def __init__(
+            self,
+            path: Path | str = ':memory:',
+            players_csv_path = Path().cwd() / 'player.csv',
+        ):
+        self.path = path
+        self.players_csv_path = players_csv_path
+        self.connection = sqlite3.connect(path)
+        self.connection.execute('PRAGMA foreign_keys = ON')
+        self.connection.executescript(SCHEMA)
+
+    def close(self):
+        self.connection.close()
+
+    def read_players(self):
+        '''Imports or updates every player of the players csv'''
+        self.add_players(read_players_csv(self.players_csv_path))
+
+    def has_players(self) -> bool:
+        '''True once players were imported, the player table outlives the process'''
+        return self.connection.execute('SELECT EXISTS (SELECT 1 FROM player)').fetchone()[0] == 1
+
+    def add_players(self, players):
+        with self.connection:
+            self.connection.executemany(
+                'INSERT INTO player (id, first_name, last_name, active) VALUES (?, ?, ?, ?) '
+                'ON CONFLICT (id) DO UPDATE SET first_name = excluded.first_name, '
+                'last_name = excluded.last_name, active = excluded.active',
+                ((p.id, p.first_name, p.last_name, int(p.active)) for p in players),
+            )
+
+    def get_player_by_id(self, id) -> Player:
+        row = self.connection.execute(
+            'SELECT id, first_name, last_name, active FROM player WHERE id = ?', (id,)
+        ).fetchone()
+        if row is None:
+            raise IndexError(f"No player was found in the database with id {id}")
+        return Player(row[0], row[1], row[2], bool(row[3]))
+
+    def get_players_by_ids(self, ids: list[int]) -> list[Player]:
+        '''Players in the order of ids with one query'''
+        rows = self.connection.execute(
+            'SELECT id, first_name, last_name, active FROM player '
+            'WHERE id IN (SELECT value FROM json_each(?))',
+            (str(list(ids)),),
+        ).fetchall()
+        by_id = {r[0]: Player(r[0], r[1], r[2], bool(r[3])) for r in rows}
+        missing = [i for i in ids if i not in by_id]
+        if missing:
+            raise IndexError(f"No players were found in the database with ids {missing}")
+        return [by_id[i] for i in ids]
+
+    def _get_tournament_id(self, year: int, count: int) -> int:
+        row = self.connection.execute(
+            'SELECT id FROM tournament WHERE year = ? AND count = ?', (year, count)
+        ).fetchone()
+        if row is None:
+            raise IndexError(f"No tournament was found in the database for {year} number {count}")
+        return row[0]
+
+    def import_tournament(self, t):
+        '''
+        Stores the players and rounds of t, replacing any earlier import of the
+        same year and count. Games are inserted in one batch per round.
+        '''
+        t.get_results_version()  # binds every round to the results store
+        with self.connection:
+            self.connection.execute(
+                'DELETE FROM tournament WHERE year = ? AND count = ?', (t.year, t.count)
+            )
+            tournament_id = self.connection.execute(
+                'INSERT INTO tournament (year, count, round_count, round_system) VALUES (?, ?, ?, ?)',
+                (t.year, t.count, t.round_count, t.round_system.name),
+            ).lastrowid
+            self.connection.executemany(
+                'INSERT OR IGNORE INTO player (id, first_name, last_name, active) VALUES (?, ?, ?, ?)',
+                ((p.id, p.first_name, p.last_name, int(p.active)) for p in t.players),
+            )
+            self.connection.executemany(
+                'INSERT INTO tournament_player (tournament_id, player_id, position) VALUES (?, ?, ?)',
+                ((tournament_id, p.id, i) for i, p in enumerate(t.players)),
+            )
+            for r in t.rounds:
+                round_id = self.connection.execute(
+                    'INSERT INTO round (tournament_id, round_index) VALUES (?, ?)',
+                    (tournament_id, r.index),
+                ).lastrowid
+                white, black, white_res, black_res = r.store.get_columns(r.rows)
+                self.connection.executemany(
+                    'INSERT INTO game (round_id, board, white_id, black_id, white_result, black_result) '
+                    'VALUES (?, ?, ?, ?, ?, ?)',
+                    zip([round_id] * len(white), range(1, len(white) + 1), white, black, white_res, black_res),
+                )
+
+    def get_rounds(self, year: int, count: int, store: ResultsStore | None = None) -> list[Round]:
+        '''Rounds of a tournament as views over a results store'''
+        tournament_id = self._get_tournament_id(year, count)
+        store = store or ResultsStore()
+        rows = self.connection.execute(
+            'SELECT r.round_index, g.white_id, g.black_id, g.white_result, g.black_result '
+            'FROM round r LEFT JOIN game g ON g.round_id = r.id '
+            'WHERE r.tournament_id = ? ORDER BY r.round_index, g.board',
+            (tournament_id,),
+        )
+        rounds = []
+        start = len(store)
+        current = None
+        for round_index, white, black, white_res, black_res in rows:
+            if round_index != current:
+                if current is not None:
+                    rounds.append(Round.from_store(store, range(start, len(store)), current))
+                current = round_index
+                start = len(store)
+            if white is not None:
+                store.append(round_index, white, black, RESULTS_BY_CODE[white_res], RESULTS_BY_CODE[black_res])
+        if current is not None:
+            rounds.append(Round.from_store(store, range(start, len(store)), current))
+        return rounds
+
+    def get_last_complete_round_index(self, year: int, count: int) -> int | None:
+        return self.connection.execute(
+            'SELECT MAX(r.round_index) FROM round r WHERE r.tournament_id = ? AND NOT EXISTS ('
+            'SELECT 1 FROM game g WHERE g.round_id = r.id AND (g.white_result = ? OR g.black_result = ?))',
+            (self._get_tournament_id(year, count), MatchResult.UNSET.value, MatchResult.UNSET.value),
+        ).fetchone()[0]
+
+    def get_standings(self, year: int, count: int, until: int | None = None) -> dict[int,float]:
+        '''
+        Scores of every tournament player after round until, all rounds by
+        default. Sorted descending by score, ties keep the starting rank order.
+        '''
+        tournament_id = self._get_tournament_id(year, count)
+        rows = self.connection.execute(
+            'SELECT tp.player_id, COALESCE(SUM(s.score), 0) AS total '
+            'FROM tournament_player tp LEFT JOIN ('
+            f'SELECT g.white_id AS player_id, {SCORE_SQL.format(column="g.white_result")} AS score '
+            'FROM game g JOIN round r ON g.round_id = r.id WHERE r.tournament_id = ?1 AND r.round_index <= ?2 '
+            'UNION ALL '
+            f'SELECT g.black_id, {SCORE_SQL.format(column="g.black_result")} '
+            'FROM game g JOIN round r ON g.round_id = r.id WHERE r.tournament_id = ?1 AND r.round_index <= ?2'
+            ') s ON s.player_id = tp.player_id '
+            'WHERE tp.tournament_id = ?1 '
+            'GROUP BY tp.player_id ORDER BY total DESC, tp.position',
+            (tournament_id, until if until is not None else 2**31),
+        )
+        return dict(rows)
@@ -0,0 +1,100 @@
+from russ_swiss_tournament.service import BYE_PLAYER_ID, MatchResult, match_result_score_map
+
+def _score(res: MatchResult) -> float:
+    return match_result_score_map[res] or 0
+
+class StandingsTable:
+    '''
+    Incrementally maintained score table of a tournament.
+
+    totals[i] holds the total score of every player after the round at
+    position i, so standings until any round are a dictionary read. Result
+    changes of registered rounds are pushed to on_result_change, which only
+    updates the affected player in the affected and later snapshots.
+    '''
+    def __init__(self, player_ids: list[int]):
+        self.player_ids = list(player_ids)
+        self.rounds = []
+        self.totals: list[dict[int,float]] = []
+        self.unset_counts: list[int] = []
+        self._sorted: list[dict[int,float] | None] = []
+
+    @classmethod
+    def from_totals(
+            cls,
+            player_ids: list[int],
+            rounds: list,
+            totals: list[dict[int,float]],
+            unset_counts: list[int],
+        ):
+        '''Table of already calculated rounds, e.g. restored from a snapshot'''
+        table = cls(player_ids)
+        table.rounds = list(rounds)
+        table.totals = totals
+        table.unset_counts = list(unset_counts)
+        table._sorted = [None] * len(rounds)
+        return table
+
+    def add_player(self, player_id: int):
+        '''Late entry, the player starts from zero in every snapshot'''
+        self.player_ids.append(player_id)
+        for totals in self.totals:
+            totals.setdefault(player_id, 0)
+        for i in range(len(self._sorted)):
+            self._sorted[i] = None
+
+    def add_round(self, round):
+        if self.totals:
+            totals = self.totals[-1].copy()
+        else:
+            totals = dict.fromkeys(self.player_ids, 0)
+        unset_count = 0
+        for white, black, white_res, black_res in round.iter_games():
+            totals[white] = totals.get(white, 0) + _score(white_res)
+            if black != BYE_PLAYER_ID:
+                totals[black] = totals.get(black, 0) + _score(black_res)
+            unset_count += (white_res == MatchResult.UNSET) + (black_res == MatchResult.UNSET)
+        self.rounds.append(round)
+        self.totals.append(totals)
+        self.unset_counts.append(unset_count)
+        self._sorted.append(None)
+
+    def truncate(self, pos: int):
+        '''Drops the rounds from position pos onwards so they can be registered again'''
+        del self.rounds[pos:]
+        del self.totals[pos:]
+        del self.unset_counts[pos:]
+        del self._sorted[pos:]
+
+    def on_result_change(self, pos: int, player_id: int | None, old: MatchResult, new: MatchResult):
+        if player_id is None:
+            # The players of a game were replaced
+            self.truncate(pos)
+            return
+        delta = _score(new) - _score(old)
+        if delta and player_id != BYE_PLAYER_ID:
+            for totals in self.totals[pos:]:
+                totals[player_id] = totals.get(player_id, 0) + delta
+            for i in range(pos, len(self._sorted)):
+                self._sorted[i] = None
+        if old == MatchResult.UNSET:
+            self.unset_counts[pos] -= 1
+        if new == MatchResult.UNSET:
+            self.unset_counts[pos] += 1
+
+    def get_standings(self, count: int) -> dict[int,float]:
+        '''Standings after the first count rounds, sorted descending by score'''
+        if count == 0:
+            return dict.fromkeys(self.player_ids, 0)
+        pos = count - 1
+        if self._sorted[pos] is None:
+            self._sorted[pos] = {
+                k: v for k, v in sorted(self.totals[pos].items(), key=lambda item: item[1], reverse=True)
+            }
+        return dict(self._sorted[pos])
+
+    def get_last_complete_round_index(self) -> int | None:
+        for pos in range(len(self.rounds) - 1, -1, -1):
+            if self.unset_counts[pos] == 0:
+                return self.rounds[pos].index
+        return None
@@ -2,7 +2,7 @@ from enum import Enum
 
 from russ_swiss_tournament.round import Round
 from russ_swiss_tournament.matchup import PlayerMatch
-from russ_swiss_tournament.service import MatchResult, Color
+from russ_swiss_tournament.service import BYE_PLAYER_ID, MatchResult, Color
 
 class TieBreakMethodSwiss(Enum):
     MODIFIED_MEDIAN = 1
@@ -12,6 +12,14 @@ class TieBreakMethodRoundRobin(Enum):
     SONNEBORN_BERGER = 1
     KOYA = 2
 
+class TieBreakBackend(Enum):
+    '''NUMPY uses the array based functions in tie_break_numpy and requires numpy'''
+    PYTHON = 1
+    NUMPY = 2
+
+# Model score of a round without a game, e.g. before a late entry or after a withdrawal
+MISSED_ROUND_MODEL_SCORE = 0.5
+
 def modified_median_solkoff_model_scores(rounds, player_ids):
     res_valuation = {
         MatchResult.WIN: 1,
@@ -19,10 +27,19 @@ def modified_median_solkoff_model_scores(rounds, player_ids):
         MatchResult.DRAW: 0.5,
         MatchResult.UNSET: 0,
         MatchResult.WALKOVER: 0.5,
+        # Unplayed like a walkover win
+        MatchResult.BYE: 0.5,
     }
     pms = dict(zip(list(player_ids), [0 for x in range(len(player_ids))]))
     for r in rounds:
+        missed = set(pms)
         for m in r.matchups:
+            white_id, black_id = m.get_player_ids()
+            missed.discard(white_id)
+            missed.discard(black_id)
+            if black_id == BYE_PLAYER_ID:
+                pms[white_id] += res_valuation[MatchResult.BYE]
+                continue
             winner_loser_colors, is_walkover = m.get_winner_loser_colors()
             if winner_loser_colors:
                 winner_color, loser_color = winner_loser_colors
@@ -37,13 +54,16 @@ def modified_median_solkoff_model_scores(rounds, player_ids):
             else:
                 for color, player_match in m.res.items():
                     pms[player_match.player.id] += res_valuation[player_match.res]
+        for p in missed:
+            pms[p] += MISSED_ROUND_MODEL_SCORE
 
     return pms
 
 def calc_modified_median_solkoff(rounds:list[Round], player_ids: set, opponents: dict):
     '''
     First calculate model scores for each player.
-    Solkoff is actually Modified Median without filtering
+    Solkoff is actually Modified Median without filtering. Players that missed
+    rounds only drop as many opponent scores as they have opponents.
     '''
     player_model_scores = modified_median_solkoff_model_scores(rounds, player_ids)
 
@@ -53,7 +73,7 @@ def calc_modified_median_solkoff(rounds:list[Round], player_ids: set, opponents:
         for opponent in ops:
             player_total_gains[player].append(player_model_scores[opponent])
 
-    nine_or_more_rounds = len(rounds) > 8
+    cut = 2 if len(rounds) > 8 else 1
     modified_median = dict(zip(list(player_ids), [0 for i in range(len(player_ids))]))
     solkoff = dict(zip(list(player_ids), [0 for i in range(len(player_ids))]))
     tournament_max_score = len(rounds)
@@ -61,21 +81,11 @@ def calc_modified_median_solkoff(rounds:list[Round], player_ids: set, opponents:
     for player, scores in player_total_gains.items():
         player_score = player_model_scores[player]
 
-        mod_med_scores = scores.copy()
-        if player_score > tournament_half_score:
-            mod_med_scores.pop(mod_med_scores.index(min(mod_med_scores)))
-            if nine_or_more_rounds:
-                mod_med_scores.pop(mod_med_scores.index(min(mod_med_scores)))
-        elif player_score < tournament_half_score:
-            mod_med_scores.pop(mod_med_scores.index(max(mod_med_scores)))
-            if nine_or_more_rounds:
-                mod_med_scores.pop(mod_med_scores.index(max(mod_med_scores)))
-        else:
-            mod_med_scores.pop(mod_med_scores.index(max(mod_med_scores)))
-            mod_med_scores.pop(mod_med_scores.index(min(mod_med_scores)))
-            if nine_or_more_rounds:
-                mod_med_scores.pop(mod_med_scores.index(max(mod_med_scores)))
-                mod_med_scores.pop(mod_med_scores.index(min(mod_med_scores)))
+        drop_low = 0 if player_score < tournament_half_score else cut
+        drop_high = 0 if player_score > tournament_half_score else cut
+        drop_low = min(drop_low, len(scores))
+        drop_high = min(drop_high, len(scores) - drop_low)
+        mod_med_scores = sorted(scores)[drop_low:len(scores) - drop_high]
 
         modified_median[player] = sum(mod_med_scores)
         solkoff[player] = sum(scores)
@@ -0,0 +1,192 @@
+'''
+Array based tie-break backend.
+
+The tournament is represented as dense player x round arrays of opponent
+index, result and color, which lets the tie-breaks of the whole field be
+calculated with array operations. Results are identical to the functions in
+the tie_break module. Requires the optional numpy dependency.
+'''
+import numpy as np
+
+from russ_swiss_tournament.service import BYE_PLAYER_ID, MatchResult, Color
+
+NO_OPPONENT = -1
+
+def _value_table(values: dict[MatchResult,float]) -> np.ndarray:
+    table = np.zeros(max(r.value for r in MatchResult) + 1)
+    for r, v in values.items():
+        table[r.value] = v
+    return table
+
+# Same valuations as tie_break.modified_median_solkoff_model_scores
+MODEL_VALUATION = _value_table({
+    MatchResult.WIN: 1,
+    MatchResult.LOSS: 0,
+    MatchResult.DRAW: 0.5,
+    MatchResult.UNSET: 0,
+    MatchResult.WALKOVER: 0.5,
+    MatchResult.BYE: 0.5,
+})
+# Same as tie_break.MISSED_ROUND_MODEL_SCORE
+MISSED_ROUND_MODEL_SCORE = 0.5
+
+# Same scores as match_result_score_map with unset counted as zero
+GAME_SCORE = _value_table({
+    MatchResult.WIN: 1,
+    MatchResult.LOSS: 0,
+    MatchResult.DRAW: 0.5,
+    MatchResult.UNSET: 0,
+    MatchResult.WALKOVER: 0,
+    MatchResult.BYE: 1,
+})
+
+def build_result_arrays(rounds, player_ids) -> (np.ndarray, np.ndarray, np.ndarray):
+    '''
+    Returns opponent index, result and color arrays of shape (players, rounds).
+
+    Opponent index refers to the position of the opponent in player_ids and is
+    NO_OPPONENT when the player did not play. Results hold MatchResult values and
+    colors hold Color values, or 0 when the player did not play. A bye only
+    sets the result, the player has no opponent or color in that round.
+    '''
+    index = {pid: i for i, pid in enumerate(player_ids)}
+    shape = (len(player_ids), len(rounds))
+    opponents = np.full(shape, NO_OPPONENT, dtype=np.int64)
+    results = np.full(shape, MatchResult.UNSET.value, dtype=np.int8)
+    colors = np.zeros(shape, dtype=np.int8)
+    sorted_ids = np.array(sorted(index), dtype=np.int64)
+    positions = np.array([index[pid] for pid in sorted_ids], dtype=np.int64)
+    for r, round in enumerate(rounds):
+        if round.store is not None:
+            columns = round.store.get_columns(round.rows)
+            white_ids, black_ids = (np.frombuffer(c, dtype=np.int64) for c in columns[:2])
+            white_res, black_res = (np.frombuffer(c, dtype=np.int8) for c in columns[2:])
+        else:
+            games = list(round.iter_games())
+            white_ids = np.array([g[0] for g in games], dtype=np.int64)
+            black_ids = np.array([g[1] for g in games], dtype=np.int64)
+            white_res = np.array([g[2].value for g in games], dtype=np.int8)
+            black_res = np.array([g[3].value for g in games], dtype=np.int8)
+        bye = black_ids == BYE_PLAYER_ID
+        if np.any(bye):
+            results[_positions_of(white_ids[bye], sorted_ids, positions), r] = white_res[bye]
+            played = ~bye
+            white_ids, black_ids = white_ids[played], black_ids[played]
+            white_res, black_res = white_res[played], black_res[played]
+        w = _positions_of(white_ids, sorted_ids, positions)
+        b = _positions_of(black_ids, sorted_ids, positions)
+        opponents[w, r] = b
+        opponents[b, r] = w
+        results[w, r] = white_res
+        results[b, r] = black_res
+        colors[w, r] = Color.W.value
+        colors[b, r] = Color.B.value
+    return opponents, results, colors
+
+def _positions_of(ids: np.ndarray, sorted_ids: np.ndarray, positions: np.ndarray) -> np.ndarray:
+    '''Maps player ids to their position in player_ids'''
+    if not len(ids):
+        return ids
+    found = np.minimum(np.searchsorted(sorted_ids, ids), len(sorted_ids) - 1)
+    unknown = sorted_ids[found] != ids
+    if np.any(unknown):
+        raise KeyError(f"Players {ids[unknown].tolist()} are not part of the tournament")
+    return positions[found]
+
+def _opponent_values(values: np.ndarray, opponents: np.ndarray) -> (np.ndarray, np.ndarray):
+    '''Looks up the value of the opponent in the same round, returns values and played mask'''
+    played = opponents != NO_OPPONENT
+    safe_opponents = np.where(played, opponents, 0)
+    return values[safe_opponents, np.arange(opponents.shape[1])], played
+
+def model_scores(opponents: np.ndarray, results: np.ndarray) -> np.ndarray:
+    opponent_results, played = _opponent_values(results, opponents)
+    scores = MODEL_VALUATION[results]
+    # Winner of a walkover is valued as a walkover and the absent player as a loss
+    walkover_winner = (results == MatchResult.WIN.value) & (opponent_results == MatchResult.WALKOVER.value)
+    walkover_loser = (results == MatchResult.WALKOVER.value) & (opponent_results == MatchResult.WIN.value)
+    scores[walkover_winner] = MODEL_VALUATION[MatchResult.WALKOVER.value]
+    scores[walkover_loser] = MODEL_VALUATION[MatchResult.LOSS.value]
+    # Rounds without a game or a bye were missed by the player
+    scores[~played & (results == MatchResult.UNSET.value)] = MISSED_ROUND_MODEL_SCORE
+    return scores.sum(axis=1)
+
+def calc_modified_median_solkoff(
+        opponents: np.ndarray,
+        results: np.ndarray,
+        score_rounds: int,
+        player_ids: list[int],
+    ) -> (dict[int,float], dict[int,float]):
+    '''
+    Array version of tie_break.calc_modified_median_solkoff.
+
+    Model scores are calculated from the first score_rounds rounds while the
+    opponents of all rounds are included, like in the tournament level call.
+    '''
+    scores = model_scores(opponents[:, :score_rounds], results[:, :score_rounds])
+    played = opponents != NO_OPPONENT
+    gains = np.where(played, scores[np.where(played, opponents, 0)], np.inf)
+    gains = np.sort(gains, axis=1)
+    gains[np.isinf(gains)] = 0
+    counts = played.sum(axis=1)
+    # cumulative[p, k] is the sum of the k lowest opponent scores
+    cumulative = np.zeros((gains.shape[0], gains.shape[1] + 1))
+    np.cumsum(gains, axis=1, out=cumulative[:, 1:])
+
+    cut = 2 if score_rounds > 8 else 1
+    half_score = score_rounds / 2
+    drop_low = np.where(scores < half_score, 0, cut)
+    drop_high = np.where(scores > half_score, 0, cut)
+    # Players that missed rounds only drop as many scores as they have opponents
+    drop_low = np.minimum(drop_low, counts)
+    drop_high = np.minimum(drop_high, counts - drop_low)
+    rows = np.arange(gains.shape[0])
+    solkoff = cumulative[rows, counts]
+    modified_median = cumulative[rows, counts - drop_high] - cumulative[rows, drop_low]
+    return dict(zip(player_ids, modified_median.tolist())), dict(zip(player_ids, solkoff.tolist()))
+
+def _last_meeting_scores(opponents: np.ndarray, game_scores: np.ndarray) -> np.ndarray:
+    '''
+    For every game, the score of the last game between the same two players.
+    Matches the per opponent score dict of Tournament.get_player_defeated_drawn.
+    '''
+    res = np.zeros(opponents.shape)
+    rows, cols = np.nonzero(opponents != NO_OPPONENT)
+    if not len(rows):
+        return res
+    keys = rows * opponents.shape[0] + opponents[rows, cols]
+    order = np.lexsort((cols, keys))
+    sorted_keys = keys[order]
+    new_group = np.r_[True, sorted_keys[1:] != sorted_keys[:-1]]
+    last_in_group = np.r_[new_group[1:], True]
+    group = np.cumsum(new_group) - 1
+    last_positions = order[last_in_group]
+    last_scores = game_scores[rows[last_positions], cols[last_positions]]
+    res[rows[order], cols[order]] = last_scores[group]
+    return res
+
+def calc_sonne_koya(
+        opponents: np.ndarray,
+        results: np.ndarray,
+        standings: np.ndarray,
+        round_count: int,
+        player_ids: list[int],
+    ) -> (dict[int,float], dict[int,float]):
+    '''
+    Array version of tie_break.calc_sonne_koya.
+
+    standings holds the score of every player in player_ids order.
+    '''
+    half_score = round_count / 2
+    opponent_standings = standings[np.where(opponents != NO_OPPONENT, opponents, 0)]
+    played = opponents != NO_OPPONENT
+    won = played & (results == MatchResult.WIN.value)
+    drawn = played & (results == MatchResult.DRAW.value)
+    sonne = (
+        np.where(won, opponent_standings, 0).sum(axis=1)
+        + np.where(drawn, opponent_standings * 0.5, 0).sum(axis=1)
+    )
+    last_scores = _last_meeting_scores(opponents, GAME_SCORE[results])
+    good_opponent = (won | drawn) & (opponent_standings >= half_score)
+    koya = np.where(good_opponent, last_scores, 0).sum(axis=1)
+    return dict(zip(player_ids, sonne.tolist())), dict(zip(player_ids, koya.tolist()))
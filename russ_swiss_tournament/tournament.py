@@ -1,19 +1,31 @@
 import tomli
+import csv
+import io
+import os
 from pathlib import Path
-from collections import Counter
 import pprint
 from enum import Enum
+from typing import Callable
 
-from russ_swiss_tournament.round import Round, match_result_score_map
+from russ_swiss_tournament.round import Round, ROUND_CSV_HEADER, match_result_score_map
 from russ_swiss_tournament.player import Player
-from russ_swiss_tournament.matchup import Matchup, PlayerMatch
+from russ_swiss_tournament.player_registry import PlayerRegistry
+from russ_swiss_tournament.matchup import Matchup, PlayerMatch, create_bye_matchup
 from russ_swiss_tournament import tie_break
-from russ_swiss_tournament.service import MatchResult, Color, pairwise, split_list
+from russ_swiss_tournament import round_loader
+from russ_swiss_tournament.standings import StandingsTable
+from russ_swiss_tournament.pairing_index import PairingIndex
+from russ_swiss_tournament.results_store import ResultsStore, find_round_position
+from russ_swiss_tournament.journal import EventJournal, EventType, JOURNAL_NAME, PLAYER_EVENTS
+from russ_swiss_tournament.service import BYE_PLAYER_ID, MatchResult, Color, pairwise, split_list
 
 class RoundSystem(Enum):
     SWISS = 1
     BERGER = 2
 
+# Journal events after which the journal is compacted into the round files
+JOURNAL_COMPACT_INTERVAL = 500
+
 round_system_tie_break_map = {
     RoundSystem.SWISS: tie_break.TieBreakMethodSwiss,
     RoundSystem.BERGER: tie_break.TieBreakMethodRoundRobin,
@@ -35,6 +47,19 @@ class Tournament:
             folder: Path | None = None,
             round_folder: Path | None = None,
         ):
+        self._results_version = 0
+        self._tie_break_versions: dict[RoundSystem,tuple[int,tie_break.TieBreakBackend]] = {}
+        self.round_file_tracker = round_loader.RoundFileTracker()
+        # Round index to the csv file the round was last read from or written to
+        self._round_file_paths: dict[int,Path] = {}
+        self._journal: EventJournal | None = None
+        self._journal_replayed = False
+        self._replaying = False
+        self.journal_compact_interval = JOURNAL_COMPACT_INTERVAL
+        # Called instead of compact_journal by checkpoint_journal, see snapshot.checkpoint
+        self.on_journal_compact: Callable[['Tournament'], list[int]] | None = None
+        # Database the players were read from, compacting writes their names to the round files
+        self.db = None
         self.players = players
         self.rounds = rounds
         self.round_count = round_count
@@ -49,6 +74,65 @@ class Tournament:
     def __repr__(self):
         return pprint.pformat([[m.res for m in r.matchups] for r in self.rounds], indent=4)
 
+    @property
+    def players(self) -> list[Player]:
+        return self._players
+
+    @players.setter
+    def players(self, value: list[Player]):
+        self._players = value
+        self.player_registry = PlayerRegistry(value)
+        self._results_version += 1
+
+    def get_active_players(self) -> list[Player]:
+        '''Players taking part in the pairing of the next round'''
+        return [p for p in self.players if p.active]
+
+    def add_player(self, player: Player):
+        '''
+        Late entry of player, or the return of a withdrawn player. The player is
+        paired from the next round on and registered with the standings and
+        pairing index without rebuilding them. Rounds without a game of the
+        player count as missed rounds in the tie-breaks.
+        '''
+        existing = self.player_registry.get(player.id)
+        if existing is not None and existing.active:
+            raise ValueError(f"Player {player.id} is already part of the tournament")
+        self._write_event(
+            EventType.ADD_PLAYER,
+            player_id = player.id,
+            first_name = player.first_name,
+            last_name = player.last_name,
+        )
+        if existing is not None:
+            existing.active = True
+            self._compact_journal_if_due()
+            return
+        self._players.append(player)
+        self.player_registry.add(player)
+        self.results_store.players.setdefault(player.id, player)
+        for registry in (self._standings_table, self._pairing_index):
+            if registry is not None:
+                registry.add_player(player.id)
+        self._results_version += 1
+        self._compact_journal_if_due()
+
+    def withdraw_player(self, player_id: int):
+        '''
+        Leaves the player out of the pairing of the following rounds. Played
+        games and the standings of the player are kept.
+        '''
+        player = self.get_player(player_id)
+        self._write_event(EventType.WITHDRAW, player_id = player_id)
+        player.active = False
+        self._compact_journal_if_due()
+
+    def get_player(self, player_id: int) -> Player:
+        player = self.player_registry.get(player_id)
+        if player is None:
+            raise IndexError(f"No player with id {player_id} in the tournament")
+        return player
+
     @property
     def rounds(self):
         return self._rounds
@@ -63,6 +147,80 @@ class Tournament:
                     "not respecting this ordering and should be fixed."
                 )
         self._rounds = value
+        self._standings_table = None
+        self._pairing_index = None
+        self._results_version += 1
+        # Adopt the store of rounds that were bulk loaded into a single store
+        if value and value[0].store is not None and all(r.store is value[0].store for r in value):
+            self.results_store = value[0].store
+        else:
+            self.results_store = ResultsStore()
+        self.results_store.players.update({p.id: p for p in self.players})
+        if self._on_result_change not in self.results_store.listeners:
+            self.results_store.listeners.append(self._on_result_change)
+
+    def add_round(self, round: Round):
+        if round.index != len(self.rounds) + 1:
+            raise ValueError(
+                f"Round index {round.index} does not follow the last round "
+                f"index {len(self.rounds)} of the tournament."
+            )
+        self.rounds.append(round)
+        self._get_standings_table()
+        if self._pairing_index is not None:
+            self.get_pairing_index()
+
+    def _sync_rounds(self, registry):
+        '''
+        Registers any rounds that were added, removed or replaced since the last
+        call with an incrementally maintained registry such as StandingsTable.
+        '''
+        first_unknown = 0
+        for known, current in zip(registry.rounds, self.rounds):
+            if known is not current:
+                break
+            first_unknown += 1
+        if first_unknown < len(registry.rounds):
+            registry.truncate(first_unknown)
+            self._results_version += 1
+        if first_unknown < len(self.rounds):
+            self._results_version += 1
+        for r in self.rounds[first_unknown:]:
+            if r.store is not self.results_store:
+                r.bind(self.results_store)
+            registry.add_round(r)
+        return registry
+
+    def _on_result_change(self, row: int, player_id: int | None, old: MatchResult, new: MatchResult):
+        '''Forwards a results store change to the registries that know the round'''
+        pos = find_round_position(self.rounds, self.results_store, row)
+        if pos is None:
+            return
+        self._results_version += 1
+        for registry in (self._standings_table, self._pairing_index):
+            if (registry is not None
+                    and pos < len(registry.rounds)
+                    and registry.rounds[pos] is self.rounds[pos]):
+                registry.on_result_change(pos, player_id, old, new)
+
+    def _get_standings_table(self) -> StandingsTable:
+        if self._standings_table is None:
+            self._standings_table = StandingsTable([p.id for p in self.players])
+        return self._sync_rounds(self._standings_table)
+
+    def get_pairing_index(self) -> PairingIndex:
+        '''Color and opponent history of all rounds, kept up to date as rounds are added'''
+        if self._pairing_index is None:
+            self._pairing_index = PairingIndex([p.id for p in self.players])
+        return self._sync_rounds(self._pairing_index)
+
+    def get_results_version(self) -> int:
+        '''Counter that changes whenever players, rounds or results change'''
+        self._get_standings_table()
+        return self._results_version
+
+    def _tie_breaks_current(self, round_system: RoundSystem, backend: tie_break.TieBreakBackend) -> bool:
+        return self._tie_break_versions.get(round_system) == (self.get_results_version(), backend)
 
     @classmethod
     def create_players(cls, ids, first_names = None, last_names = None):
@@ -76,15 +234,347 @@ class Tournament:
         return players
 
     @classmethod
-    def read_rounds(cls, round_folder, players):
-        rdir = round_folder
-        csv_files = [rf for rf in rdir.iterdir() if rf.suffix == '.csv']
-        csv_files = sorted(csv_files, key = lambda x: int(''.join(c for c in x.stem if c.isdigit())))
+    def read_rounds(
+            cls,
+            round_folder,
+            players,
+            executor: round_loader.LoadExecutor = round_loader.LoadExecutor.THREAD,
+        ):
+        '''
+        Reads all round csv files of the folder into a new ResultsStore.
+        Raises RoundCsvError listing every invalid row at once.
+        '''
+        return round_loader.read_rounds(round_folder, players, executor=executor)
+
+    def refresh_rounds(
+            self,
+            executor: round_loader.LoadExecutor = round_loader.LoadExecutor.THREAD,
+        ) -> list[int]:
+        '''
+        Reads only the round csv files whose content changed since the last
+        refresh and returns the indexes of the changed rounds. When the pairings
+        of a round are unchanged only its results are written to the results
+        store, which updates standings incrementally. Rounds with new pairings
+        replace the old round, rounds whose file was removed are dropped.
+        Raises RoundCsvError listing every invalid row at once, in which case
+        the tournament is left untouched. Waits for a batched write of the
+        round files to finish before reading them.
+        '''
+        round_loader.wait_for_pending_writes(self.round_folder)
+        files = round_loader.get_round_files(self.round_folder)
+        fingerprints = [self.round_file_tracker.fingerprint(f) for f in files]
+        changed = [
+            i for i, (f, fp) in enumerate(zip(files, fingerprints))
+            if i >= len(self.rounds) or self.round_file_tracker.has_changed(f, fp)
+        ]
+        games = round_loader.read_round_games(
+            [files[i] for i in changed],
+            self.player_registry,
+            executor,
+        )
+        if len(self.rounds) > len(files):
+            changed.extend(range(len(files), len(self.rounds)))
+            del self.rounds[len(files):]
+        for pos, round_games in zip(changed, games):
+            if pos < len(self.rounds):
+                self._update_round_games(pos, round_games)
+            else:
+                self.add_round(self._round_from_games(round_games, pos + 1))
+        for f, fp in zip(files, fingerprints):
+            self.round_file_tracker.record(f, fp)
+        self._round_file_paths = {i + 1: f for i, f in enumerate(files)}
+        if self._journal_replayed:
+            self._replay_journal({pos + 1 for pos in changed})
+        else:
+            self._replay_journal()
+            self._journal_replayed = True
+        return [pos + 1 for pos in changed]
+
+    def _round_from_games(self, games: list[tuple], index: int) -> Round:
+        start = len(self.results_store)
+        for game in games:
+            self.results_store.append(index, *game)
+        return Round.from_store(self.results_store, range(start, len(self.results_store)), index)
+
+    def _update_round_games(self, pos: int, games: list[tuple]):
+        round = self.rounds[pos]
+        store = self.results_store
+        same_pairings = (
+            round.store is store
+            and [g[:2] for g in round.iter_games()] == [g[:2] for g in games]
+        )
+        if not same_pairings:
+            self.rounds[pos] = self._round_from_games(games, round.index)
+            return
+        for row, (white, black, white_res, black_res) in zip(round.rows, games):
+            store.set_result(row, Color.W, white_res)
+            store.set_result(row, Color.B, black_res)
+
+    def write_round_csvs(
+            self,
+            folder: Path | None = None,
+            db = None,
+            atomic: bool = True,
+            round_indexes: set[int] | None = None,
+        ) -> list[Path]:
+        '''
+        Writes the csv file of every round, or of the rounds of round_indexes,
+        to the round folder by default and returns the written paths. Player
+        names are looked up in db once for the whole tournament, ids are
+        written without a db. With atomic, every round goes to a temporary
+        file first and the files are renamed into place one by one at the
+        end, so no round file is ever half written. refresh_rounds, and with
+        it the watcher, waits while the temporary files exist, so it does not
+        read a mix of new and old rounds either. Files written to the round
+        folder are not read again by refresh_rounds.
+        '''
+        folder = Path(folder or self.round_folder)
+        names = None
+        if db:
+            player_ids = {p.id for p in self.players}
+            for r in self.rounds:
+                player_ids.update(r.get_player_ids())
+            names = {pid: db.get_player_by_id(pid).get_full_name() for pid in player_ids}
+        paths = []
+        written = []
+        indexes = []
+        try:
+            for r in self.rounds:
+                if round_indexes is not None and r.index not in round_indexes:
+                    continue
+                path = folder / f"round{r.index}.csv"
+                target = path.with_name(path.name + '.tmp') if atomic else path
+                buffer = io.StringIO()
+                round_writer = csv.writer(buffer, delimiter=',', quotechar='"')
+                round_writer.writerow(ROUND_CSV_HEADER)
+                round_writer.writerows(r.iter_csv_rows(names))
+                with open(target, 'w', newline='') as csv_file:
+                    csv_file.write(buffer.getvalue())
+                paths.append(path)
+                written.append(target)
+                indexes.append(r.index)
+            if atomic:
+                for target, path in zip(written, paths):
+                    os.replace(target, path)
+        except BaseException:
+            if atomic:
+                for target in written:
+                    target.unlink(missing_ok=True)
+            raise
+        if self.round_folder is not None and folder == Path(self.round_folder):
+            for index, path in zip(indexes, paths):
+                self.round_file_tracker.record(path, self.round_file_tracker.fingerprint(path))
+                self._round_file_paths[index] = path
+        return paths
+
+    def _get_round_file_digest(self, round_index: int) -> str | None:
+        '''Content hash of the round file as last read or written, None without a file'''
+        fingerprint = self.round_file_tracker.files.get(self._round_file_paths.get(round_index))
+        return fingerprint[2] if fingerprint else None
+
+    def _round_files_changed(self) -> bool:
+        '''True when a round file was edited or removed since it was last read or written'''
+        tracker = self.round_file_tracker
+        for path in self._round_file_paths.values():
+            try:
+                if tracker.has_changed(path, tracker.fingerprint(path)):
+                    return True
+            except FileNotFoundError:
+                return True
+        return False
+
+    @property
+    def journal(self) -> EventJournal | None:
+        '''
+        Write-ahead journal of the tournament events, kept in the round folder.
+        None when the round folder does not exist, events are not journaled then.
+        '''
+        if self.round_folder is None or not Path(self.round_folder).is_dir():
+            return None
+        path = Path(self.round_folder) / JOURNAL_NAME
+        if self._journal is None or self._journal.path != path:
+            self._journal = EventJournal(path)
+        return self._journal
+
+    def _write_event(self, event_type: EventType, **fields):
+        journal = self.journal
+        if journal is not None and not self._replaying:
+            journal.append(event_type, **fields)
 
-        rounds = []
-        for i, f in enumerate(csv_files):
-            rounds.append(Round.read_csv(f, i+1, players))
-        return rounds
+    def _compact_journal_if_due(self):
+        journal = self.journal
+        if journal is None or self._replaying or len(journal) < self.journal_compact_interval:
+            return
+        self.checkpoint_journal()
+
+    def checkpoint_journal(self) -> list[int]:
+        '''
+        Compacts the journal through on_journal_compact when it is set, so the
+        snapshot is written along with the round files. Returns the indexes of
+        the written rounds.
+        '''
+        if self.on_journal_compact is not None:
+            return self.on_journal_compact(self)
+        return self.compact_journal()
+
+    def record_round(self, round: Round):
+        '''Journals a round paired by an assigner, once it was added to the tournament'''
+        self._write_event(
+            EventType.ROUND,
+            round = round.index,
+            games = [[w, b, w_res.name, b_res.name] for w, b, w_res, b_res in round.iter_games()],
+        )
+        self._compact_journal_if_due()
+
+    def enter_result(
+            self,
+            round_index: int,
+            board: int,
+            white_res: MatchResult,
+            black_res: MatchResult,
+        ) -> Matchup:
+        '''
+        Sets the result of one board after appending it to the journal.
+        Round index and board are 1 based, the board is the row of the game in
+        the round csv file. Standings are updated incrementally and
+        tie-breaks are calculated again the next time they are used.
+        '''
+        matchup = self._get_board_matchup(round_index, board, white_res, black_res)
+        white, black = matchup.get_player_ids()
+        self._write_event(
+            EventType.RESULT,
+            round = round_index,
+            board = board,
+            white_id = white,
+            black_id = black,
+            white_result = white_res.name,
+            black_result = black_res.name,
+            round_file = self._get_round_file_digest(round_index),
+        )
+        matchup.add_result(white_res, black_res)
+        self._compact_journal_if_due()
+        return matchup
+
+    def _get_board_matchup(
+            self,
+            round_index: int,
+            board: int,
+            white_res: MatchResult,
+            black_res: MatchResult,
+        ) -> Matchup:
+        '''Matchup of the board, raises ValueError when the result cannot be entered'''
+        if not 1 <= round_index <= len(self.rounds):
+            raise ValueError(
+                f"Round {round_index} does not exist, the tournament has {len(self.rounds)} rounds."
+            )
+        # Binds the round to the results store
+        self._get_standings_table()
+        r = self.rounds[round_index - 1]
+        if not 1 <= board <= len(r.rows):
+            raise ValueError(
+                f"Board {board} does not exist, round {round_index} has {len(r.rows)} boards."
+            )
+        matchup = Matchup.from_store(self.results_store, r.rows[board - 1])
+        if matchup.is_bye() or MatchResult.BYE in (white_res, black_res):
+            raise ValueError(
+                f"Board {board} of round {round_index} is a bye or the result is a bye. "
+                "Byes are given by the pairing and cannot be entered."
+            )
+        matchup.validate_result((white_res, black_res))
+        return matchup
+
+    def _replay_journal(self, round_indexes: set[int] | None = None):
+        '''
+        Applies the journal events on top of the rounds read from the csv files
+        or a snapshot. With round_indexes only the round and result events of
+        those rounds are applied. Paired rounds are only added when the round
+        is missing, results only when the board still holds the same players.
+        A round file wins over older events, see _is_stale_event. Stale events
+        are skipped here and only dropped from the journal by compact_journal,
+        so reading a tournament never writes to the round folder.
+        '''
+        journal = self.journal
+        if journal is None or (round_indexes is not None and not round_indexes):
+            return
+        self._replaying = True
+        try:
+            for event_type, event in journal.read():
+                if event_type in PLAYER_EVENTS:
+                    if round_indexes is None:
+                        self._replay_player_event(event_type, event)
+                    continue
+                if round_indexes is not None and event['round'] not in round_indexes:
+                    continue
+                if self._is_stale_event(event_type, event):
+                    continue
+                if event_type == EventType.ROUND:
+                    if event['round'] == len(self.rounds) + 1:
+                        games = [(w, b, MatchResult[w_res], MatchResult[b_res]) for w, b, w_res, b_res in event['games']]
+                        self.add_round(self._round_from_games(games, event['round']))
+                    continue
+                if event['round'] > len(self.rounds):
+                    continue
+                self._get_standings_table()
+                rows = self.rounds[event['round'] - 1].rows
+                board = event['board']
+                if (board > len(rows)
+                        or (self.results_store.white[rows[board - 1]], self.results_store.black[rows[board - 1]])
+                        != (event['white_id'], event['black_id'])):
+                    continue
+                white_res, black_res = MatchResult[event['white_result']], MatchResult[event['black_result']]
+                self._get_board_matchup(event['round'], board, white_res, black_res).add_result(white_res, black_res)
+        finally:
+            self._replaying = False
+
+    def _is_stale_event(self, event_type: EventType, event: dict) -> bool:
+        '''
+        True for a result entered before its round file last changed and for
+        a paired round that has a round file by now, the file holds the round.
+        '''
+        digest = self._get_round_file_digest(event['round'])
+        if event_type == EventType.ROUND:
+            return digest is not None
+        return event['round_file'] != digest
+
+    def _replay_player_event(self, event_type: EventType, event: dict):
+        if event_type == EventType.WITHDRAW:
+            player = self.player_registry.get(event['player_id'])
+            if player is not None:
+                player.active = False
+            return
+        player = self.player_registry.get(event['player_id'])
+        if player is None:
+            self.add_player(Player(event['player_id'], event['first_name'], event['last_name']))
+        else:
+            player.active = True
+
+    def compact_journal(self, db = None) -> list[int]:
+        '''
+        Writes the rounds with journaled events to their csv files and returns
+        their indexes. Only the player events stay in the journal, they are not
+        part of the round files. A crash in between leaves the journal in
+        place, replaying it again is harmless. Round files edited since they
+        were last read are read first, so their edits are not overwritten, and
+        rounds with only stale events are not written.
+        Player names are looked up in db, or in the database the tournament was
+        read from, so name based round files keep their names.
+        '''
+        journal = self.journal
+        if journal is None:
+            return []
+        if self._round_files_changed():
+            self.refresh_rounds()
+        events = journal.read()
+        round_indexes = {
+            event['round'] for event_type, event in events
+            if event_type not in PLAYER_EVENTS
+            and event['round'] <= len(self.rounds)
+            and not self._is_stale_event(event_type, event)
+        }
+        if round_indexes:
+            self.write_round_csvs(db=db or self.db, round_indexes=round_indexes)
+        journal.rewrite([(event_type, event) for event_type, event in events if event_type in PLAYER_EVENTS])
+        return sorted(round_indexes)
 
     @classmethod
     def from_toml(
@@ -98,14 +588,15 @@ class Tournament:
             config = tomli.load(fp)
         round_path = Path().cwd() / 'tournaments' / config['general']['folder'] / config['general']['round_folder']
 
-        rounds = []
         player_ids = config['players']['ids']
         if create_players:
             players = cls.create_players(player_ids)
         elif db:
             players = [db.get_player_by_id(pid) for pid in player_ids]
-        if read_rounds:
-            rounds = cls.read_rounds(round_path, players)
+        withdrawn = set(config['players'].get('withdrawn', []))
+        for p in players:
+            if p.id in withdrawn:
+                p.active = False
         swiss_tie_break = config['general'].get('tie_break_methods_swiss')
         round_robin_tie_break = config['general'].get('tie_break_methods_round_robin')
         try:
@@ -125,9 +616,9 @@ class Tournament:
             ) from e
         rs = getattr(RoundSystem, config['general']['round_system'].upper())
 
-        return cls(
+        t = cls(
             players = players,
-            rounds = rounds,
+            rounds = [],
             round_count = config['general']['rounds'],
             round_system = rs,
             tie_break_results_swiss = {x: None for x in used_swiss},
@@ -137,24 +628,68 @@ class Tournament:
             folder = Path().cwd() / 'tournaments' / config['general']['folder'],
             round_folder = round_path
         )
+        t.db = db
+        if read_rounds:
+            t.refresh_rounds()
+        return t
 
-    def calculate_tie_break_results_swiss(self):
-        mm, solk = tie_break.calc_modified_median_solkoff(
-            self.rounds[:self.get_last_complete_round_index()],
-            [p.id for p in self.players],
-            self.get_opponents()
-        )
+    def calculate_tie_break_results_swiss(
+            self,
+            backend: tie_break.TieBreakBackend = tie_break.TieBreakBackend.PYTHON,
+        ):
+        if self._tie_breaks_current(RoundSystem.SWISS, backend):
+            return
+        if backend == tie_break.TieBreakBackend.NUMPY:
+            from russ_swiss_tournament import tie_break_numpy
+            player_ids = [p.id for p in self.players]
+            opponents, results, colors = tie_break_numpy.build_result_arrays(self.rounds, player_ids)
+            mm, solk = tie_break_numpy.calc_modified_median_solkoff(
+                opponents,
+                results,
+                self.get_last_complete_round_index() or len(self.rounds),
+                player_ids,
+            )
+        else:
+            mm, solk = tie_break.calc_modified_median_solkoff(
+                self.rounds[:self.get_last_complete_round_index()],
+                [p.id for p in self.players],
+                self.get_opponents()
+            )
         self.tie_break_results_swiss[tie_break.TieBreakMethodSwiss.MODIFIED_MEDIAN] = mm
         self.tie_break_results_swiss[tie_break.TieBreakMethodSwiss.SOLKOFF] = solk
+        self._tie_break_versions[RoundSystem.SWISS] = (self.get_results_version(), backend)
 
-    def calculate_tie_break_results_round_robin(self):
-        sonne, koya = tie_break.calc_sonne_koya(
-            *self.get_player_defeated_drawn(),
-            self.get_standings(),
-            len(self.rounds),
-        )
+    def calculate_tie_break_results_round_robin(
+            self,
+            backend: tie_break.TieBreakBackend = tie_break.TieBreakBackend.PYTHON,
+        ):
+        if self._tie_breaks_current(RoundSystem.BERGER, backend):
+            return
+        if backend == tie_break.TieBreakBackend.NUMPY:
+            import numpy as np
+            from russ_swiss_tournament import tie_break_numpy
+            player_ids = [p.id for p in self.players]
+            opponents, results, colors = tie_break_numpy.build_result_arrays(
+                self.rounds[:self.get_last_complete_round_index()],
+                player_ids,
+            )
+            standings = self.get_standings()
+            sonne, koya = tie_break_numpy.calc_sonne_koya(
+                opponents,
+                results,
+                np.array([standings[pid] for pid in player_ids], dtype=float),
+                len(self.rounds),
+                player_ids,
+            )
+        else:
+            sonne, koya = tie_break.calc_sonne_koya(
+                *self.get_player_defeated_drawn(),
+                self.get_standings(),
+                len(self.rounds),
+            )
         self.tie_break_results_round_robin[tie_break.TieBreakMethodRoundRobin.SONNEBORN_BERGER] = sonne
         self.tie_break_results_round_robin[tie_break.TieBreakMethodRoundRobin.KOYA] = koya
+        self._tie_break_versions[RoundSystem.BERGER] = (self.get_results_version(), backend)
 
     def get_opponents(
             self,
@@ -166,15 +701,19 @@ class Tournament:
         '''
         # TODO: add validation if faced twice
         player_ids = [p.id for p in self.players]
-        if until == 'latest':
-            index = len(self.rounds)
-        else:
-            index = until
+        if until == 'latest' or until == len(self.rounds):
+            pairing_index = self.get_pairing_index()
+            if inverse:
+                return {p: [o for o in player_ids if o in pairing_index.unplayed[p]] for p in player_ids}
+            return {p: pairing_index.opponents[p].copy() for p in player_ids}
+        index = until
         results = dict(zip(list(player_ids), [[] for i in range(len(player_ids))]))
         for r in self.rounds[:index]:
-            for m in r.matchups:
-                results[m.res[Color.W].player.id].append(m.res[Color.B].player.id)
-                results[m.res[Color.B].player.id].append(m.res[Color.W].player.id)
+            for white, black, white_res, black_res in r.iter_games():
+                if black == BYE_PLAYER_ID:
+                    continue
+                results[white].append(black)
+                results[black].append(white)
         if inverse:
             for player, opponents in results.copy().items():
                 players_minus_self = [p for p in player_ids if p != player]
@@ -193,34 +732,38 @@ class Tournament:
         pdd = dict(zip(list(player_ids), [[[],[]] for i in range(len(player_ids))]))
         pdd_scores = dict(zip(list(player_ids), [dict() for i in range(len(player_ids))]))
         for r in self.rounds[:self.get_last_complete_round_index()]:
-            for m in r.matchups:
-                score_white = match_result_score_map[m.res[Color.W].res]
-                score_black = match_result_score_map[m.res[Color.B].res]
+            for white, black, white_res, black_res in r.iter_games():
+                if black == BYE_PLAYER_ID:
+                    continue
+                score_white = match_result_score_map[white_res]
+                score_black = match_result_score_map[black_res]
                 if score_white == 1:
-                    pdd[m.res[Color.W].player.id][0].append(m.res[Color.B].player.id)
+                    pdd[white][0].append(black)
                 if score_white == 0.5:
-                    pdd[m.res[Color.W].player.id][1].append(m.res[Color.B].player.id)
-                pdd_scores[m.res[Color.W].player.id][m.res[Color.B].player.id] = score_white
+                    pdd[white][1].append(black)
+                pdd_scores[white][black] = score_white
                 if score_black == 1:
-                    pdd[m.res[Color.B].player.id][0].append(m.res[Color.W].player.id)
+                    pdd[black][0].append(white)
                 if score_white == 0.5:
-                    pdd[m.res[Color.B].player.id][1].append(m.res[Color.W].player.id)
-                pdd_scores[m.res[Color.B].player.id][m.res[Color.W].player.id] = score_black
+                    pdd[black][1].append(white)
+                pdd_scores[black][white] = score_black
         return pdd, pdd_scores
 
 
     def get_player_color_counts(self, until: str | int ='latest') -> dict[int,list[int]]:
         player_ids = [p.id for p in self.players]
-        if until == 'latest':
-            index = len(self.rounds)
-        else:
-            index = until
+        if until == 'latest' or until == len(self.rounds):
+            pairing_index = self.get_pairing_index()
+            return {p: pairing_index.color_counts[p].copy() for p in player_ids}
+        index = until
         results = dict(zip(list(player_ids), [[0,0] for i in range(len(player_ids))]))
         # TODO: handle walkover not counting
         for r in self.rounds[:index]:
-            for m in r.matchups:
-                results[m.res[Color.W].player.id][0] += 1
-                results[m.res[Color.B].player.id][1] += 1
+            for white, black, white_res, black_res in r.iter_games():
+                if black == BYE_PLAYER_ID:
+                    continue
+                results[white][0] += 1
+                results[black][1] += 1
         return results
 
     def get_standings(
@@ -242,22 +785,9 @@ class Tournament:
                 )
         else:
             index = until
-        res = None
-        used_rounds = self.rounds[:index]
         # TODO fix recursion error with tie break inside get_standings()
-        # self.calculate_tie_break_results_round_robin()
-        # self.calculate_tie_break_results_swiss()
         # TODO sort by standings and tie break
-        for i, r in enumerate(used_rounds):
-            if i == 0:
-                res = r.get_results()
-            else:
-                res = dict(Counter(res)+Counter(r.get_results()))
-        res = {k: v for k, v in sorted(res.items(), key=lambda item: item[1], reverse=True)}
-        for p in self.players:
-            if p.id not in res:
-                res[p.id] = 0
-        return res
+        return self._get_standings_table().get_standings(index)
 
     def validate_no_incomplete_match_results_in_rounds(self):
         for round in self.rounds:
@@ -271,10 +801,12 @@ class Tournament:
         Checks the added rounds for duplicate matchups.
         In case one is found, the last round is discarded.
         '''
-        matchups = []
+        matchups = set()
         for round in self.rounds:
             for mu in round.matchups:
-                player_ids = set(mu.get_player_ids())
+                if mu.is_bye():
+                    continue
+                player_ids = frozenset(mu.get_player_ids())
                 if player_ids in matchups:
                     raise ValueError(
                         f"Round {round.index}\n{mu}\nis a duplicate.\n"
@@ -283,26 +815,24 @@ class Tournament:
                     )
                     self.rounds.pop(-1)
                 else:
-                    matchups.append(player_ids)
+                    matchups.add(player_ids)
 
     def get_last_complete_round_index(self) -> int | None:
-        if not self.rounds:
-            return None
-        sorted_rounds = sorted(self.rounds, key = lambda x: x.index)
-        complete_rounds = [r for r in sorted_rounds if r.is_complete()]
-        if complete_rounds:
-            return complete_rounds[-1].index
-        else:
-            return None
+        return self._get_standings_table().get_last_complete_round_index()
 
     def _create_initial_round(self):
         # Players list should already be orderd by rank
-        middle_index=len(self.players)//2
-        first, second = split_list(self.players.copy(), middle_index)
+        players = self.get_active_players()
+        bye = players.pop() if len(players) % 2 else None
+        middle_index=len(players)//2
+        first, second = split_list(players, middle_index)
         matchups = []
         for i, p in enumerate(first):
             matchups.append(Matchup({Color.W: PlayerMatch(second[i]),Color.B: PlayerMatch(p)}))
-        self.rounds.append(Round(matchups, index = 1))
+        if bye is not None:
+            # The lowest ranked player of an odd field sits the first round out
+            matchups.append(create_bye_matchup(bye))
+        self.add_round(Round(matchups, index = 1))
 
     def get_player_matchups(self, player_id):
         player_matchups = []
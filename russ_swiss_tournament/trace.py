@@ -0,0 +1,50 @@
+from pathlib import Path
+from enum import Enum
+import json
+
+class PairingTracer:
+    '''
+    Receives pairing events from the assigners. The base class is the
+    disabled tracer and ignores everything.
+
+    Callers check the enabled attribute before building an event, so
+    pairing has no formatting cost while tracing is off.
+    '''
+    enabled = False
+
+    def emit(self, event: str, **fields):
+        pass
+
+    def close(self):
+        pass
+
+class PrintTracer(PairingTracer):
+    '''Prints every event on its own line, useful while debugging small events'''
+    enabled = True
+
+    def emit(self, event: str, **fields):
+        details = ' '.join(f"{k}={v}" for k, v in fields.items())
+        print(f"{event}: {details}")
+
+class JsonlTracer(PairingTracer):
+    '''Writes one json object per event to a file'''
+    enabled = True
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._file = open(path, 'a')
+
+    def emit(self, event: str, **fields):
+        self._file.write(json.dumps({'event': event, **fields}, default=_to_jsonable) + '\n')
+
+    def close(self):
+        self._file.close()
+
+def _to_jsonable(value):
+    if isinstance(value, (set, frozenset)):
+        return sorted(value)
+    if isinstance(value, Enum):
+        return value.name
+    return str(value)
+
+NULL_TRACER = PairingTracer()
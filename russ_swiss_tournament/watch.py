@@ -0,0 +1,141 @@
+'''
+Watching of a round folder so standings stay live while round csv files
+are edited.
+
+On Linux the folder is watched with inotify through ctypes, elsewhere or
+when inotify is not available the csv files are polled for stat changes.
+Bursts of saves are debounced into one refresh, and Tournament.refresh_rounds
+only re-reads the rounds whose content changed.
+'''
+from pathlib import Path
+from typing import Callable
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import threading
+import time
+
+from russ_swiss_tournament.round_loader import RoundCsvError
+
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_Q_OVERFLOW = 0x00004000
+_EVENT_HEADER = struct.Struct('iIII')
+
+class PollingWatcher:
+    '''Detects changed csv files of a folder by comparing mtime and size'''
+    def __init__(self, folder: Path, interval: float = 0.1):
+        self.folder = folder
+        self.interval = interval
+        self.state = self._scan()
+
+    def _scan(self) -> dict[Path,tuple[int,int]]:
+        res = {}
+        with os.scandir(self.folder) as entries:
+            for e in entries:
+                if e.name.endswith('.csv'):
+                    stat = e.stat()
+                    res[Path(e.path)] = (stat.st_mtime_ns, stat.st_size)
+        return res
+
+    def wait(self, timeout: float) -> set[Path]:
+        '''Blocks until a csv file changed or timeout passed, returns the changed files'''
+        deadline = time.monotonic() + timeout
+        while True:
+            state = self._scan()
+            changed = {p for p in state.keys() | self.state.keys() if state.get(p) != self.state.get(p)}
+            self.state = state
+            remaining = deadline - time.monotonic()
+            if changed or remaining <= 0:
+                return changed
+            time.sleep(min(self.interval, remaining))
+
+    def close(self):
+        pass
+
+class InotifyWatcher:
+    '''Detects changed csv files of a folder with Linux inotify'''
+    MASK = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+
+    def __init__(self, folder: Path):
+        self.folder = folder
+        libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+        self.fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        wd = libc.inotify_add_watch(self.fd, os.fsencode(folder), self.MASK)
+        if wd < 0:
+            os.close(self.fd)
+            raise OSError(ctypes.get_errno(), f"Could not watch {folder}")
+
+    def wait(self, timeout: float) -> set[Path]:
+        '''Blocks until a csv file changed or timeout passed, returns the changed files'''
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return set()
+        changed = set()
+        data = os.read(self.fd, 64 * 1024)
+        offset = 0
+        while offset < len(data):
+            wd, mask, cookie, length = _EVENT_HEADER.unpack_from(data, offset)
+            offset += _EVENT_HEADER.size
+            name = data[offset:offset + length].rstrip(b'\0').decode()
+            offset += length
+            if mask & IN_Q_OVERFLOW:
+                # Events were lost, report every csv file as changed
+                changed.update(p for p in self.folder.iterdir() if p.suffix == '.csv')
+            elif name.endswith('.csv'):
+                changed.add(self.folder / name)
+        return changed
+
+    def close(self):
+        os.close(self.fd)
+
+def create_watcher(folder: Path) -> InotifyWatcher | PollingWatcher:
+    '''inotify watcher when the platform supports it, polling watcher otherwise'''
+    try:
+        return InotifyWatcher(folder)
+    except (OSError, AttributeError, TypeError):
+        return PollingWatcher(folder)
+
+def watch_rounds(
+        t,
+        on_update: Callable[[list[int]], None],
+        on_error: Callable[[Exception], None] = print,
+        debounce: float = 0.1,
+        stop: threading.Event | None = None,
+        watcher: InotifyWatcher | PollingWatcher | None = None,
+    ):
+    '''
+    Refreshes the rounds of the tournament whenever its round files change and
+    calls on_update with the changed round indexes. Saves closer together than
+    debounce seconds are handled as one change. Invalid files are reported to
+    on_error and picked up again once they are fixed. Runs until stop is set.
+    '''
+    def refresh():
+        try:
+            changed = t.refresh_rounds()
+        except RoundCsvError as e:
+            on_error(e)
+            return
+        if changed:
+            on_update(changed)
+
+    stop = stop or threading.Event()
+    watcher = watcher or create_watcher(t.round_folder)
+    try:
+        # Pick up edits made before the watch started
+        refresh()
+        while not stop.is_set():
+            if not watcher.wait(0.5):
+                continue
+            while watcher.wait(debounce):
+                pass
+            refresh()
+    finally:
+        watcher.close()
@@ -1,16 +1,30 @@
 
 import pytest
+import json
+import csv
+import shutil
+import queue
+import threading
+import os
 from pathlib import Path
 from random import choices, seed
 
-from russ_swiss_tournament.tournament import Tournament
+from russ_swiss_tournament.tournament import Tournament, RoundSystem
 from russ_swiss_tournament.player import Player
-from russ_swiss_tournament.matchup import Matchup, PlayerMatch
+from russ_swiss_tournament.matchup import Matchup, PlayerMatch, create_bye_matchup
 from russ_swiss_tournament.round import Round
-from russ_swiss_tournament.tie_break import calc_modified_median_solkoff, calc_sonne_koya
-from russ_swiss_tournament.matchup_assignment import SwissAssigner, RoundRobinAssigner
+from russ_swiss_tournament.tie_break import calc_modified_median_solkoff, calc_sonne_koya, TieBreakBackend, TieBreakMethodRoundRobin, TieBreakMethodSwiss
+from russ_swiss_tournament.matchup_assignment import SwissAssigner, RoundRobinAssigner, PairingEngine, PairingError, PAIRING_UNPAIRED_PENALTY
+from russ_swiss_tournament.matching import max_weight_matching, find_perfect_matching, has_perfect_matching, can_pair_rounds
+from russ_swiss_tournament.trace import JsonlTracer
+from russ_swiss_tournament.journal import EventType
+from russ_swiss_tournament.results_store import ResultsStore
+from russ_swiss_tournament.player_registry import PlayerRegistry
+from russ_swiss_tournament.score_groups import ScoreGroups
+from russ_swiss_tournament import round_loader, watch, snapshot, berger, season, benchmark, export, cli
 from russ_swiss_tournament.db import Database
-from russ_swiss_tournament.service import MatchResult, Color
+from russ_swiss_tournament.sqlite_db import SqliteDatabase
+from russ_swiss_tournament.service import BYE_PLAYER_ID, MatchResult, Color, match_result_score_map, parse_board_score
 
 # PLAYER
 def test_should_get_player_name():
@@ -18,6 +32,21 @@ def test_should_get_player_name():
     full_name = p.get_full_name()
     assert full_name == f"{p.first_name} {p.last_name}"
 
+def test_should_match_players_by_id_and_normalized_name():
+    players = create_players(3)
+    registry = PlayerRegistry(players)
+    assert registry.match('2') is players[1]
+    assert registry.match('  P3F   p3l ') is players[2]
+    assert registry.match('p4f p4l') is None
+    assert registry.suggest('p3f p3k') == ['p3f p3l']
+
+def test_should_suggest_names_when_round_csv_player_is_unknown(tmp_path):
+    players = create_players(2)
+    path = tmp_path / 'round1.csv'
+    path.write_text("white,score_white,black,score_black\np1f p1l,1,p2f p2x,0\n")
+    with pytest.raises(ValueError, match="Did you mean: p2f p2l"):
+        Round.read_csv(path, 1, players)
+
 # MATCHUP
 def test_should_create_without_result():
     p1, p2 = create_players(2)
@@ -75,6 +104,441 @@ def test_should_create_valid_round():
     r = Round(matchups, 2)
     assert r.index == 2
 
+# TOURNAMENT
+def test_should_update_standings_incrementally():
+    t = Tournament.from_toml(
+        Path.cwd() / 'tournaments' / 'test_round_robin' / 'config.toml',
+        read_rounds = True,
+        create_players=True,
+    )
+    expected = {p.id: 0 for p in t.players}
+    for r in t.rounds:
+        for pid, score in r.get_results().items():
+            expected[pid] += score
+    assert t.get_standings() == expected
+    before_last = t.get_standings(len(t.rounds) - 1)
+
+    m = t.rounds[-1].matchups[0]
+    white_id, black_id = m.get_player_ids()
+    m.add_result(MatchResult.UNSET, MatchResult.UNSET)
+    assert t.get_last_complete_round_index() == len(t.rounds) - 1
+    assert t.get_standings('latest')[white_id] == before_last[white_id]
+    m.add_result(MatchResult.LOSS, MatchResult.WIN)
+    assert t.get_last_complete_round_index() == len(t.rounds)
+    assert t.get_standings()[black_id] == before_last[black_id] + 1
+    assert t.get_standings(len(t.rounds) - 1) == before_last
+
+def test_should_keep_pairing_index_in_sync_with_rounds():
+    t = Tournament.from_toml(
+        Path.cwd() / 'tournaments' / 'test_round_robin' / 'config.toml',
+        read_rounds = True,
+        create_players=True,
+    )
+    rounds = t.rounds
+    t.rounds = rounds[:-1]
+    index = t.get_pairing_index()
+    t.add_round(rounds[-1])
+    assert index is t.get_pairing_index()
+    player_ids = [p.id for p in t.players]
+    for pid in player_ids:
+        assert sorted(index.opponents[pid]) == sorted(set(player_ids) - {pid})
+        assert index.unplayed[pid] == set()
+        assert sum(index.color_counts[pid]) == len(rounds)
+    assert t.get_opponents(until=1) == {
+        pid: list(index.opponents[pid][:1]) for pid in player_ids
+    }
+
+def test_should_bulk_load_rounds_with_process_pool():
+    t = Tournament.from_toml(
+        Path.cwd() / 'tournaments' / 'test_round_robin' / 'config.toml',
+        read_rounds = False,
+        create_players=True,
+    )
+    serial = round_loader.read_rounds(t.round_folder, t.players, executor=round_loader.LoadExecutor.SERIAL)
+    parallel = round_loader.read_rounds(t.round_folder, t.players, executor=round_loader.LoadExecutor.PROCESS)
+    assert [list(r.iter_games()) for r in serial] == [list(r.iter_games()) for r in parallel]
+    assert [r.index for r in parallel] == list(range(1, 14))
+    t.rounds = parallel
+    assert t.results_store is parallel[0].store
+
+def test_should_only_reread_changed_round_files(tmp_path):
+    t = Tournament.from_toml(
+        Path.cwd() / 'tournaments' / 'test_round_robin' / 'config.toml',
+        read_rounds = False,
+        create_players=True,
+    )
+    shutil.copytree(t.round_folder, tmp_path / 'rounds')
+    t.round_folder = tmp_path / 'rounds'
+    assert t.refresh_rounds() == list(range(1, 14))
+    assert t.refresh_rounds() == []
+    t.calculate_tie_break_results_round_robin()
+    version = t.get_results_version()
+    first_round = t.rounds[0]
+
+    # Rewriting a file with the same content is not a change
+    round_file = t.round_folder / 'round13.csv'
+    round_file.write_bytes(round_file.read_bytes())
+    assert t.refresh_rounds() == []
+    assert t.get_results_version() == version
+
+    round_file.write_bytes(round_file.read_bytes().replace(b'7,0,14,1', b'7,1,14,0'))
+    assert t.refresh_rounds() == [13]
+    assert t.rounds[0] is first_round
+    assert t.get_results_version() != version
+    t.calculate_tie_break_results_round_robin()
+    full = Tournament.from_toml(
+        Path.cwd() / 'tournaments' / 'test_round_robin' / 'config.toml',
+        read_rounds = False,
+        create_players=True,
+    )
+    full.round_folder = t.round_folder
+    full.refresh_rounds()
+    full.calculate_tie_break_results_round_robin()
+    assert t.get_standings() == full.get_standings()
+    assert t.tie_break_results_round_robin == full.tie_break_results_round_robin
+
+def test_should_refresh_standings_while_watching_round_folder(tmp_path):
+    t = Tournament.from_toml(
+        Path.cwd() / 'tournaments' / 'test_round_robin' / 'config.toml',
+        read_rounds = False,
+        create_players=True,
+    )
+    shutil.copytree(t.round_folder, tmp_path / 'rounds')
+    t.round_folder = tmp_path / 'rounds'
+    t.refresh_rounds()
+    for watcher in [watch.create_watcher(t.round_folder), watch.PollingWatcher(t.round_folder)]:
+        updates = queue.Queue()
+        stop = threading.Event()
+        thread = threading.Thread(
+            target=watch.watch_rounds,
+            args=(t, updates.put),
+            kwargs={'stop': stop, 'watcher': watcher, 'debounce': 0.05},
+        )
+        thread.start()
+        round_file = t.round_folder / 'round13.csv'
+        content = round_file.read_bytes()
+        round_file.write_bytes(content.replace(b'7,0,14,1', b'7,1,14,0'))
+        try:
+            assert updates.get(timeout=5) == [13]
+        finally:
+            stop.set()
+            thread.join()
+        assert t.rounds[12].get_player_matchup(7).res[Color.W].res == MatchResult.WIN
+        round_file.write_bytes(content)
+        t.refresh_rounds()
+
+def test_should_not_run_command_arguments_as_commands(tmp_path, monkeypatch):
+    t = Tournament(create_players(4), [], 3, RoundSystem.SWISS, {}, {}, 2023, 1)
+    SwissAssigner(t).create_next_round()
+    watched = []
+    monkeypatch.setattr(cli.cmd_watch, 'func', lambda t: watched.append(t))
+    monkeypatch.chdir(tmp_path)
+    cli._get_command(t, 'e w')
+    assert (tmp_path / 'w').is_dir()
+    assert watched == []
+
+def test_should_load_tournament_from_snapshot_until_toml_changes(tmp_path):
+    toml_path = tmp_path / 'config.toml'
+    shutil.copy(Path.cwd() / 'tournaments' / 'test_round_robin' / 'config.toml', toml_path)
+    snapshot_path = tmp_path / 'config.snapshot'
+    t = snapshot.load_tournament(toml_path, create_players=True)
+    t.calculate_tie_break_results_round_robin()
+    snapshot.write_snapshot(t, snapshot_path, toml_path)
+
+    restored = snapshot.read_snapshot(snapshot_path, toml_path)
+    assert [list(r.iter_games()) for r in restored.rounds] == [list(r.iter_games()) for r in t.rounds]
+    assert restored.get_standings() == t.get_standings()
+    assert restored.tie_break_results_round_robin == t.tie_break_results_round_robin
+    assert [p.get_full_name() for p in restored.players] == [p.get_full_name() for p in t.players]
+
+    toml_path.write_text(toml_path.read_text() + '\n# edited\n')
+    assert snapshot.read_snapshot(snapshot_path, toml_path) is None
+
+def test_should_process_season_in_process_pool(tmp_path):
+    configs = season.discover_configs(Path.cwd() / 'tournaments')
+    progress = []
+    report = season.process_season(
+        configs,
+        create_players=True,
+        max_workers=2,
+        progress=lambda done, total, summary: progress.append((done, total)),
+    )
+    assert progress == [(i, len(configs)) for i in range(1, len(configs) + 1)]
+    round_robin_config = Path.cwd() / 'tournaments' / 'test_round_robin' / 'config.toml'
+    summary = next(s for s in report.tournaments if s.config_path == round_robin_config)
+    assert summary.error is None
+    t = Tournament.from_toml(round_robin_config, create_players=True)
+    t.calculate_tie_break_results_round_robin()
+    assert list(summary.standings.items()) == list(t.get_standings().items())
+    assert summary.tie_breaks['koya'] == t.tie_break_results_round_robin[TieBreakMethodRoundRobin.KOYA]
+    assert sum(p.games for p in report.players.values()) == 2 * sum(
+        1 for r in t.rounds for g in r.iter_games() if g[2] != MatchResult.UNSET
+    )
+    report.write_csv(tmp_path)
+    assert (tmp_path / 'season_players.csv').read_text().count('\n') == len(t.players) + 1
+
+def test_should_keep_one_worker_roster_per_thread(tmp_path):
+    paths = []
+    for name in ('a', 'b'):
+        paths.append(tmp_path / f'{name}.csv')
+        paths[-1].write_text('id,active,last_name,first_name\r\n1,yes,Last,First\r\n')
+    barrier = threading.Barrier(2)
+    rosters = {}
+    def load(path):
+        db = season._get_worker_db(path)
+        barrier.wait()
+        # The other thread loaded its roster in between
+        rosters[path] = (db, season._get_worker_db(path))
+    threads = [threading.Thread(target=load, args=(p,)) for p in paths]
+    [t.start() for t in threads]
+    [t.join() for t in threads]
+    for path, (db, again) in rosters.items():
+        assert again is db
+        assert db.players_csv_path == path
+
+def test_should_write_season_csvs_from_the_command_line(tmp_path, capsys):
+    folder = tmp_path / 'tournaments'
+    shutil.copytree(Path.cwd() / 'tournaments' / 'test_round_robin', folder / 'test_round_robin')
+    out = tmp_path / 'out'
+    assert season.main([str(folder), '--out', str(out), '--create-players', '--executor', 'serial']) == 0
+    assert capsys.readouterr().out.startswith('[1/1] test_round_robin: 13 rounds')
+    assert (out / 'season_standings.csv').exists()
+    assert (out / 'season_players.csv').exists()
+
+def test_should_report_all_invalid_round_rows_at_once(tmp_path):
+    players = create_players(4)
+    header = "white,score_white,black,score_black\n"
+    (tmp_path / 'round1.csv').write_text(header + "1,1,2,1\n3,0,4,1\n")
+    (tmp_path / 'round2.csv').write_text(header + "1,x,3,0\n2,0.5,p5f p5l,0.5\n")
+    with pytest.raises(round_loader.RoundCsvError) as e:
+        round_loader.read_rounds(tmp_path, players)
+    assert len(e.value.errors) == 3
+    assert e.value.errors[0].startswith('round1.csv line 2')
+
+# RESULTS STORE
+def test_should_write_all_round_csvs_in_one_pass(tmp_path):
+    players_csv = tmp_path / 'player.csv'
+    players_csv.write_text(
+        'id,active,last_name,first_name\r\n'
+        + ''.join(f'{i},yes,Last{i},First{i}\r\n' for i in range(1, 10))
+    )
+    db = Database(players_csv_path=players_csv)
+    db.read_players()
+    round_folder = tmp_path / 'rounds'
+    round_folder.mkdir()
+    seed(3)
+    t = Tournament(create_players(9), [], 4, RoundSystem.SWISS, {}, {}, 2023, 1, round_folder=round_folder)
+    create_rounds(t, SwissAssigner(t), 4)
+    paths = t.write_round_csvs(db=db)
+    assert sorted(p.name for p in round_folder.glob('round*')) == [f"round{i}.csv" for i in range(1, 5)]
+    assert paths == round_loader.get_round_files(round_folder)
+    assert round_folder.joinpath('round1.csv').read_text().splitlines()[1].startswith('First')
+    assert t.refresh_rounds() == []
+    rounds = Tournament.read_rounds(round_folder, [db.get_player_by_id(i) for i in range(1, 10)])
+    assert [list(r.iter_games()) for r in rounds] == [list(r.iter_games()) for r in t.rounds]
+
+def test_should_wait_for_batched_round_write_before_refreshing(tmp_path):
+    seed(3)
+    t = Tournament(create_players(8), [], 3, RoundSystem.SWISS, {}, {}, 2023, 1, round_folder=tmp_path)
+    sa = SwissAssigner(t)
+    create_rounds(t, sa, 2)
+    t.write_round_csvs()
+    reader = Tournament(create_players(8), [], 3, RoundSystem.SWISS, {}, {}, 2023, 1, round_folder=tmp_path)
+    reader.refresh_rounds()
+
+    # A write of round 2 and 3 that is halfway through its renames
+    sa.create_next_round()
+    for r in t.rounds[1:]:
+        tmp_file = tmp_path / f"round{r.index}.csv.tmp"
+        tmp_file.write_text('white,score_white,black,score_black\n' + ''.join(
+            f"{row[0]},,{row[2]},\n" for row in r.iter_csv_rows()
+        ))
+    os.replace(tmp_path / 'round2.csv.tmp', tmp_path / 'round2.csv')
+    timer = threading.Timer(0.2, os.replace, [tmp_path / 'round3.csv.tmp', tmp_path / 'round3.csv'])
+    timer.start()
+    assert reader.refresh_rounds() == [2, 3]
+    timer.join()
+
+    # Leftovers of an interrupted write do not block reading
+    stale = tmp_path / 'round4.csv.tmp'
+    stale.write_text('')
+    os.utime(stale, (0, 0))
+    assert reader.refresh_rounds() == []
+
+def test_should_enter_single_board_results_through_journal(tmp_path):
+    seed(5)
+    t = Tournament(create_players(9), [], 3, RoundSystem.SWISS, {}, {}, 2023, 1, round_folder=tmp_path)
+    sa = SwissAssigner(t)
+    create_rounds(t, sa, 1)
+    sa.create_next_round()
+    t.write_round_csvs()
+    white, black = t.rounds[1].matchups[0].get_player_ids()
+    before = t.get_standings('latest')
+
+    assert parse_board_score('½-½') == (MatchResult.DRAW, MatchResult.DRAW)
+    t.enter_result(2, 1, *parse_board_score('1-0'))
+    assert t.get_standings('latest')[white] == before[white] + 1
+    assert t.get_standings('latest')[black] == before[black]
+    with pytest.raises(ValueError):
+        t.enter_result(2, 1, MatchResult.WIN, MatchResult.WIN)
+    with pytest.raises(ValueError):
+        t.enter_result(2, 5, MatchResult.WIN, MatchResult.LOSS)
+    with pytest.raises(ValueError):
+        t.enter_result(2, 6, MatchResult.WIN, MatchResult.LOSS)
+    assert [event_type for event_type, event in t.journal.read()] == [EventType.ROUND, EventType.ROUND, EventType.RESULT]
+
+    reloaded = Tournament(create_players(9), [], 3, RoundSystem.SWISS, {}, {}, 2023, 1, round_folder=tmp_path)
+    reloaded.refresh_rounds()
+    assert reloaded.get_standings('latest') == t.get_standings('latest')
+
+    # Reading does not touch the journal, compacting skips the paired rounds that have a file
+    assert [event_type for event_type, event in t.journal.read()] == [EventType.ROUND, EventType.ROUND, EventType.RESULT]
+    assert t.compact_journal() == [2]
+    assert not t.journal.path.exists()
+    assert t.refresh_rounds() == []
+    compacted = Tournament(create_players(9), [], 3, RoundSystem.SWISS, {}, {}, 2023, 1, round_folder=tmp_path)
+    compacted.refresh_rounds()
+    assert [list(r.iter_games()) for r in compacted.rounds] == [list(r.iter_games()) for r in t.rounds]
+
+def test_should_keep_hand_edited_round_file_over_older_journal_results(tmp_path):
+    seed(5)
+    t = Tournament(create_players(9), [], 3, RoundSystem.SWISS, {}, {}, 2023, 1, round_folder=tmp_path)
+    sa = SwissAssigner(t)
+    create_rounds(t, sa, 1)
+    sa.create_next_round()
+    t.write_round_csvs()
+    t.enter_result(2, 1, MatchResult.WIN, MatchResult.LOSS)
+
+    def edit_first_board(white_score, black_score):
+        path = tmp_path / 'round2.csv'
+        with open(path, newline='') as f:
+            rows = list(csv.reader(f))
+        rows[1][1], rows[1][3] = white_score, black_score
+        with open(path, 'w', newline='') as f:
+            csv.writer(f).writerows(rows)
+
+    edit_first_board('0', '1')
+    journal = t.journal.path.read_bytes()
+    assert t.refresh_rounds() == [2]
+    assert [g[2:] for g in t.rounds[1].iter_games()][0] == (MatchResult.LOSS, MatchResult.WIN)
+    # The stale result is skipped, not removed, reading never writes to the round folder
+    assert t.journal.path.read_bytes() == journal
+    reloaded = Tournament(create_players(9), [], 3, RoundSystem.SWISS, {}, {}, 2023, 1, round_folder=tmp_path)
+    reloaded.refresh_rounds()
+    assert reloaded.get_standings('latest') == t.get_standings('latest')
+
+    # Compacting before the edit was read does not write the journaled result back
+    t.enter_result(2, 1, MatchResult.DRAW, MatchResult.DRAW)
+    edit_first_board('1', '0')
+    assert t.compact_journal() == []
+    assert not t.journal.path.exists()
+    assert [g[2:] for g in t.rounds[1].iter_games()][0] == (MatchResult.WIN, MatchResult.LOSS)
+    compacted = Tournament(create_players(9), [], 3, RoundSystem.SWISS, {}, {}, 2023, 1, round_folder=tmp_path)
+    compacted.refresh_rounds()
+    assert [g[2:] for g in compacted.rounds[1].iter_games()][0] == (MatchResult.WIN, MatchResult.LOSS)
+
+def test_should_keep_player_names_in_round_files_when_compacting(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    toml_path = tmp_path / 'config.toml'
+    toml_path.write_text(
+        '[general]\nyear = 2023\ncount = 1\nrounds = 3\nround_system = "swiss"\n'
+        'folder = "names"\nround_folder = "rounds"\n\n[players]\nids = [1, 2, 3, 4]\n'
+    )
+    players_csv = tmp_path / 'players.csv'
+    players_csv.write_text(
+        'id,active,last_name,first_name\n1,yes,Alpha,Ann\n2,yes,Beta,Bo\n3,yes,Gamma,Cy\n4,yes,Delta,Di\n'
+    )
+    round_folder = tmp_path / 'tournaments' / 'names' / 'rounds'
+    round_folder.mkdir(parents=True)
+    round_csv = round_folder / 'round1.csv'
+    round_csv.write_text('white,score_white,black,score_black\nAnn Alpha,,Bo Beta,\nCy Gamma,1,Di Delta,0\n')
+
+    db = Database(players_csv_path=players_csv)
+    t = snapshot.load_tournament(toml_path, db=db)
+    t.enter_result(1, 1, MatchResult.DRAW, MatchResult.DRAW)
+    with pytest.raises(SystemExit):
+        cli.terminate(t)
+    # Exiting writes the snapshot as well, it already knows the compacted round file
+    stored = snapshot._read_snapshot(snapshot.get_snapshot_path(toml_path), toml_path, db)
+    assert stored.refresh_rounds() == []
+    assert stored.get_standings('latest') == t.get_standings('latest')
+    assert round_csv.read_text().splitlines() == [
+        'white,score_white,black,score_black', 'Ann Alpha,0.5,Bo Beta,0.5', 'Cy Gamma,1,Di Delta,0',
+    ]
+
+def test_should_recover_from_snapshot_and_event_journal(tmp_path):
+    toml_path = tmp_path / 'config.toml'
+    toml_path.write_text('# tournament config\n')
+    snapshot_path = tmp_path / 'config.snapshot'
+    round_folder = tmp_path / 'rounds'
+    round_folder.mkdir()
+    seed(6)
+    t = Tournament(create_players(9), [], 4, RoundSystem.SWISS, {}, {}, 2023, 1, round_folder=round_folder)
+    sa = SwissAssigner(t)
+    create_rounds(t, sa, 1)
+    snapshot.checkpoint(t, toml_path, snapshot_path=snapshot_path)
+    assert not t.journal.path.exists()
+
+    # Events after the checkpoint only live in the journal
+    sa.create_next_round()
+    for board in range(1, 5):
+        t.enter_result(2, board, MatchResult.DRAW, MatchResult.DRAW)
+    t.withdraw_player(3)
+    t.add_player(Player(10, 'p10f', 'p10l'))
+    with open(t.journal.path, 'a') as f:
+        f.write('{"type": "RESULT", "round"')
+
+    recovered = snapshot.read_snapshot(snapshot_path, toml_path)
+    assert [list(r.iter_games()) for r in recovered.rounds] == [list(r.iter_games()) for r in t.rounds]
+    assert recovered.get_standings('latest') == t.get_standings('latest')
+    assert [p.id for p in recovered.get_active_players()] == [p.id for p in t.get_active_players()]
+
+    # The torn last line is dropped before the next event is appended
+    recovered.withdraw_player(4)
+    assert len(recovered.journal.read()) == 8
+    recovered.journal.close()
+
+    snapshot.checkpoint(recovered, toml_path, snapshot_path=snapshot_path)
+    assert [event_type for event_type, event in recovered.journal.read()] == [
+        EventType.WITHDRAW, EventType.ADD_PLAYER, EventType.WITHDRAW,
+    ]
+    restored = snapshot.read_snapshot(snapshot_path, toml_path)
+    assert restored.get_standings('latest') == t.get_standings('latest')
+    assert {p.id for p in restored.players if not p.active} == {3, 4}
+
+def test_should_read_round_view_from_results_store():
+    players = create_players(4)
+    store = ResultsStore()
+    store.players.update({p.id: p for p in players})
+    store.append(1, 1, 2, MatchResult.WIN, MatchResult.LOSS)
+    store.append(1, 3, 4)
+    r = Round.from_store(store, range(0, 2), 1)
+    assert r.get_results() == {1: 1, 2: 0, 3: None, 4: None}
+    assert not r.is_complete()
+    m = r.matchups[1]
+    assert m.res[Color.W].player is players[2]
+    m.add_result(MatchResult.DRAW, MatchResult.DRAW)
+    assert store.get_result(1, Color.B) == MatchResult.DRAW
+    assert r.is_complete()
+
+def test_should_bind_tournament_rounds_to_results_store():
+    t = Tournament.from_toml(
+        Path.cwd() / 'tournaments' / 'test_round_robin' / 'config.toml',
+        read_rounds = True,
+        create_players=True,
+    )
+    before = t.get_standings()
+    assert len(t.results_store) == sum(len(r.matchups) for r in t.rounds)
+    m = t.rounds[0].matchups[0]
+    white_id, black_id = m.get_player_ids()
+    old_res = m.res[Color.W].res
+    m.res[Color.W].res = MatchResult.UNSET
+    assert t.results_store.get_result(t.rounds[0].rows[0], Color.W) == MatchResult.UNSET
+    assert not t.rounds[0].is_complete()
+    assert t.get_standings(1)[white_id] == 0
+    m.res[Color.W].res = old_res
+    assert t.get_standings() == before
+
 # # TIE-BREAK
 
 def create_players(count):
@@ -104,15 +568,17 @@ def create_random_round(matchup_count):
 def fill_round_with_random_values(round: Round):
     random_round = create_random_round(len(round.matchups))
     for i, m in enumerate(round.matchups.copy()):
+        if m.is_bye():
+            continue
         round.matchups[i].res[Color.W].res = random_round.matchups[i].res[Color.W].res
         round.matchups[i].res[Color.B].res = random_round.matchups[i].res[Color.B].res
 
-def create_rounds(t, m, count, round_matchups=None):
+def create_rounds(t, m, count, round_matchups=None, engine=PairingEngine.RULES):
     rounds = []
     if not round_matchups:
         for r_id in range(count):
             print(f"-------------- Round: {r_id + 1}-----------------")
-            m.create_next_round()
+            m.create_next_round(engine)
             fill_round_with_random_values(t.rounds[-1])
     else:
         for i,m in enumerate(round_matchups):
@@ -120,6 +586,17 @@ def create_rounds(t, m, count, round_matchups=None):
 
     return rounds
 
+def add_played_rounds(t, games):
+    '''Adds rounds of (white, black, white result, black result) games, black is BYE_PLAYER_ID for a bye'''
+    for round_games in games:
+        t.add_round(Round([
+            create_bye_matchup(t.get_player(white)) if black == BYE_PLAYER_ID else Matchup({
+                Color.W: PlayerMatch(t.get_player(white), MatchResult[white_res]),
+                Color.B: PlayerMatch(t.get_player(black), MatchResult[black_res]),
+            })
+            for white, black, white_res, black_res in round_games
+        ], len(t.rounds) + 1))
+
 # def test_should_generate_round_robin_rounds_correctly():
 #     t = Tournament.from_toml(Path.cwd() / 'tournaments' / 'dummy' / 'config.toml', create_players=True)
 #     db = Database()
@@ -173,6 +650,441 @@ def test_should_calculate_modified_median_solkoff_correctly():
 
     assert True == False
 
+# BERGER
+def test_should_calculate_berger_table_from_formula():
+    assert list(berger.iter_rounds(6)) == [
+        [(1, 6), (2, 5), (3, 4)],
+        [(6, 4), (5, 3), (1, 2)],
+        [(2, 6), (3, 1), (4, 5)],
+        [(6, 5), (1, 4), (2, 3)],
+        [(3, 6), (4, 2), (5, 1)],
+    ]
+    assert berger.get_round(5, 2) == [(None, 4), (5, 3), (1, 2)]
+    assert berger.get_round(6, 7) == [(4, 6), (3, 5), (2, 1)]
+    for player_count in [7, 8]:
+        games = [g for r in berger.iter_rounds(player_count, cycles=2) for g in r if None not in g]
+        assert len(games) == len(set(games)) == player_count * (player_count - 1)
+    assert len(berger.get_round(1000, 17)) == 500
+
+def test_should_prepare_round_robin_rounds_with_byes():
+    t = Tournament(create_players(7), [], 7, RoundSystem.BERGER, {}, {}, 2023, 1)
+    RoundRobinAssigner(t).prepare_tournament_rounds()
+    assert len(t.rounds) == 7
+    assert all(len(r.matchups) == 3 for r in t.rounds)
+    opponents = t.get_opponents()
+    assert all(sorted(o) == sorted(p.id for p in t.players if p.id != pid) for pid, o in opponents.items())
+
+# MATCHING
+def test_should_find_max_weight_matching():
+    # Heaviest single edge loses to the two lighter edges around it
+    mate = max_weight_matching([(0, 1, 5), (1, 2, 6), (2, 3, 5)])
+    assert mate == [1, 0, 3, 2]
+
+def test_should_check_that_remaining_rounds_can_be_paired():
+    # Square 1-2-3-4: two rounds are possible, the diagonals are missing
+    adjacency = {1: {2, 4}, 2: {1, 3}, 3: {2, 4}, 4: {1, 3}}
+    assert has_perfect_matching(adjacency)
+    assert not has_perfect_matching(adjacency, removed=[(1, 2), (1, 4)])
+    assert can_pair_rounds(adjacency, 2)
+    assert not can_pair_rounds(adjacency, 3)
+    assert sorted(find_perfect_matching(adjacency, removed=[(1, 2)])) == [(1, 4), (2, 3)]
+
+def test_should_prefer_max_cardinality_matching():
+    mate = max_weight_matching([(0, 1, 2), (1, 2, 10), (2, 3, 2)], max_cardinality=True)
+    assert mate == [1, 0, 3, 2]
+
+def test_should_generate_swiss_rounds_with_matching_engine():
+    seed(2023)
+    t = Tournament.from_toml(
+        Path.cwd() / 'tournaments' / 'test_swiss' / 'config.toml',
+        create_players = True,
+        read_rounds = False,
+    )
+    sa = SwissAssigner(t)
+    create_rounds(t, sa, t.round_count, engine=PairingEngine.MATCHING)
+    assert len(t.rounds) == t.round_count
+    assert all(len(r.matchups) == len(t.players) // 2 for r in t.rounds)
+    t.validate_no_duplicate_matchups()
+
+def test_should_pair_every_round_of_all_play_all_swiss_with_lookahead():
+    for engine in [PairingEngine.RULES, PairingEngine.MATCHING]:
+        for i in range(5):
+            seed(i)
+            t = Tournament(create_players(10), [], 9, RoundSystem.SWISS, {}, {}, 2023, 1)
+            create_rounds(t, SwissAssigner(t, lookahead=True), t.round_count, engine=engine)
+            assert all(len(o) == 9 for o in t.get_opponents().values())
+            t.validate_no_duplicate_matchups()
+
+def test_should_give_one_bye_per_round_in_odd_field(tmp_path):
+    pytest.importorskip('numpy')
+    for engine, lookahead in [
+            (PairingEngine.RULES, False),
+            (PairingEngine.RULES, True),
+            (PairingEngine.MATCHING, True),
+        ]:
+        seed(5)
+        t = Tournament(create_players(9), [], 7, RoundSystem.SWISS, {}, {}, 2023, 1)
+        create_rounds(t, SwissAssigner(t, lookahead=lookahead), t.round_count, engine=engine)
+        byes = [[w for w, b, wr, br in r.iter_games() if b == BYE_PLAYER_ID] for r in t.rounds]
+        # Lowest ranked player sits out first, nobody gets a second bye
+        assert byes[0] == [9]
+        assert all(len(b) == 1 for b in byes)
+        assert len({b[0] for b in byes}) == len(byes)
+        assert all(r.get_player_ids() == {p.id for p in t.players} for r in t.rounds)
+        t.validate_no_duplicate_matchups()
+        # A bye is worth a point in the standings
+        points = sum(sum(v for v in r.get_results().values()) for r in t.rounds)
+        assert sum(t.get_standings().values()) == points == 7 * 5
+    results = []
+    for backend in [TieBreakBackend.PYTHON, TieBreakBackend.NUMPY]:
+        t.calculate_tie_break_results_swiss(backend)
+        t.calculate_tie_break_results_round_robin(backend)
+        results.append((dict(t.tie_break_results_swiss), dict(t.tie_break_results_round_robin)))
+    assert results[0] == results[1]
+    t.rounds[0].write_csv(tmp_path)
+    assert '9,bye,,bye' in (tmp_path / 'round1.csv').read_text().splitlines()
+    games = round_loader.read_round_games([tmp_path / 'round1.csv'], t.players)[0]
+    assert games == list(t.rounds[0].iter_games())
+
+def test_should_order_bye_candidates_by_score_and_floats():
+    t = Tournament(create_players(4), [], 3, RoundSystem.SWISS, {}, {}, 2023, 1)
+    add_played_rounds(t, [
+        [(1, 2, 'WIN', 'LOSS'), (3, 4, 'LOSS', 'WIN')],
+        # 1 and 4 float down to the players without a point
+        [(1, 3, 'LOSS', 'WIN'), (4, 2, 'LOSS', 'WIN')],
+    ])
+    index = t.get_pairing_index()
+    assert index.down_float_counts == {1: 1, 2: 0, 3: 0, 4: 1}
+    assert index.get_bye_order([1, 2, 3, 4]) == [3, 2, 4, 1]
+
+    # A changed result of an earlier round changes the floats of the later rounds
+    t.rounds[0].matchups[0].add_result(MatchResult.LOSS, MatchResult.WIN)
+    assert index.down_float_counts == {1: 0, 2: 0, 3: 0, 4: 0}
+    assert index.scores == t.get_standings()
+    assert index.get_bye_order([1, 2, 3, 4]) == [1, 4, 3, 2]
+
+def test_should_fall_back_to_pairable_bye_when_most_eligible_one_is_not(tmp_path):
+    # 7 has the lowest score and no bye yet, but without 7 player 1 has played everybody
+    games = [
+        [(1, 2, 'WIN', 'LOSS'), (4, 5, 'DRAW', 'DRAW'), (6, 7, 'WIN', 'LOSS'), (3, BYE_PLAYER_ID, 'BYE', 'BYE')],
+        [(1, 3, 'WIN', 'LOSS'), (2, 6, 'DRAW', 'DRAW'), (5, 7, 'WIN', 'LOSS'), (4, BYE_PLAYER_ID, 'BYE', 'BYE')],
+        [(1, 4, 'WIN', 'LOSS'), (2, 7, 'WIN', 'LOSS'), (3, 6, 'DRAW', 'DRAW'), (5, BYE_PLAYER_ID, 'BYE', 'BYE')],
+        [(1, 5, 'WIN', 'LOSS'), (2, 4, 'DRAW', 'DRAW'), (3, 7, 'WIN', 'LOSS'), (6, BYE_PLAYER_ID, 'BYE', 'BYE')],
+        [(1, 6, 'WIN', 'LOSS'), (3, 5, 'DRAW', 'DRAW'), (4, 7, 'WIN', 'LOSS'), (2, BYE_PLAYER_ID, 'BYE', 'BYE')],
+    ]
+    for engine in PairingEngine:
+        t = Tournament(create_players(7), [], 7, RoundSystem.SWISS, {}, {}, 2023, 1)
+        add_played_rounds(t, games)
+        assert t.get_pairing_index().get_bye_order([p.id for p in t.players])[:2] == [7, 1]
+        trace_path = tmp_path / f"{engine.name}.jsonl"
+        tracer = JsonlTracer(trace_path)
+        report = SwissAssigner(t, tracer=tracer, seed=1).create_next_round(engine)
+        tracer.close()
+        assert report.complete
+        assert report.bye not in (1, 7)
+        events = [json.loads(l) for l in trace_path.read_text().splitlines()]
+        rejected = [(e['player'], e['reason']) for e in events if e['event'] == 'rejected_bye']
+        assert rejected[:2] == [(7, 'unpairable_round'), (1, 'unpairable_round')]
+
+def test_should_pair_around_withdrawals_and_late_entries():
+    pytest.importorskip('numpy')
+    seed(3)
+    t = Tournament(create_players(10), [], 5, RoundSystem.SWISS, {}, {}, 2023, 1)
+    sa = SwissAssigner(t, lookahead=True)
+    create_rounds(t, sa, 2)
+    index = t.get_pairing_index()
+    t.calculate_tie_break_results_swiss()
+    t.withdraw_player(3)
+    create_rounds(t, sa, 1)
+    late = Player(11, 'Late', 'Entry')
+    t.add_player(late)
+    # Registries are updated in place and cached tie-breaks are invalidated
+    assert t.get_pairing_index() is index
+    assert t.get_standings()[11] == 0
+    assert not t._tie_breaks_current(RoundSystem.SWISS, TieBreakBackend.PYTHON)
+    create_rounds(t, sa, 2)
+    assert [3 in r.get_player_ids() for r in t.rounds] == [True, True, False, False, False]
+    assert [11 in r.get_player_ids() for r in t.rounds] == [False, False, False, True, True]
+    assert [len(r.matchups) for r in t.rounds] == [5, 5, 5, 5, 5]
+    assert len(t.get_standings()) == 11
+    t.validate_no_duplicate_matchups()
+    results = []
+    for backend in [TieBreakBackend.PYTHON, TieBreakBackend.NUMPY]:
+        t.calculate_tie_break_results_swiss(backend)
+        results.append(dict(t.tie_break_results_swiss))
+    assert results[0] == results[1]
+    assert 11 in results[0][TieBreakMethodSwiss.SOLKOFF]
+
+def test_should_pair_empty_and_single_player_fields_with_every_engine():
+    for engine in PairingEngine:
+        for remaining in (0, 1):
+            t = Tournament(create_players(4), [], 3, RoundSystem.SWISS, {}, {}, 2023, 1)
+            sa = SwissAssigner(t)
+            create_rounds(t, sa, 1)
+            for p in t.players[remaining:]:
+                t.withdraw_player(p.id)
+            report = sa.pair_next_round(engine)
+            assert report.complete and sa.matchup_colors == []
+            assert report.bye == (t.players[0].id if remaining else None)
+
+def test_should_compare_pairing_benchmark_with_baseline(tmp_path):
+    cases = benchmark.create_grid([8, 9], [5], result_models=[benchmark.ResultModel.RATING])
+    assert [c.key for c in cases][:3] == [
+        'swiss-rules-rating-8x5', 'swiss-matching-rating-8x5', 'berger-rating-8x7',
+    ]
+    results = benchmark.run_benchmark(cases, repeats=2, measure_memory=True)
+    assert all(r.error is None and r.failures == 0 and r.peak_memory for r in results)
+    assert all(r.attempts >= 2 * 5 for r in results if r.key.startswith('swiss'))
+    benchmark.write_baseline(results, tmp_path / 'baseline.json')
+    baseline = benchmark.read_baseline(tmp_path / 'baseline.json')
+    assert benchmark.compare_with_baseline(results, baseline) == []
+    baseline['swiss-rules-rating-8x5'].failures = 0
+    results[0].failures = 2
+    assert benchmark.compare_with_baseline(results, baseline) == [
+        'swiss-rules-rating-8x5: failure rate 1.00 > 0.00'
+    ]
+
+def test_should_keep_unpaired_players_in_score_groups():
+    groups = ScoreGroups([5, 1, 2, 3, 4, 6], {1: 2, 2: 2, 3: 1, 4: 1, 5: 1, 6: 0})
+    assert groups.scores == [2, 1, 0]
+    assert list(groups) == [1, 2, 5, 3, 4, 6]
+    groups.remove(1)
+    assert groups.first() == 2
+    assert groups.move_down(2)
+    assert list(groups) == [2, 5, 3, 4, 6]
+    assert list(groups.iter_group(1)) == [2, 5, 3, 4]
+    for p in [2, 5, 3]:
+        groups.remove(p)
+    assert groups.first() == 4 and len(groups) == 2
+    assert groups.move_down(4) and groups.group_of[4] == 2
+    assert list(groups) == [4, 6]
+    assert not groups.move_down(4)
+
+def test_should_pair_large_field_by_score_groups():
+    seed(1)
+    t = Tournament(create_players(2100), [], 2, RoundSystem.SWISS, {}, {}, 2023, 1)
+    create_rounds(t, SwissAssigner(t), t.round_count)
+    assert all(len(r.matchups) == 1050 for r in t.rounds)
+    t.validate_no_duplicate_matchups()
+
+def create_export_tournaments(count):
+    seed(4)
+    for i in range(count):
+        t = Tournament(create_players(7), [], 3, RoundSystem.SWISS, {}, {}, 2023, i + 1)
+        create_rounds(t, SwissAssigner(t), 3)
+        yield t
+
+def test_should_export_tournaments_to_csv(tmp_path):
+    paths = export.export_tournaments(create_export_tournaments(2), tmp_path, export.ExportFormat.CSV)
+    with open(paths['games']) as f:
+        games = f.read().splitlines()
+    assert games[0] == 'year,count,round,board,white_id,black_id,white_result,black_result,white_score,black_score'
+    assert len(games) == 1 + 2 * 3 * 4
+    assert games[4].endswith(f",{BYE_PLAYER_ID},bye,bye,1,1")
+    with open(paths['standings']) as f:
+        standings = f.read().splitlines()
+    assert len(standings) == 1 + 2 * 3 * 7
+    assert standings[-1].startswith('2023,2,3,7,')
+    with open(paths['tie_breaks']) as f:
+        assert len(f.read().splitlines()) == 1 + 2 * 7 * len(TieBreakMethodSwiss)
+
+def test_should_export_tournaments_to_parquet(tmp_path):
+    pq = pytest.importorskip('pyarrow.parquet')
+    tournaments = list(create_export_tournaments(2))
+    paths = export.export_tournaments(tournaments, tmp_path)
+    assert paths['games'].suffix == '.parquet'
+    games = pq.read_table(paths['games'])
+    assert games.num_rows == 2 * 3 * 4
+    scores = {
+        (g['count'], g['round'], g['white_id']): g['white_score']
+        for g in games.to_pylist()
+    }
+    for t in tournaments:
+        for r in t.rounds:
+            for white, black, white_res, black_res in r.iter_games():
+                assert scores[(t.count, r.index, white)] == match_result_score_map[white_res]
+    standings = pq.read_table(paths['standings']).to_pylist()
+    assert {(s['player_id'], s['score']) for s in standings if s['count'] == 1 and s['round'] == 3} == set(tournaments[0].get_standings(3).items())
+
+def test_should_pair_reproducibly_with_seed():
+    pairings = []
+    for run in range(2):
+        seed(9)
+        t = Tournament(create_players(10), [], 9, RoundSystem.SWISS, {}, {}, 2023, 1)
+        sa = SwissAssigner(t, seed=11, max_attempts=50)
+        attempts = []
+        for r in range(8):
+            report = sa.create_next_round()
+            attempts.append(report.attempts if report else 1)
+            fill_round_with_random_values(t.rounds[-1])
+        pairings.append((attempts, [list(r.iter_games()) for r in t.rounds]))
+    assert pairings[0] == pairings[1]
+
+def test_should_accept_complete_shuffled_pairing_over_cheaper_incomplete_attempt(monkeypatch):
+    # The score group order leaves players 2 and 4 unpaired in this field
+    games = [
+        [(2, 4, 'DRAW', 'DRAW'), (7, 6, 'DRAW', 'DRAW'), (8, 5, 'LOSS', 'WIN'), (1, 3, 'LOSS', 'WIN')],
+        [(6, 8, 'LOSS', 'WIN'), (1, 2, 'WIN', 'LOSS'), (5, 7, 'DRAW', 'DRAW'), (3, 4, 'WIN', 'LOSS')],
+        [(3, 7, 'WIN', 'LOSS'), (1, 5, 'DRAW', 'DRAW'), (6, 2, 'LOSS', 'WIN'), (4, 8, 'DRAW', 'DRAW')],
+        [(7, 2, 'WIN', 'LOSS'), (6, 4, 'WIN', 'LOSS'), (8, 1, 'LOSS', 'WIN'), (3, 5, 'WIN', 'LOSS')],
+    ]
+    def create_tournament():
+        t = Tournament(create_players(8), [], 7, RoundSystem.SWISS, {}, {}, 2023, 1)
+        add_played_rounds(t, games)
+        return t
+
+    assert SwissAssigner(create_tournament(), max_attempts=1).pair_next_round().unpaired == [2, 4]
+    report = SwissAssigner(create_tournament(), seed=0).create_next_round()
+    assert report.complete
+    assert report.attempts > 1
+
+    # Score penalties of the shuffled pairing outweigh the unpaired penalty
+    monkeypatch.setattr('russ_swiss_tournament.matchup_assignment.PAIRING_SCORE_PENALTY', 100_000)
+    t = create_tournament()
+    report = SwissAssigner(t, seed=0).create_next_round()
+    assert report.complete
+    assert report.cost > 2 * PAIRING_UNPAIRED_PENALTY
+    assert len(t.rounds) == 5
+
+def test_should_report_best_effort_pairing_when_no_pairing_exists():
+    seed(1)
+    t = Tournament(create_players(4), [], 4, RoundSystem.SWISS, {}, {}, 2023, 1)
+    RoundRobinAssigner(t).prepare_tournament_rounds()
+    for r in t.rounds:
+        fill_round_with_random_values(r)
+    sa = SwissAssigner(t, seed=1, max_attempts=3, time_budget=1)
+    report = sa.pair_next_round()
+    assert not report.complete
+    assert report.attempts == 3
+    assert report.cost >= len(report.unpaired) * PAIRING_UNPAIRED_PENALTY > 0
+    with pytest.raises(PairingError) as e:
+        sa.create_next_round()
+    assert e.value.report.unpaired == report.unpaired
+    assert len(t.rounds) == 3
+
+    # Every engine reports the failure the same way
+    for assigner, engine in [
+            (SwissAssigner(t), PairingEngine.MATCHING),
+            (SwissAssigner(t, lookahead=True), PairingEngine.RULES),
+        ]:
+        with pytest.raises(PairingError) as e:
+            assigner.create_next_round(engine)
+        assert sorted(e.value.report.unpaired) == [1, 2, 3, 4]
+        assert e.value.report.cost == 4 * PAIRING_UNPAIRED_PENALTY
+    assert len(t.rounds) == 3
+
+def test_should_not_print_while_pairing_without_tracer(capsys):
+    seed(2023)
+    t = Tournament.from_toml(
+        Path.cwd() / 'tournaments' / 'test_swiss' / 'config.toml',
+        create_players = True,
+        read_rounds = False,
+    )
+    sa = SwissAssigner(t)
+    for i in range(3):
+        sa.create_next_round()
+        fill_round_with_random_values(t.rounds[-1])
+    assert capsys.readouterr().out == ''
+
+def test_should_write_pairing_trace_as_jsonl(tmp_path):
+    seed(2023)
+    t = Tournament.from_toml(
+        Path.cwd() / 'tournaments' / 'test_swiss' / 'config.toml',
+        create_players = True,
+        read_rounds = False,
+    )
+    tracer = JsonlTracer(tmp_path / 'trace.jsonl')
+    sa = SwissAssigner(t, tracer=tracer)
+    create_rounds(t, sa, 3)
+    tracer.close()
+    events = [json.loads(l) for l in (tmp_path / 'trace.jsonl').read_text().splitlines()]
+    assert {'candidate', 'matched'} <= {e['event'] for e in events}
+    assert len([e for e in events if e['event'] == 'matched']) >= 2 * len(t.players) // 2
+
+def test_should_calculate_same_tie_breaks_with_numpy_backend():
+    pytest.importorskip('numpy')
+    seed(2023)
+    t = Tournament.from_toml(
+        Path.cwd() / 'tournaments' / 'test_swiss' / 'config.toml',
+        create_players = True,
+        read_rounds = False,
+    )
+    sa = SwissAssigner(t)
+    create_rounds(t, sa, t.round_count, engine=PairingEngine.MATCHING)
+    results = []
+    for backend in [TieBreakBackend.PYTHON, TieBreakBackend.NUMPY]:
+        t.calculate_tie_break_results_swiss(backend)
+        t.calculate_tie_break_results_round_robin(backend)
+        results.append((dict(t.tie_break_results_swiss), dict(t.tie_break_results_round_robin)))
+    assert results[0] == results[1]
+
+def test_should_aggregate_standings_in_sqlite_database(tmp_path):
+    players_csv = tmp_path / 'player.csv'
+    players_csv.write_text(
+        'id,active,last_name,first_name\n'
+        + ''.join(f'{i},yes,Last{i},First{i}\n' for i in range(1, 15))
+    )
+    db = SqliteDatabase(tmp_path / 'russ.sqlite', players_csv_path=players_csv)
+    db.read_players()
+    assert db.get_player_by_id(3).get_full_name() == 'First3 Last3'
+    with pytest.raises(IndexError):
+        db.get_player_by_id(99)
+
+    t = Tournament.from_toml(Path.cwd() / 'tournaments' / 'test_round_robin' / 'config.toml', db=db)
+    db.import_tournament(t)
+    db.import_tournament(t)
+    rounds = db.get_rounds(t.year, t.count)
+    assert [list(r.iter_games()) for r in rounds] == [list(r.iter_games()) for r in t.rounds]
+    last = db.get_last_complete_round_index(t.year, t.count)
+    assert last == t.get_last_complete_round_index()
+    assert list(db.get_standings(t.year, t.count, last).items()) == list(t.get_standings().items())
+    assert db.get_standings(t.year, t.count, 0) == dict.fromkeys([p.id for p in t.players], 0)
+
+    # A database file that already holds the players is not imported again on load
+    db.close()
+    players_csv.write_text(players_csv.read_text().replace('First3', 'Renamed3'))
+    reopened = SqliteDatabase(tmp_path / 'russ.sqlite', players_csv_path=players_csv)
+    assert reopened.has_players()
+    toml_path = tmp_path / 'config.toml'
+    shutil.copy(Path.cwd() / 'tournaments' / 'test_round_robin' / 'config.toml', toml_path)
+    loaded = snapshot.load_tournament(toml_path, db=reopened)
+    assert loaded.get_standings() == t.get_standings()
+    assert reopened.get_player_by_id(3).get_full_name() == 'First3 Last3'
+    reopened.close()
+
+def test_should_only_create_referenced_players_with_lazy_database(tmp_path):
+    players_csv = tmp_path / 'player.csv'
+    players_csv.write_text(
+        'id,active,last_name,first_name\r\n'
+        + ''.join(f'{i},yes,"Last, {i}",First{i}\r\n' for i in range(2000, 0, -1))
+    )
+    eager = Database(players_csv_path=players_csv)
+    eager.read_players()
+    db = Database(players_csv_path=players_csv, lazy=True)
+    db.read_players()
+    assert (tmp_path / 'player.csv.idx').exists()
+    for pid in [1, 1000, 2000]:
+        assert db.get_player_by_id(pid).get_full_name() == eager.get_player_by_id(pid).get_full_name()
+    assert len(db.registry) == 3
+    with pytest.raises(IndexError):
+        db.get_player_by_id(2001)
+
+    players_csv.write_text(players_csv.read_text() + '2001,no,Late,Entry\r\n')
+    db.read_players()
+    assert not db.get_player_by_id(2001).active
+
+def test_should_read_empty_roster_with_lazy_database(tmp_path):
+    players_csv = tmp_path / 'player.csv'
+    for content in ['', 'id,active,last_name,first_name\r\n']:
+        players_csv.write_text(content)
+        (tmp_path / 'player.csv.idx').write_bytes(b'')
+        db = Database(players_csv_path=players_csv, lazy=True)
+        db.read_players()
+        assert len(db.index) == 0
+        with pytest.raises(IndexError):
+            db.get_player_by_id(1)
+        db.index.close()
+
 # # DATABASE
 def test_read_players_from_csv_db():
     db = Database()